@@ -0,0 +1,53 @@
+"""Price history time series
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FIRST_PARTITION = date(2015, 1, 1)
+MONTHS_AHEAD = 12
+
+
+def _months(start: date, end: date):
+    month = start
+    while month <= end:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table('price_history',
+        sa.Column('holding_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('price_date', sa.Date(), nullable=False),
+        sa.Column('close_amount', sa.BigInteger(), nullable=False),
+        sa.Column('currency', sa.String(3), nullable=False),
+        sa.ForeignKeyConstraint(['holding_id'], ['equity_holdings.id']),
+        sa.PrimaryKeyConstraint('holding_id', 'price_date'),
+        postgresql_partition_by='RANGE (price_date)'
+    )
+    
+    # Monthly partitions; later months are created on demand by the append path
+    today = date.today()
+    last = date(today.year + (today.month + MONTHS_AHEAD - 1) // 12, (today.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+    for month in _months(FIRST_PARTITION, last):
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE price_history_y{month.year}m{month.month:02d} PARTITION OF price_history "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('price_history')
@@ -0,0 +1,32 @@
+"""Daily portfolio NAV series
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_nav',
+        sa.Column('nav_date', sa.Date(), nullable=False),
+        sa.Column('equities_value', sa.BigInteger(), nullable=False),
+        sa.Column('fixed_income_value', sa.BigInteger(), nullable=False),
+        sa.Column('real_estate_value', sa.BigInteger(), nullable=False),
+        sa.Column('private_funds_value', sa.BigInteger(), nullable=False),
+        sa.Column('total_value_kwd', sa.BigInteger(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('nav_date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_nav')
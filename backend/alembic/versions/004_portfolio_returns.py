@@ -0,0 +1,35 @@
+"""Cached portfolio returns per period close
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_returns',
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('entity_type', sa.String(20), nullable=False),
+        sa.Column('entity_key', sa.String(64), nullable=False),
+        sa.Column('period', sa.String(3), nullable=False),
+        sa.Column('asset_class', sa.String(20), nullable=True),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('twr_dietz_bps', sa.Integer(), nullable=True),
+        sa.Column('twr_daily_bps', sa.Integer(), nullable=True),
+        sa.Column('mwr_bps', sa.Integer(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('as_of_date', 'entity_type', 'entity_key', 'period')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_returns')
@@ -0,0 +1,31 @@
+"""Indexes for point-in-time lookups
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_equity_transactions_holding_date', 'equity_transactions', ['holding_id', 'transaction_date'])
+    op.create_index('ix_property_valuations_property_date', 'property_valuations', ['property_id', sa.text('valuation_date DESC')])
+    op.create_index('ix_fund_valuations_fund_date', 'fund_valuations', ['fund_id', sa.text('valuation_date DESC')])
+    op.create_index('ix_capital_calls_fund_payment', 'capital_calls', ['fund_id', 'payment_date'])
+    op.create_index('ix_distributions_fund_payment', 'distributions', ['fund_id', 'payment_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_distributions_fund_payment', 'distributions')
+    op.drop_index('ix_capital_calls_fund_payment', 'capital_calls')
+    op.drop_index('ix_fund_valuations_fund_date', 'fund_valuations')
+    op.drop_index('ix_property_valuations_property_date', 'property_valuations')
+    op.drop_index('ix_equity_transactions_holding_date', 'equity_transactions')
@@ -0,0 +1,97 @@
+"""Partition audit logs by month
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, created_at, updated_at, deleted_at, user_id, action, entity_type, entity_id, "
+    "old_values, new_values, ip_address, user_agent, description"
+)
+
+
+def _months(start: date, end: date):
+    month = start
+    while month <= end:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.rename_table('audit_logs', 'audit_logs_unpartitioned')
+    op.execute("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey")
+    op.execute("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_user_id_fkey TO audit_logs_unpartitioned_user_id_fkey")
+
+    op.create_table('audit_logs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('action', sa.String(50), nullable=False),
+        sa.Column('entity_type', sa.String(100), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('old_values', postgresql.JSONB(), nullable=True),
+        sa.Column('new_values', postgresql.JSONB(), nullable=True),
+        sa.Column('ip_address', sa.String(45), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)'
+    )
+
+    # Partitions from the oldest existing row up to a few months ahead;
+    # the audit writer and the retention job create later months on demand
+    first = op.get_bind().execute(sa.text("SELECT MIN(created_at)::date FROM audit_logs_unpartitioned")).scalar()
+    today = date.today()
+    first = (first or today).replace(day=1)
+    last = date(today.year + (today.month + MONTHS_AHEAD - 1) // 12, (today.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+    for month in _months(first, last):
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month.year}m{month.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_unpartitioned")
+    op.drop_table('audit_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    op.create_table('audit_logs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('action', sa.String(50), nullable=False),
+        sa.Column('entity_type', sa.String(100), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('old_values', postgresql.JSONB(), nullable=True),
+        sa.Column('new_values', postgresql.JSONB(), nullable=True),
+        sa.Column('ip_address', sa.String(45), nullable=True),
+        sa.Column('user_agent', sa.Text(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='audit_logs_user_id_fkey_'),
+        sa.PrimaryKeyConstraint('id', name='audit_logs_pkey_')
+    )
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.drop_table('audit_logs_partitioned')
+    op.execute("ALTER TABLE audit_logs RENAME CONSTRAINT audit_logs_pkey_ TO audit_logs_pkey")
+    op.execute("ALTER TABLE audit_logs RENAME CONSTRAINT audit_logs_user_id_fkey_ TO audit_logs_user_id_fkey")
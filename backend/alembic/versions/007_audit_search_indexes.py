@@ -0,0 +1,35 @@
+"""Audit log search indexes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every index ends in the keyset sort key so filtered pages are index range scans
+    op.create_index('ix_audit_logs_created', 'audit_logs', [sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_audit_logs_entity', 'audit_logs', ['entity_type', 'entity_id', sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_audit_logs_user', 'audit_logs', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_audit_logs_action', 'audit_logs', ['action', sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_audit_logs_old_values', 'audit_logs', ['old_values'], postgresql_using='gin', postgresql_ops={'old_values': 'jsonb_path_ops'})
+    op.create_index('ix_audit_logs_new_values', 'audit_logs', ['new_values'], postgresql_using='gin', postgresql_ops={'new_values': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_logs_new_values', 'audit_logs')
+    op.drop_index('ix_audit_logs_old_values', 'audit_logs')
+    op.drop_index('ix_audit_logs_action', 'audit_logs')
+    op.drop_index('ix_audit_logs_user', 'audit_logs')
+    op.drop_index('ix_audit_logs_entity', 'audit_logs')
+    op.drop_index('ix_audit_logs_created', 'audit_logs')
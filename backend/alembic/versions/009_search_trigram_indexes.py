@@ -0,0 +1,43 @@
+"""Trigram indexes for cross-entity search
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = {
+    'equity_holdings': ('ticker', 'name'),
+    'fixed_income_holdings': ('name', 'isin', 'issuer'),
+    'properties': ('name', 'city'),
+    'units': ('tenant_name', 'unit_number'),
+    'private_funds': ('name', 'fund_manager'),
+}
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Partial on live rows, matching the search predicate; gin_trgm_ops serves
+    # both ILIKE '%q%' and the word-similarity operator <%
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.create_index(
+                f'ix_{table}_{column}_trgm', table, [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_where=sa.text('deleted_at IS NULL')
+            )
+
+
+def downgrade() -> None:
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.drop_index(f'ix_{table}_{column}_trgm', table)
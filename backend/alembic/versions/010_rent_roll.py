@@ -0,0 +1,42 @@
+"""One live rental income row per unit and period
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Entered by hand until now, so a period may have been recorded twice; keep
+    # the row with the most collected and soft delete the rest
+    op.execute("""
+        UPDATE rental_income r SET deleted_at = now() AT TIME ZONE 'utc'
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY unit_id, period_start
+                ORDER BY COALESCE(received_amount, 0) DESC, created_at, id
+            ) AS n
+            FROM rental_income
+            WHERE deleted_at IS NULL
+        ) d
+        WHERE r.id = d.id AND d.n > 1
+    """)
+    # Arbiter for the rent roll's ON CONFLICT DO NOTHING
+    op.create_index(
+        'uq_rental_income_unit_period', 'rental_income', ['unit_id', 'period_start'],
+        unique=True,
+        postgresql_where=sa.text('deleted_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_rental_income_unit_period', 'rental_income')
@@ -0,0 +1,29 @@
+"""Index units by lease end date
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lease event queries are a range on lease_end_date; the included columns
+    # cover the rent-at-risk aggregates without visiting the heap
+    op.create_index(
+        'ix_units_lease_end', 'units', ['lease_end_date'],
+        postgresql_include=['property_id', 'status', 'monthly_rent_amount', 'monthly_rent_currency'],
+        postgresql_where=sa.text('deleted_at IS NULL AND lease_end_date IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_units_lease_end', 'units')
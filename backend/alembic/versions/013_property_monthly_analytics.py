@@ -0,0 +1,40 @@
+"""Cached monthly property P&L
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('property_monthly_analytics',
+        sa.Column('property_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('gross_rent', sa.BigInteger(), nullable=False),
+        sa.Column('collections', sa.BigInteger(), nullable=False),
+        sa.Column('expenses', sa.BigInteger(), nullable=False),
+        sa.Column('expenses_by_type', postgresql.JSONB(), nullable=False),
+        sa.Column('noi', sa.BigInteger(), nullable=False),
+        sa.Column('property_value', sa.BigInteger(), nullable=True),
+        sa.Column('area_sqm', sa.BigInteger(), nullable=True),
+        sa.Column('gross_yield_bps', sa.Integer(), nullable=True),
+        sa.Column('net_yield_bps', sa.Integer(), nullable=True),
+        sa.Column('expenses_per_sqm', sa.BigInteger(), nullable=True),
+        sa.Column('source_version', sa.String(32), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('property_id', 'month')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('property_monthly_analytics')
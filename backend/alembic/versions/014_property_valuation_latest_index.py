@@ -0,0 +1,32 @@
+"""Covering index for latest property valuations
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every reader filters on live rows; the included value columns let the
+    # latest-per-property DISTINCT ON and point-in-time probes skip the heap
+    op.create_index(
+        'ix_property_valuations_latest', 'property_valuations',
+        ['property_id', sa.text('valuation_date DESC'), sa.text('created_at DESC')],
+        postgresql_include=['id', 'value_amount', 'currency'],
+        postgresql_where=sa.text('deleted_at IS NULL')
+    )
+    op.drop_index('ix_property_valuations_property_date', 'property_valuations')
+
+
+def downgrade() -> None:
+    op.create_index('ix_property_valuations_property_date', 'property_valuations', ['property_id', sa.text('valuation_date DESC')])
+    op.drop_index('ix_property_valuations_latest', 'property_valuations')
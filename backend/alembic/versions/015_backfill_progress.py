@@ -0,0 +1,36 @@
+"""Checkpoints for resumable backfills
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('backfill_progress',
+        sa.Column('job', sa.String(50), nullable=False),
+        sa.Column('table_name', sa.String(63), nullable=False),
+        sa.Column('last_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('total_rows', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('rows_scanned', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('rows_updated', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('rows_missing_rate', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('started_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('job', 'table_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('backfill_progress')
@@ -0,0 +1,114 @@
+"""Dense daily exchange rates
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from datetime import date, timedelta
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '016'
+down_revision: Union[str, None] = '015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# As of this revision; services.fx owns the live copy of the query
+BASE_CURRENCY = 'KWD'
+PIVOT_CURRENCY = 'USD'
+RATE_SCALE = 100000000
+FORWARD_DAYS = 31
+
+FX_RATES_DAILY_SQL = """
+    WITH quotes AS (
+        SELECT DISTINCT ON (from_currency, to_currency, rate_date)
+            from_currency, to_currency, rate_date, rate
+        FROM (
+            SELECT from_currency, to_currency, rate_date, rate::numeric / :scale AS rate, 0 AS inverted
+            FROM exchange_rates
+            WHERE deleted_at IS NULL AND rate > 0
+            UNION ALL
+            SELECT to_currency, from_currency, rate_date, :scale / rate::numeric, 1
+            FROM exchange_rates
+            WHERE deleted_at IS NULL AND rate > 0
+        ) q
+        ORDER BY from_currency, to_currency, rate_date, inverted
+    ),
+    quoted AS (
+        SELECT q.from_currency, q.to_currency, d::date AS rate_date, q.rate, q.rate_date AS quote_date
+        FROM (
+            SELECT *, LEAD(rate_date) OVER (PARTITION BY from_currency, to_currency ORDER BY rate_date) AS next_date
+            FROM quotes
+        ) q
+        CROSS JOIN LATERAL generate_series(
+            GREATEST(q.rate_date, CAST(:start AS date)),
+            LEAST(COALESCE(q.next_date - 1, CAST(:through AS date)), CAST(:through AS date)),
+            interval '1 day'
+        ) d
+        WHERE q.next_date IS NULL OR q.next_date > CAST(:start AS date)
+    ),
+    via_pivot AS (
+        SELECT x.from_currency, x.rate_date, x.rate * p.rate AS rate, LEAST(x.quote_date, p.quote_date) AS quote_date
+        FROM quoted x
+        JOIN quoted p ON p.from_currency = x.to_currency AND p.to_currency = :base AND p.rate_date = x.rate_date
+        WHERE x.to_currency = :pivot AND x.from_currency <> :base
+    ),
+    in_base AS (
+        SELECT CAST(:base AS varchar) AS currency, d::date AS rate_date, 1::numeric AS rate, NULL::date AS quote_date
+        FROM generate_series(CAST(:start AS date), CAST(:through AS date), interval '1 day') d
+        UNION ALL
+        SELECT COALESCE(b.from_currency, v.from_currency), COALESCE(b.rate_date, v.rate_date),
+               COALESCE(b.rate, v.rate), COALESCE(b.quote_date, v.quote_date)
+        FROM (SELECT * FROM quoted WHERE to_currency = :base) b
+        FULL JOIN via_pivot v ON v.from_currency = b.from_currency AND v.rate_date = b.rate_date
+    ),
+    crossed AS (
+        SELECT a.currency AS from_currency, c.currency AS to_currency, a.rate_date,
+               a.rate / c.rate AS rate, LEAST(a.quote_date, c.quote_date) AS quote_date
+        FROM in_base a
+        JOIN in_base c ON c.rate_date = a.rate_date AND c.currency <> a.currency
+    )
+    SELECT COALESCE(q.from_currency, x.from_currency) AS from_currency,
+           COALESCE(q.to_currency, x.to_currency) AS to_currency,
+           COALESCE(q.rate_date, x.rate_date) AS rate_date,
+           round(COALESCE(q.rate, x.rate) * :scale)::bigint AS rate,
+           COALESCE(q.quote_date, x.quote_date) AS quote_date,
+           q.rate IS NULL AS triangulated
+    FROM quoted q
+    FULL JOIN crossed x ON x.from_currency = q.from_currency AND x.to_currency = q.to_currency
+                       AND x.rate_date = q.rate_date
+"""
+
+
+def upgrade() -> None:
+    op.create_table('fx_rates_daily',
+        sa.Column('from_currency', sa.String(3), nullable=False),
+        sa.Column('to_currency', sa.String(3), nullable=False),
+        sa.Column('rate_date', sa.Date(), nullable=False),
+        sa.Column('rate', sa.BigInteger(), nullable=False),
+        sa.Column('quote_date', sa.Date(), nullable=True),
+        sa.Column('triangulated', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.PrimaryKeyConstraint('from_currency', 'to_currency', 'rate_date')
+    )
+    # Filled here, as reads never build it; writers and the daily
+    # scripts/extend_fx_rates.py job extend it from then on
+    bind = op.get_bind()
+    start = bind.execute(sa.text("SELECT MIN(rate_date) FROM exchange_rates WHERE deleted_at IS NULL")).scalar()
+    if start is None:
+        return
+    bind.execute(sa.text(f"""
+        INSERT INTO fx_rates_daily (from_currency, to_currency, rate_date, rate, quote_date, triangulated)
+        {FX_RATES_DAILY_SQL}
+    """), {
+        "base": BASE_CURRENCY,
+        "pivot": PIVOT_CURRENCY,
+        "scale": RATE_SCALE,
+        "start": start,
+        "through": date.today() + timedelta(days=FORWARD_DAYS),
+    })
+
+
+def downgrade() -> None:
+    op.drop_table('fx_rates_daily')
@@ -0,0 +1,109 @@
+"""Partition equity transactions by month
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = '017'
+down_revision: Union[str, None] = '016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, created_at, updated_at, deleted_at, holding_id, transaction_type, quantity, price_amount, "
+    "price_currency, total_amount, total_amount_kwd, transaction_date, fees_amount, notes"
+)
+
+
+def _months(start: date, end: date):
+    month = start
+    while month <= end:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _columns():
+    return (
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('holding_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('transaction_type', sa.String(10), nullable=False),
+        sa.Column('quantity', sa.BigInteger(), nullable=False),
+        sa.Column('price_amount', sa.BigInteger(), nullable=False),
+        sa.Column('price_currency', sa.String(3), nullable=False),
+        sa.Column('total_amount', sa.BigInteger(), nullable=False),
+        sa.Column('total_amount_kwd', sa.BigInteger(), nullable=False),
+        sa.Column('transaction_date', sa.Date(), nullable=False),
+        sa.Column('fees_amount', sa.BigInteger(), default=0),
+        sa.Column('notes', sa.Text(), nullable=True),
+    )
+
+
+def _version_trigger() -> None:
+    op.execute("""
+        CREATE TRIGGER equity_transactions_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON equity_transactions
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+    """)
+
+
+def upgrade() -> None:
+    op.rename_table('equity_transactions', 'equity_transactions_unpartitioned')
+    op.execute("ALTER TABLE equity_transactions_unpartitioned RENAME CONSTRAINT equity_transactions_pkey TO equity_transactions_unpartitioned_pkey")
+    op.execute("ALTER TABLE equity_transactions_unpartitioned RENAME CONSTRAINT equity_transactions_holding_id_fkey TO equity_transactions_unpartitioned_holding_id_fkey")
+    op.execute("ALTER INDEX ix_equity_transactions_holding_date RENAME TO ix_equity_transactions_unpartitioned_holding_date")
+
+    op.create_table('equity_transactions',
+        *_columns(),
+        sa.ForeignKeyConstraint(['holding_id'], ['equity_holdings.id']),
+        sa.PrimaryKeyConstraint('id', 'transaction_date'),
+        postgresql_partition_by='RANGE (transaction_date)'
+    )
+    op.create_index('ix_equity_transactions_holding_date', 'equity_transactions', ['holding_id', 'transaction_date'])
+    # Sort key of the ledger, so a page is an index range scan of the few
+    # partitions its dates fall in
+    op.create_index('ix_equity_transactions_date', 'equity_transactions', ['transaction_date', 'id'])
+
+    # Partitions from the oldest transaction up to a few months ahead;
+    # writes to any other month create its partition on demand
+    first = op.get_bind().execute(sa.text("SELECT MIN(transaction_date) FROM equity_transactions_unpartitioned")).scalar()
+    today = date.today()
+    first = min(first or today, today).replace(day=1)
+    last = date(today.year + (today.month + MONTHS_AHEAD - 1) // 12, (today.month + MONTHS_AHEAD - 1) % 12 + 1, 1)
+    last = max(last, op.get_bind().execute(sa.text("SELECT MAX(transaction_date) FROM equity_transactions_unpartitioned")).scalar() or last)
+    for month in _months(first, last.replace(day=1)):
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE equity_transactions_y{month.year}m{month.month:02d} PARTITION OF equity_transactions "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+
+    op.execute(f"INSERT INTO equity_transactions ({COLUMNS}) SELECT {COLUMNS} FROM equity_transactions_unpartitioned")
+    op.drop_table('equity_transactions_unpartitioned')
+    _version_trigger()
+
+
+def downgrade() -> None:
+    op.rename_table('equity_transactions', 'equity_transactions_partitioned')
+    op.create_table('equity_transactions',
+        *_columns(),
+        sa.ForeignKeyConstraint(['holding_id'], ['equity_holdings.id'], name='equity_transactions_holding_id_fkey_'),
+        sa.PrimaryKeyConstraint('id', name='equity_transactions_pkey_')
+    )
+    op.execute(f"INSERT INTO equity_transactions ({COLUMNS}) SELECT {COLUMNS} FROM equity_transactions_partitioned")
+    op.drop_table('equity_transactions_partitioned')
+    op.execute("ALTER TABLE equity_transactions RENAME CONSTRAINT equity_transactions_pkey_ TO equity_transactions_pkey")
+    op.execute("ALTER TABLE equity_transactions RENAME CONSTRAINT equity_transactions_holding_id_fkey_ TO equity_transactions_holding_id_fkey")
+    op.create_index('ix_equity_transactions_holding_date', 'equity_transactions', ['holding_id', 'transaction_date'])
+    _version_trigger()
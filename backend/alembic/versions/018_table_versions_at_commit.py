@@ -0,0 +1,97 @@
+"""Bump table versions once per transaction, at commit
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '018'
+down_revision: Union[str, None] = '017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per transaction that wrote a versioned table; its deferred
+    # trigger does the bump at commit and deletes it again
+    op.create_table(
+        'table_version_bumps',
+        sa.Column('txid', sa.BigInteger(), nullable=False),
+        prefixes=['UNLOGGED'],
+    )
+
+    # Bumps every table the transaction wrote since the last bump, locking
+    # the counter rows in table order, and returns the new versions
+    op.execute("""
+        CREATE FUNCTION bump_written_versions() RETURNS TABLE (written_table varchar, new_version bigint) AS $$
+        DECLARE
+            written text := current_setting('app.written_tables', true);
+        BEGIN
+            IF written IS NULL OR written = '' THEN
+                RETURN;
+            END IF;
+            PERFORM set_config('app.written_tables', '', true);
+            RETURN QUERY
+                INSERT INTO table_versions AS v (table_name, version, updated_at)
+                SELECT t, 1, now() FROM unnest(string_to_array(written, ',')) AS t ORDER BY t
+                ON CONFLICT (table_name)
+                DO UPDATE SET version = v.version + 1, updated_at = now()
+                RETURNING v.table_name, v.version;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # The statement trigger only notes the table, so writers no longer hold
+    # the counter rows from their first write until they commit
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        DECLARE
+            written text := current_setting('app.written_tables', true);
+        BEGIN
+            IF written IS NULL OR written = '' THEN
+                INSERT INTO table_version_bumps (txid) VALUES (txid_current());
+                PERFORM set_config('app.written_tables', TG_TABLE_NAME, true);
+            ELSIF NOT TG_TABLE_NAME = ANY(string_to_array(written, ',')) THEN
+                PERFORM set_config('app.written_tables', written || ',' || TG_TABLE_NAME, true);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE FUNCTION bump_versions_at_commit() RETURNS trigger AS $$
+        BEGIN
+            PERFORM bump_written_versions();
+            DELETE FROM table_version_bumps WHERE txid = NEW.txid;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER table_version_bumps_at_commit
+        AFTER INSERT ON table_version_bumps
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION bump_versions_at_commit()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name)
+            DO UPDATE SET version = table_versions.version + 1, updated_at = now();
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_table('table_version_bumps')
+    op.execute("DROP FUNCTION IF EXISTS bump_versions_at_commit()")
+    op.execute("DROP FUNCTION IF EXISTS bump_written_versions()")
@@ -0,0 +1,28 @@
+"""Count amounts left out of cached property P&L for want of a rate
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '019'
+down_revision: Union[str, None] = '018'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('property_monthly_analytics',
+        sa.Column('missing_rate', sa.Integer(), nullable=False, server_default='0'))
+    # Months cached under the old table-wide version would never match the
+    # per-month keys; drop them rather than leave them behind
+    op.execute("DELETE FROM property_monthly_analytics")
+
+
+def downgrade() -> None:
+    op.drop_column('property_monthly_analytics', 'missing_rate')
+    op.execute("DELETE FROM property_monthly_analytics")
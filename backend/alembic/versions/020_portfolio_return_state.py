@@ -0,0 +1,32 @@
+"""Store running return inputs per closed month end
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '020'
+down_revision: Union[str, None] = '019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('portfolio_return_state',
+        sa.Column('state_date', sa.Date(), nullable=False),
+        sa.Column('entity_type', sa.String(20), nullable=False),
+        sa.Column('entity_key', sa.String(64), nullable=False),
+        sa.Column('asset_class', sa.String(20), nullable=True),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('flow', sa.Float(), nullable=False),
+        sa.Column('growth', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('state_date', 'entity_type', 'entity_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('portfolio_return_state')
@@ -1,15 +1,30 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncIterator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.security import decode_token
+from app.core.security import decode_token, login_slot
 from app.models.user import User, UserRole
+from app.services.audit import set_audit_context
+from app.services.versions import compute_etag, etag_matches
 
 security = HTTPBearer()
 
 
+async def login_admission() -> AsyncIterator[None]:
+    """Queue a login on the event loop until a slot frees up, so waiting logins hold no request thread."""
+    async with login_slot() as admitted:
+        if not admitted:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent logins, please retry",
+                headers={"Retry-After": "1"}
+            )
+        yield
+
+
 def get_current_user(
+    request: Request,
     db: Session = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
@@ -39,6 +54,12 @@ def get_current_user(
             detail="User is inactive"
         )
     
+    set_audit_context(
+        db,
+        user.id,
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent")
+    )
     return user
 
 
@@ -64,6 +85,26 @@ def require_role(*roles: UserRole):
     return role_checker
 
 
+def conditional_get(*tables: str):
+    """Answer 304 when none of `tables` changed since the client's copy, before the endpoint runs.
+
+    The ETag is left on request.state for the middleware to put on the full response.
+    """
+    def check_etag(
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+    ) -> None:
+        etag = compute_etag(db, tables, request.url.path, request.url.query)
+        request.state.etag = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+            )
+    return check_etag
+
+
 def get_admin_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
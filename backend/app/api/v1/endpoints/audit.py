@@ -0,0 +1,135 @@
+import json
+import os
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from uuid import UUID
+from app.core.database import get_db
+from app.models.user import User
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLogResponse, AuditLogPage, AuditArchive, RetentionRun
+from app.schemas.common import PaginatedResponse
+from app.services.audit_archive import apply_retention, archive_path, list_archives, read_archive
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.api.deps import get_admin_user
+
+router = APIRouter()
+
+
+@router.get("", response_model=AuditLogPage)
+def search_audit_logs(
+    user_id: Optional[UUID] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[UUID] = None,
+    action: Optional[str] = None,
+    from_time: Optional[datetime] = Query(None, alias="from"),
+    to_time: Optional[datetime] = Query(None, alias="to"),
+    key: Optional[str] = Query(None, description="Top-level field in old/new values"),
+    value: Optional[str] = Query(None, description="JSON literal or plain string the field must equal"),
+    values: str = Query("any", pattern="^(old|new|any)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    query = db.query(AuditLog)
+    if user_id:
+        query = query.filter(AuditLog.user_id == user_id)
+    if entity_type:
+        query = query.filter(AuditLog.entity_type == entity_type)
+    if entity_id:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if action:
+        query = query.filter(AuditLog.action == action.upper())
+    # Bounds on created_at also prune whole monthly partitions
+    if from_time:
+        query = query.filter(AuditLog.created_at >= from_time)
+    if to_time:
+        query = query.filter(AuditLog.created_at < to_time)
+    
+    if (key is None) != (value is None):
+        raise HTTPException(status_code=400, detail="'key' and 'value' must be given together")
+    if key is not None:
+        try:
+            literal = json.loads(value)
+        except ValueError:
+            literal = value
+        # Containment (@>) is what the jsonb_path_ops GIN indexes serve
+        match = {key: literal}
+        if values == "old":
+            query = query.filter(AuditLog.old_values.contains(match))
+        elif values == "new":
+            query = query.filter(AuditLog.new_values.contains(match))
+        else:
+            query = query.filter(or_(AuditLog.old_values.contains(match), AuditLog.new_values.contains(match)))
+    
+    after = decode_cursor(cursor, datetime, UUID)
+    if after:
+        created_at, last_id = after
+        query = query.filter(or_(
+            AuditLog.created_at < created_at,
+            and_(AuditLog.created_at == created_at, AuditLog.id < last_id)
+        ))
+    
+    rows = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return AuditLogPage(items=rows[:limit], next_cursor=next_cursor)
+
+
+@router.get("/archive", response_model=List[AuditArchive])
+def list_audit_archives(
+    current_user: User = Depends(get_admin_user)
+):
+    return [
+        AuditArchive(month=month, size_bytes=os.path.getsize(archive_path(month)))
+        for month in list_archives()
+    ]
+
+
+@router.post("/archive/run", response_model=List[RetentionRun])
+def run_audit_retention(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return apply_retention(db)
+
+
+@router.get("/archive/{month}", response_model=PaginatedResponse[AuditLogResponse])
+def query_audit_archive(
+    month: str = Path(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="YYYY-MM"),
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[UUID] = None,
+    user_id: Optional[UUID] = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_admin_user)
+):
+    period = date(int(month[:4]), int(month[5:]), 1)
+    if not os.path.exists(archive_path(period)):
+        raise HTTPException(status_code=404, detail="Archive not found")
+    
+    # Archives are read sequentially; only the requested page is kept in memory
+    start = (page - 1) * size
+    items = []
+    total = 0
+    for record in read_archive(
+        period,
+        action=action,
+        entity_type=entity_type,
+        entity_id=str(entity_id) if entity_id else None,
+        user_id=str(user_id) if user_id else None
+    ):
+        if start <= total < start + size:
+            items.append(record)
+        total += 1
+    
+    return PaginatedResponse(
+        items=items,
+        total=total,
+        page=page,
+        size=size,
+        pages=(total + size - 1) // size
+    )
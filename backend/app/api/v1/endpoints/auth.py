@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_and_update_password, create_access_token
 from app.models.user import User
 from app.models.audit import AuditLog
 from app.schemas.user import Token, LoginRequest, UserResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, login_admission
 
 router = APIRouter()
 
@@ -15,6 +15,9 @@ router = APIRouter()
 def login(
     request: Request,
     login_data: LoginRequest,
+    # A burst waits for a slot off the request threads; only logins the
+    # queue cannot absorb are shed with 429
+    _admitted: None = Depends(login_admission),
     db: Session = Depends(get_db)
 ):
     user = db.query(User).filter(
@@ -22,7 +25,11 @@ def login(
         User.deleted_at.is_(None)
     ).first()
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    valid, new_hash = (
+        verify_and_update_password(login_data.password, user.hashed_password) if user else (False, None)
+    )
+    
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
@@ -34,6 +41,10 @@ def login(
             detail="User account is disabled"
         )
     
+    # Transparently move the stored hash to the current bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+    
     access_token = create_access_token(
         data={"sub": user.username, "role": user.role.value}
     )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.database import get_db
+from app.models.user import User
+from app.schemas.autocomplete import AutocompleteSuggestion, AutocompleteStats
+from app.services.autocomplete import autocomplete_index, refresh_if_stale
+from app.api.deps import get_current_user, get_admin_user
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[AutocompleteSuggestion])
+def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    refresh_if_stale(db)
+    return [s._asdict() for s in autocomplete_index.lookup(prefix.strip(), limit)]
+
+
+@router.get("/stats", response_model=AutocompleteStats)
+def autocomplete_stats(
+    current_user: User = Depends(get_admin_user)
+):
+    return autocomplete_index.stats()
@@ -1,24 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from app.core.database import get_db
 from app.models.user import User
 from app.models.equity import EquityHolding, EquityTransaction, Dividend, CorporateAction
 from app.schemas.equity import (
     EquityHoldingCreate, EquityHoldingUpdate, EquityHoldingResponse,
-    EquityTransactionCreate, EquityTransactionResponse,
+    EquityTransactionCreate, EquityTransactionResponse, EquityLedgerPage,
     DividendCreate, DividendResponse,
-    CorporateActionCreate, CorporateActionResponse
+    CorporateActionCreate, CorporateActionResponse,
+    PricePointCreate, PriceAppendResult, PricePoint, PriceSeriesResponse
 )
-from app.schemas.common import PaginatedResponse
-from app.api.deps import get_current_user
+from app.schemas.common import PaginatedResponse, BatchResult
+from app.services.batch import MAX_BATCH_SIZE, validate_items, validate_updates, write_batch, batch_result
+from app.services.prices import append_prices, get_price_series
+from app.services.valuation import invalidate_nav_series, invalidate_returns
+from app.utils.fast_json import response_columns, row_dicts, json_response, paginated_response
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.api.deps import get_current_user, conditional_get
 
 router = APIRouter()
 
 
-@router.get("", response_model=PaginatedResponse[EquityHoldingResponse])
+@router.get("", response_model=PaginatedResponse[EquityHoldingResponse], dependencies=[Depends(conditional_get("equity_holdings"))])
 def list_equities(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
@@ -28,7 +35,9 @@ def list_equities(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(EquityHolding).filter(EquityHolding.deleted_at.is_(None))
+    query = db.query(*response_columns(EquityHolding, EquityHoldingResponse)).filter(
+        EquityHolding.deleted_at.is_(None)
+    )
     
     if exchange:
         query = query.filter(EquityHolding.exchange == exchange)
@@ -37,16 +46,7 @@ def list_equities(
     if country:
         query = query.filter(EquityHolding.country == country)
     
-    total = query.count()
-    items = query.offset((page - 1) * size).limit(size).all()
-    
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=(total + size - 1) // size
-    )
+    return paginated_response(query, page, size)
 
 
 @router.post("", response_model=EquityHoldingResponse, status_code=status.HTTP_201_CREATED)
@@ -62,20 +62,145 @@ def create_equity(
     return holding
 
 
+@router.post("/batch", response_model=BatchResult)
+def create_equities_batch(
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valid, errors = validate_items(items, EquityHoldingCreate)
+    ids = write_batch(db, lambda n: EquityHolding(**valid[n].model_dump()), list(valid), errors)
+    return batch_result(len(items), ids, errors)
+
+
+@router.patch("/batch", response_model=BatchResult)
+def update_equities_batch(
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valid, errors = validate_updates(items, EquityHoldingUpdate)
+    holdings = {
+        h.id: h for h in db.query(EquityHolding).filter(
+            EquityHolding.id.in_({holding_id for holding_id, _ in valid.values()}),
+            EquityHolding.deleted_at.is_(None)
+        )
+    }
+    for n, (holding_id, _) in list(valid.items()):
+        if holding_id not in holdings:
+            errors[n] = "Holding not found"
+            del valid[n]
+    
+    def apply(n):
+        holding_id, holding_in = valid[n]
+        holding = holdings[holding_id]
+        for field, value in holding_in.model_dump(exclude_unset=True).items():
+            setattr(holding, field, value)
+        return holding
+    
+    # As in update_equity, a new current price is also appended to the price history
+    def record_prices(written):
+        repriced = {holding_id for holding_id, holding_in in valid.values() if holding_in.current_price_amount is not None}
+        points = [
+            {
+                "holding_id": h.id,
+                "price_date": date.today(),
+                "close_amount": h.current_price_amount,
+                "currency": h.current_price_currency or h.cost_basis_currency,
+            }
+            for h in written if h.id in repriced
+        ]
+        if points:
+            db.flush()
+            append_prices(db, points)
+    
+    ids = write_batch(db, apply, list(valid), errors, before_commit=record_prices)
+    return batch_result(len(items), ids, errors)
+
+
+# Prices
+@router.post("/prices", response_model=PriceAppendResult)
+def append_price_history(
+    prices_in: List[PricePointCreate],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    holding_ids = {p.holding_id for p in prices_in}
+    found = {
+        row.id for row in db.query(EquityHolding.id).filter(
+            EquityHolding.id.in_(holding_ids),
+            EquityHolding.deleted_at.is_(None)
+        )
+    }
+    missing = holding_ids - found
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Holdings not found: {', '.join(sorted(str(m) for m in missing))}")
+    
+    appended = append_prices(db, [p.model_dump() for p in prices_in])
+    db.commit()
+    return PriceAppendResult(appended=appended)
+
+
+@router.get("/ledger", response_model=EquityLedgerPage, dependencies=[Depends(conditional_get("equity_transactions", "equity_holdings"))])
+def transaction_ledger(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to", description="Exclusive"),
+    transaction_type: Optional[str] = None,
+    currency: Optional[str] = None,
+    holding_id: Optional[List[UUID]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Transactions across all holdings in date order, a page at a time."""
+    query = db.query(
+        *response_columns(EquityTransaction, EquityTransactionResponse),
+        EquityHolding.ticker.label("ticker")
+    ).join(EquityHolding, EquityHolding.id == EquityTransaction.holding_id).filter(
+        EquityTransaction.deleted_at.is_(None)
+    )
+    
+    # Bounds on transaction_date also prune whole monthly partitions
+    if from_date:
+        query = query.filter(EquityTransaction.transaction_date >= from_date)
+    if to_date:
+        query = query.filter(EquityTransaction.transaction_date < to_date)
+    if transaction_type:
+        query = query.filter(EquityTransaction.transaction_type == transaction_type.upper())
+    if currency:
+        query = query.filter(EquityTransaction.price_currency == currency.upper())
+    if holding_id:
+        query = query.filter(EquityTransaction.holding_id.in_(holding_id))
+    
+    after = decode_cursor(cursor, date, UUID)
+    if after:
+        transaction_date, last_id = after
+        # The plain bound starts the index scan at the cursor's day
+        query = query.filter(EquityTransaction.transaction_date >= transaction_date, or_(
+            EquityTransaction.transaction_date > transaction_date,
+            and_(EquityTransaction.transaction_date == transaction_date, EquityTransaction.id > last_id)
+        ))
+    
+    rows = row_dicts(query.order_by(EquityTransaction.transaction_date, EquityTransaction.id).limit(limit + 1))
+    next_cursor = encode_cursor(rows[limit - 1]["transaction_date"], rows[limit - 1]["id"]) if len(rows) > limit else None
+    return json_response({"items": rows[:limit], "next_cursor": next_cursor})
+
+
 @router.get("/{holding_id}", response_model=EquityHoldingResponse)
 def get_equity(
     holding_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    holding = db.query(EquityHolding).filter(
+    holding = db.query(*response_columns(EquityHolding, EquityHoldingResponse)).filter(
         EquityHolding.id == holding_id,
         EquityHolding.deleted_at.is_(None)
     ).first()
     
     if not holding:
         raise HTTPException(status_code=404, detail="Holding not found")
-    return holding
+    return json_response(holding._asdict())
 
 
 @router.put("/{holding_id}", response_model=EquityHoldingResponse)
@@ -96,6 +221,15 @@ def update_equity(
     for field, value in holding_in.model_dump(exclude_unset=True).items():
         setattr(holding, field, value)
     
+    if holding_in.current_price_amount is not None:
+        db.flush()
+        append_prices(db, [{
+            "holding_id": holding.id,
+            "price_date": date.today(),
+            "close_amount": holding.current_price_amount,
+            "currency": holding.current_price_currency or holding.cost_basis_currency,
+        }])
+    
     db.commit()
     db.refresh(holding)
     return holding
@@ -119,18 +253,39 @@ def delete_equity(
     db.commit()
 
 
+@router.get("/{holding_id}/prices", response_model=PriceSeriesResponse)
+def get_prices(
+    holding_id: UUID,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    interval: str = Query("day", pattern="^(day|week|month)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=365)
+    
+    points, currency = get_price_series(db, holding_id, from_date, to_date, interval)
+    return PriceSeriesResponse(
+        holding_id=holding_id,
+        currency=currency,
+        interval=interval,
+        points=[PricePoint(date=d, close_amount=c) for d, c in points]
+    )
+
+
 # Transactions
-@router.get("/{holding_id}/transactions", response_model=List[EquityTransactionResponse])
+@router.get("/{holding_id}/transactions", response_model=List[EquityTransactionResponse], dependencies=[Depends(conditional_get("equity_transactions"))])
 def list_transactions(
     holding_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    transactions = db.query(EquityTransaction).filter(
+    transactions = db.query(*response_columns(EquityTransaction, EquityTransactionResponse)).filter(
         EquityTransaction.holding_id == holding_id,
         EquityTransaction.deleted_at.is_(None)
-    ).order_by(EquityTransaction.transaction_date.desc()).all()
-    return transactions
+    ).order_by(EquityTransaction.transaction_date.desc())
+    return json_response(row_dicts(transactions))
 
 
 @router.post("/{holding_id}/transactions", response_model=EquityTransactionResponse, status_code=status.HTTP_201_CREATED)
@@ -157,7 +312,6 @@ def create_transaction(
         price_amount=tx_in.price_amount,
         price_currency=tx_in.price_currency,
         total_amount=total_amount,
-        total_amount_kwd=total_amount,  # TODO: Convert currency
         transaction_date=tx_in.transaction_date,
         fees_amount=tx_in.fees_amount,
         notes=tx_in.notes
@@ -170,23 +324,24 @@ def create_transaction(
     else:
         holding.quantity -= tx_in.quantity
     
+    invalidate_nav_series(db, tx_in.transaction_date)
     db.commit()
     db.refresh(tx)
     return tx
 
 
 # Dividends
-@router.get("/{holding_id}/dividends", response_model=List[DividendResponse])
+@router.get("/{holding_id}/dividends", response_model=List[DividendResponse], dependencies=[Depends(conditional_get("dividends"))])
 def list_dividends(
     holding_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    dividends = db.query(Dividend).filter(
+    dividends = db.query(*response_columns(Dividend, DividendResponse)).filter(
         Dividend.holding_id == holding_id,
         Dividend.deleted_at.is_(None)
-    ).order_by(Dividend.ex_date.desc()).all()
-    return dividends
+    ).order_by(Dividend.ex_date.desc())
+    return json_response(row_dicts(dividends))
 
 
 @router.post("/{holding_id}/dividends", response_model=DividendResponse, status_code=status.HTTP_201_CREATED)
@@ -208,12 +363,13 @@ def create_dividend(
         holding_id=holding_id,
         amount=div_in.amount,
         currency=div_in.currency,
-        amount_kwd=div_in.amount,  # TODO: Convert
         ex_date=div_in.ex_date,
         payment_date=div_in.payment_date,
         dividend_type=div_in.dividend_type
     )
     db.add(dividend)
+    
+    invalidate_returns(db, div_in.payment_date or div_in.ex_date)
     db.commit()
     db.refresh(dividend)
     return dividend
@@ -1,54 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 from app.core.database import get_db
 from app.core.config import settings
 from app.models.user import User
-from app.models.currency import ExchangeRate
-from app.schemas.common import ExchangeRateResponse
-from app.api.deps import get_current_user
+from app.models.currency import ExchangeRate, FxRateDaily
+from app.schemas.common import ExchangeRateResponse, FxImportResult, FxImportRowError
+from app.services.fx import RATE_SCALE, fx_daily_coverage, minor_unit
+from app.services.fx_import import FxImportFormatError, load_fx_csv
+from app.services.revaluation import apply_rate_changes
+from app.api.deps import get_current_user, conditional_get
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[ExchangeRateResponse])
+def _check_coverage(db: Session, on: date) -> None:
+    # Reads never extend fx_rates_daily; it runs FX_FORWARD_DAYS past today
+    covered = fx_daily_coverage(db, on)
+    if covered is None or on > covered:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Exchange rates are only available up to {covered}" if covered else "No exchange rates loaded"
+        )
+
+
+@router.get("", response_model=List[ExchangeRateResponse], dependencies=[Depends(conditional_get("exchange_rates"))])
 def get_exchange_rates(
     base: str = Query(default="KWD"),
     rate_date: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(ExchangeRate).filter(
-        ExchangeRate.from_currency == base,
-        ExchangeRate.deleted_at.is_(None)
-    )
-    
-    if rate_date:
-        query = query.filter(ExchangeRate.rate_date == rate_date)
-    else:
-        # Get latest rates
-        subquery = db.query(
-            ExchangeRate.to_currency,
-            db.func.max(ExchangeRate.rate_date).label("max_date")
-        ).filter(
-            ExchangeRate.from_currency == base
-        ).group_by(ExchangeRate.to_currency).subquery()
-        
-        query = query.join(
-            subquery,
-            (ExchangeRate.to_currency == subquery.c.to_currency) &
-            (ExchangeRate.rate_date == subquery.c.max_date)
-        )
-    
-    rates = query.all()
+    # Rates in effect on the day, carried over weekends and holidays; rate_date
+    # is the quote they rest on
+    on = rate_date or date.today()
+    _check_coverage(db, on)
+    rates = db.query(FxRateDaily).filter(
+        FxRateDaily.from_currency == base,
+        FxRateDaily.rate_date == on
+    ).order_by(FxRateDaily.to_currency).all()
     
     return [
         ExchangeRateResponse(
             from_currency=r.from_currency,
             to_currency=r.to_currency,
-            rate=r.rate / 100000000,  # Convert from stored integer
-            rate_date=r.rate_date
+            rate=r.rate / RATE_SCALE,
+            rate_date=r.quote_date or r.rate_date
         )
         for r in rates
     ]
@@ -73,6 +71,8 @@ def create_exchange_rate(
     if existing:
         existing.rate = int(rate * 100000000)
         existing.source = "manual"
+        db.flush()
+        apply_rate_changes(db, rate_date)
         db.commit()
         db.refresh(existing)
         return ExchangeRateResponse(
@@ -90,6 +90,8 @@ def create_exchange_rate(
         source="manual"
     )
     db.add(exchange_rate)
+    db.flush()
+    apply_rate_changes(db, rate_date)
     db.commit()
     db.refresh(exchange_rate)
     
@@ -113,35 +115,22 @@ def convert_currency(
     if from_currency == to_currency:
         return {"amount": amount, "currency": to_currency}
     
-    # Find rate
-    query = db.query(ExchangeRate).filter(
-        ExchangeRate.from_currency == from_currency,
-        ExchangeRate.to_currency == to_currency,
-        ExchangeRate.deleted_at.is_(None)
-    )
-    
-    if rate_date:
-        query = query.filter(ExchangeRate.rate_date <= rate_date)
-    
-    rate = query.order_by(ExchangeRate.rate_date.desc()).first()
+    on = rate_date or date.today()
+    _check_coverage(db, on)
+    rate = db.query(FxRateDaily).filter(
+        FxRateDaily.from_currency == from_currency,
+        FxRateDaily.to_currency == to_currency,
+        FxRateDaily.rate_date == on
+    ).first()
     
     if not rate:
-        # Try reverse
-        reverse = db.query(ExchangeRate).filter(
-            ExchangeRate.from_currency == to_currency,
-            ExchangeRate.to_currency == from_currency,
-            ExchangeRate.deleted_at.is_(None)
-        ).order_by(ExchangeRate.rate_date.desc()).first()
-        
-        if not reverse:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Exchange rate not found for {from_currency}/{to_currency}"
-            )
-        
-        converted = int(amount / (reverse.rate / 100000000))
-    else:
-        converted = int(amount * (rate.rate / 100000000))
+        raise HTTPException(
+            status_code=404,
+            detail=f"Exchange rate not found for {from_currency}/{to_currency}"
+        )
+    
+    # Amounts are in smallest units, which differ between currencies
+    converted = int(round(amount / minor_unit(from_currency) * rate.rate / RATE_SCALE * minor_unit(to_currency)))
     
     return {
         "original_amount": amount,
@@ -149,3 +138,34 @@ def convert_currency(
         "converted_amount": converted,
         "converted_currency": to_currency
     }
+
+
+@router.post("/import", response_model=FxImportResult)
+def import_exchange_rates(
+    file: UploadFile = File(...),
+    source: str = Query(default="import", max_length=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk load rates from a CSV of from_currency,to_currency,rate_date,rate[,source]."""
+    if current_user.role not in ['admin', 'cfo', 'accountant']:
+        raise HTTPException(status_code=403, detail="Not authorized to import data")
+    
+    try:
+        result = load_fx_csv(db, file.file, source)
+    except FxImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    
+    return FxImportResult(
+        rows=result.rows,
+        inserted=result.inserted,
+        updated=result.updated,
+        unchanged=result.unchanged,
+        invalid=result.invalid,
+        errors=[FxImportRowError(row=e.row, message=e.message) for e in result.errors],
+        start=result.start,
+        end=result.end,
+        revalued_currencies=result.revaluation.currencies if result.revaluation else [],
+        revalued_rows=sum(result.revaluation[1:]) if result.revaluation else 0
+    )
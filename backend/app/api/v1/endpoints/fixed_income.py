@@ -1,19 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from uuid import UUID
 from datetime import datetime
 from app.core.database import get_db
 from app.models.user import User
 from app.models.fixed_income import FixedIncomeHolding, FixedIncomeType
 from app.schemas.fixed_income import FixedIncomeCreate, FixedIncomeUpdate, FixedIncomeResponse
-from app.schemas.common import PaginatedResponse
-from app.api.deps import get_current_user
+from app.schemas.common import PaginatedResponse, BatchResult
+from app.services.batch import MAX_BATCH_SIZE, validate_items, validate_updates, write_batch, batch_result
+from app.utils.fast_json import response_columns, json_response, paginated_response
+from app.api.deps import get_current_user, conditional_get
 
 router = APIRouter()
 
 
-@router.get("", response_model=PaginatedResponse[FixedIncomeResponse])
+@router.get("", response_model=PaginatedResponse[FixedIncomeResponse], dependencies=[Depends(conditional_get("fixed_income_holdings"))])
 def list_fixed_income(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
@@ -21,21 +23,14 @@ def list_fixed_income(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(FixedIncomeHolding).filter(FixedIncomeHolding.deleted_at.is_(None))
+    query = db.query(*response_columns(FixedIncomeHolding, FixedIncomeResponse)).filter(
+        FixedIncomeHolding.deleted_at.is_(None)
+    )
     
     if instrument_type:
         query = query.filter(FixedIncomeHolding.instrument_type == instrument_type)
     
-    total = query.count()
-    items = query.offset((page - 1) * size).limit(size).all()
-    
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=(total + size - 1) // size
-    )
+    return paginated_response(query, page, size)
 
 
 @router.post("", response_model=FixedIncomeResponse, status_code=status.HTTP_201_CREATED)
@@ -51,20 +46,60 @@ def create_fixed_income(
     return holding
 
 
+@router.post("/batch", response_model=BatchResult)
+def create_fixed_income_batch(
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valid, errors = validate_items(items, FixedIncomeCreate)
+    ids = write_batch(db, lambda n: FixedIncomeHolding(**valid[n].model_dump()), list(valid), errors)
+    return batch_result(len(items), ids, errors)
+
+
+@router.patch("/batch", response_model=BatchResult)
+def update_fixed_income_batch(
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valid, errors = validate_updates(items, FixedIncomeUpdate)
+    holdings = {
+        h.id: h for h in db.query(FixedIncomeHolding).filter(
+            FixedIncomeHolding.id.in_({holding_id for holding_id, _ in valid.values()}),
+            FixedIncomeHolding.deleted_at.is_(None)
+        )
+    }
+    for n, (holding_id, _) in list(valid.items()):
+        if holding_id not in holdings:
+            errors[n] = "Holding not found"
+            del valid[n]
+    
+    def apply(n):
+        holding_id, holding_in = valid[n]
+        holding = holdings[holding_id]
+        for field, value in holding_in.model_dump(exclude_unset=True).items():
+            setattr(holding, field, value)
+        return holding
+    
+    ids = write_batch(db, apply, list(valid), errors)
+    return batch_result(len(items), ids, errors)
+
+
 @router.get("/{holding_id}", response_model=FixedIncomeResponse)
 def get_fixed_income(
     holding_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    holding = db.query(FixedIncomeHolding).filter(
+    holding = db.query(*response_columns(FixedIncomeHolding, FixedIncomeResponse)).filter(
         FixedIncomeHolding.id == holding_id,
         FixedIncomeHolding.deleted_at.is_(None)
     ).first()
     
     if not holding:
         raise HTTPException(status_code=404, detail="Holding not found")
-    return holding
+    return json_response(holding._asdict())
 
 
 @router.put("/{holding_id}", response_model=FixedIncomeResponse)
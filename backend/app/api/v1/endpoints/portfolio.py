@@ -1,47 +1,75 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from datetime import date
-from typing import List
+from datetime import date, timedelta
+from typing import List, Optional
 from app.core.database import get_db
 from app.models.user import User
 from app.models.equity import EquityHolding
 from app.models.fixed_income import FixedIncomeHolding
 from app.models.real_estate import Property, Unit
 from app.models.private_fund import PrivateFund
-from app.schemas.portfolio import PortfolioSummary, AllocationItem, AssetClassSummary, ExposureBreakdown
-from app.api.deps import get_current_user
+from app.schemas.portfolio import (
+    PortfolioSummary, AllocationItem, AssetClassSummary, ExposureBreakdown, PerformanceData, ReturnsReport,
+    ScenarioRequest, ScenarioReport, ScenarioOutcome, ScenarioBreakdownItem
+)
+from app.services.valuation import ASSET_CLASSES, extend_nav_series, get_nav_series
+from app.services.returns import get_returns
+from app.services.scenarios import PRICED_CLASSES, Scenario, load_positions, revalue
+from app.services.as_of import PortfolioSnapshot, portfolio_as_of
+from app.services.versions import PORTFOLIO_TABLES
+from app.api.deps import get_current_user, conditional_get
 
 router = APIRouter()
 
 
-@router.get("/summary", response_model=PortfolioSummary)
+def _load_portfolio(db: Session, as_of: Optional[date]) -> PortfolioSnapshot:
+    """Live holdings, or holdings reconstructed at the end of a past day."""
+    if as_of is not None:
+        if as_of > date.today():
+            raise HTTPException(status_code=400, detail="as_of cannot be in the future")
+        if as_of < date.today():
+            return portfolio_as_of(db, as_of)
+    
+    return PortfolioSnapshot(
+        equities=db.query(EquityHolding).filter(EquityHolding.deleted_at.is_(None)).all(),
+        fixed_income=db.query(FixedIncomeHolding).filter(FixedIncomeHolding.deleted_at.is_(None)).all(),
+        properties=db.query(Property).filter(Property.deleted_at.is_(None)).all(),
+        funds=db.query(PrivateFund).filter(PrivateFund.deleted_at.is_(None)).all(),
+        units_count=db.query(Unit).filter(Unit.deleted_at.is_(None)).count()
+    )
+
+
+@router.get("/summary", response_model=PortfolioSummary, dependencies=[Depends(conditional_get(*PORTFOLIO_TABLES))])
 def get_portfolio_summary(
+    as_of: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    portfolio = _load_portfolio(db, as_of)
+    
     # Equities
-    equities = db.query(EquityHolding).filter(EquityHolding.deleted_at.is_(None)).all()
+    equities = portfolio.equities
     equities_value = sum(e.current_value_kwd or 0 for e in equities)
     equities_cost = sum(e.cost_basis_amount or 0 for e in equities)
     equities_unrealized = sum(e.unrealized_gain_loss or 0 for e in equities)
     equities_realized = sum(e.realized_gain_loss or 0 for e in equities)
     
     # Fixed Income
-    fixed_income = db.query(FixedIncomeHolding).filter(FixedIncomeHolding.deleted_at.is_(None)).all()
+    fixed_income = portfolio.fixed_income
     fi_value = sum(f.current_value_kwd or f.purchase_price_amount or 0 for f in fixed_income)
     fi_cost = sum(f.purchase_price_amount or 0 for f in fixed_income)
     fi_income = sum(f.total_interest_received or 0 for f in fixed_income)
     
     # Real Estate
-    properties = db.query(Property).filter(Property.deleted_at.is_(None)).all()
+    properties = portfolio.properties
     re_value = sum(p.current_value_amount or p.purchase_price_amount or 0 for p in properties)
     re_cost = sum(p.purchase_price_amount or 0 for p in properties)
     
-    units_count = db.query(Unit).filter(Unit.deleted_at.is_(None)).count()
+    units_count = portfolio.units_count
     
     # Private Funds
-    funds = db.query(PrivateFund).filter(PrivateFund.deleted_at.is_(None)).all()
+    funds = portfolio.funds
     pf_value = sum(f.current_nav_kwd or f.called_capital_amount or 0 for f in funds)
     pf_cost = sum(f.called_capital_amount or 0 for f in funds)
     pf_distributions = sum(f.distributions_received or 0 for f in funds)
@@ -137,32 +165,34 @@ def get_portfolio_summary(
         properties_count=len(properties),
         units_count=units_count,
         private_funds_count=len(funds),
-        as_of_date=date.today()
+        as_of_date=as_of or date.today()
     )
 
 
-@router.get("/exposure/geography", response_model=ExposureBreakdown)
+@router.get("/exposure/geography", response_model=ExposureBreakdown, dependencies=[Depends(conditional_get(*PORTFOLIO_TABLES))])
 def get_geography_exposure(
+    as_of: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    portfolio = _load_portfolio(db, as_of)
     # Aggregate by geography
     exposure = {}
     
     # Equities
-    equities = db.query(EquityHolding).filter(EquityHolding.deleted_at.is_(None)).all()
+    equities = portfolio.equities
     for e in equities:
         country = e.country or "Unknown"
         exposure[country] = exposure.get(country, 0) + (e.current_value_kwd or 0)
     
     # Real Estate
-    properties = db.query(Property).filter(Property.deleted_at.is_(None)).all()
+    properties = portfolio.properties
     for p in properties:
         country = p.country or "Unknown"
         exposure[country] = exposure.get(country, 0) + (p.current_value_amount or p.purchase_price_amount or 0)
     
     # Private Funds
-    funds = db.query(PrivateFund).filter(PrivateFund.deleted_at.is_(None)).all()
+    funds = portfolio.funds
     for f in funds:
         geo = f.geography or "Global"
         exposure[geo] = exposure.get(geo, 0) + (f.current_nav_kwd or f.called_capital_amount or 0)
@@ -180,24 +210,26 @@ def get_geography_exposure(
     return ExposureBreakdown(dimension="geography", items=items)
 
 
-@router.get("/exposure/currency", response_model=ExposureBreakdown)
+@router.get("/exposure/currency", response_model=ExposureBreakdown, dependencies=[Depends(conditional_get(*PORTFOLIO_TABLES))])
 def get_currency_exposure(
+    as_of: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    portfolio = _load_portfolio(db, as_of)
     exposure = {}
     
-    equities = db.query(EquityHolding).filter(EquityHolding.deleted_at.is_(None)).all()
+    equities = portfolio.equities
     for e in equities:
         curr = e.current_price_currency or e.cost_basis_currency or "KWD"
         exposure[curr] = exposure.get(curr, 0) + (e.current_value_kwd or 0)
     
-    fixed_income = db.query(FixedIncomeHolding).filter(FixedIncomeHolding.deleted_at.is_(None)).all()
+    fixed_income = portfolio.fixed_income
     for f in fixed_income:
         curr = f.face_value_currency or "USD"
         exposure[curr] = exposure.get(curr, 0) + (f.current_value_kwd or f.purchase_price_amount or 0)
     
-    funds = db.query(PrivateFund).filter(PrivateFund.deleted_at.is_(None)).all()
+    funds = portfolio.funds
     for f in funds:
         curr = f.committed_capital_currency or "USD"
         exposure[curr] = exposure.get(curr, 0) + (f.current_nav_kwd or f.called_capital_amount or 0)
@@ -215,19 +247,21 @@ def get_currency_exposure(
     return ExposureBreakdown(dimension="currency", items=items)
 
 
-@router.get("/exposure/sector", response_model=ExposureBreakdown)
+@router.get("/exposure/sector", response_model=ExposureBreakdown, dependencies=[Depends(conditional_get(*PORTFOLIO_TABLES))])
 def get_sector_exposure(
+    as_of: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    portfolio = _load_portfolio(db, as_of)
     exposure = {}
     
-    equities = db.query(EquityHolding).filter(EquityHolding.deleted_at.is_(None)).all()
+    equities = portfolio.equities
     for e in equities:
         sector = e.sector or "Other"
         exposure[sector] = exposure.get(sector, 0) + (e.current_value_kwd or 0)
     
-    funds = db.query(PrivateFund).filter(PrivateFund.deleted_at.is_(None)).all()
+    funds = portfolio.funds
     for f in funds:
         sector = f.sector or "Diversified"
         exposure[sector] = exposure.get(sector, 0) + (f.current_nav_kwd or f.called_capital_amount or 0)
@@ -243,3 +277,100 @@ def get_sector_exposure(
     ]
     
     return ExposureBreakdown(dimension="sector", items=items)
+
+
+@router.get("/performance", response_model=List[PerformanceData])
+def get_performance(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - timedelta(days=365)
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    # Closed days are persisted once and extended incrementally
+    if extend_nav_series(db, min(to_date, date.today() - timedelta(days=1))):
+        db.commit()
+    
+    return [
+        PerformanceData(
+            date=row["nav_date"],
+            total_value_kwd=row["total_value_kwd"],
+            equities_value=row["equities_value"],
+            fixed_income_value=row["fixed_income_value"],
+            real_estate_value=row["real_estate_value"],
+            private_funds_value=row["private_funds_value"]
+        )
+        for row in get_nav_series(db, from_date, to_date)
+    ]
+
+
+@router.get("/returns", response_model=ReturnsReport)
+def get_portfolio_returns(
+    as_of: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    as_of = as_of or date.today()
+    if as_of > date.today():
+        raise HTTPException(status_code=400, detail="as_of cannot be in the future")
+    
+    items, cached = get_returns(db, as_of)
+    db.commit()
+    return ReturnsReport(as_of_date=as_of, cached=cached, items=items)
+
+
+MAX_SCENARIOS = 1000
+
+
+@router.post("/scenarios", response_model=ScenarioReport)
+def run_scenarios(
+    request: ScenarioRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Revalue the live book under FX, price and NAV shocks without touching stored values."""
+    if not 1 <= len(request.scenarios) <= MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_SCENARIOS} scenarios are allowed")
+    
+    scenarios = []
+    for shock in request.scenarios:
+        unknown = set(shock.price_shocks_bps) - set(PRICED_CLASSES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown asset class: {', '.join(sorted(unknown))}")
+        bps = [*shock.fx_shocks_bps.values(), *shock.price_shocks_bps.values(), shock.nav_shock_bps]
+        if min(bps) <= -10000:
+            raise HTTPException(status_code=400, detail="Shocks must leave values above zero")
+        scenarios.append(Scenario(
+            shock.name,
+            {c.upper(): v for c, v in shock.fx_shocks_bps.items()},
+            shock.price_shocks_bps,
+            shock.nav_shock_bps
+        ))
+    
+    result = revalue(load_positions(db, date.today()), scenarios)
+    base = int(round(result.base_by_class.sum()))
+    
+    outcomes = []
+    for s, scenario in enumerate(scenarios):
+        pnl = int(round(result.pnl_by_class[s].sum()))
+        outcomes.append(ScenarioOutcome(
+            name=scenario.name,
+            base_value_kwd=base,
+            shocked_value_kwd=base + pnl,
+            pnl_kwd=pnl,
+            pnl_bps=round(pnl * 10000 / base) if base else None,
+            by_asset_class=[
+                ScenarioBreakdownItem(category=ac, base_value_kwd=round(result.base_by_class[a]), pnl_kwd=round(result.pnl_by_class[s, a]))
+                for a, ac in enumerate(ASSET_CLASSES)
+            ],
+            by_currency=[
+                ScenarioBreakdownItem(category=ccy, base_value_kwd=round(result.base_by_currency[c]), pnl_kwd=round(result.pnl_by_currency[s, c]))
+                for c, ccy in enumerate(result.currencies)
+            ]
+        ))
+    
+    return ScenarioReport(as_of_date=date.today(), scenarios=outcomes)
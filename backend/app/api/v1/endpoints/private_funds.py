@@ -2,22 +2,28 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 from app.core.database import get_db
 from app.models.user import User
 from app.models.private_fund import PrivateFund, CapitalCall, Distribution, FundValuation, FundType
 from app.schemas.private_fund import (
     PrivateFundCreate, PrivateFundUpdate, PrivateFundResponse,
     CapitalCallCreate, CapitalCallResponse,
-    DistributionCreate, DistributionResponse
+    DistributionCreate, DistributionResponse,
+    FundValuationCreate, FundValuationUpdate, FundValuationResponse, NavRollForwardResult,
+    PacingBand, PacingQuarter, PacingReport
 )
 from app.schemas.common import PaginatedResponse
-from app.api.deps import get_current_user
+from app.services.fund_nav import roll_forward_navs, sync_fund_valuation
+from app.services.pacing import PERCENTILES, run_pacing
+from app.services.valuation import invalidate_nav_series
+from app.utils.fast_json import response_columns, row_dicts, json_response, paginated_response
+from app.api.deps import get_current_user, conditional_get
 
 router = APIRouter()
 
 
-@router.get("", response_model=PaginatedResponse[PrivateFundResponse])
+@router.get("", response_model=PaginatedResponse[PrivateFundResponse], dependencies=[Depends(conditional_get("private_funds"))])
 def list_private_funds(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
@@ -25,21 +31,12 @@ def list_private_funds(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(PrivateFund).filter(PrivateFund.deleted_at.is_(None))
+    query = db.query(*response_columns(PrivateFund, PrivateFundResponse)).filter(PrivateFund.deleted_at.is_(None))
     
     if fund_type:
         query = query.filter(PrivateFund.fund_type == fund_type)
     
-    total = query.count()
-    items = query.offset((page - 1) * size).limit(size).all()
-    
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=(total + size - 1) // size
-    )
+    return paginated_response(query, page, size)
 
 
 @router.post("", response_model=PrivateFundResponse, status_code=status.HTTP_201_CREATED)
@@ -56,20 +53,65 @@ def create_private_fund(
     return fund
 
 
+@router.post("/nav/roll-forward", response_model=NavRollForwardResult)
+def roll_forward_all_navs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Re-estimate every fund's KWD NAV from its last NAV and the flows since."""
+    updated = roll_forward_navs(db)
+    db.commit()
+    return NavRollForwardResult(funds_updated=updated)
+
+
+@router.get("/pacing", response_model=PacingReport)
+def get_pacing(
+    quarters: int = Query(20, ge=1, le=60),
+    paths: int = Query(10000, ge=100, le=20000),
+    seed: Optional[int] = Query(None, description="Fix to get the same bands on every call"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Projected capital calls and distributions of all live funds, as percentile bands per quarter."""
+    run = run_pacing(db, quarters, paths, seed)
+    
+    def band(values, q):
+        return PacingBand(**{f"p{p}": int(v) for p, v in zip(PERCENTILES, values[:, q])})
+    
+    return PacingReport(
+        as_of_date=date.today(),
+        funds=run.funds,
+        funds_missing_rate=run.funds_missing_rate,
+        paths=run.paths,
+        uncalled_kwd=run.uncalled_kwd,
+        nav_kwd=run.nav_kwd,
+        quarters=[
+            PacingQuarter(
+                quarter_start=start,
+                calls=band(run.calls, q),
+                distributions=band(run.distributions, q),
+                net=band(run.net, q),
+                cumulative_net=band(run.cumulative_net, q)
+            )
+            for q, start in enumerate(run.quarter_starts)
+        ]
+    )
+
+
 @router.get("/{fund_id}", response_model=PrivateFundResponse)
 def get_private_fund(
     fund_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    fund = db.query(PrivateFund).filter(
+    fund = db.query(*response_columns(PrivateFund, PrivateFundResponse)).filter(
         PrivateFund.id == fund_id,
         PrivateFund.deleted_at.is_(None)
     ).first()
     
     if not fund:
         raise HTTPException(status_code=404, detail="Fund not found")
-    return fund
+    return json_response(fund._asdict())
 
 
 @router.put("/{fund_id}", response_model=PrivateFundResponse)
@@ -90,6 +132,8 @@ def update_private_fund(
     for field, value in fund_in.model_dump(exclude_unset=True).items():
         setattr(fund, field, value)
     
+    db.flush()
+    roll_forward_navs(db, [fund_id])
     db.commit()
     db.refresh(fund)
     return fund
@@ -114,17 +158,17 @@ def delete_private_fund(
 
 
 # Capital Calls
-@router.get("/{fund_id}/capital-calls", response_model=List[CapitalCallResponse])
+@router.get("/{fund_id}/capital-calls", response_model=List[CapitalCallResponse], dependencies=[Depends(conditional_get("capital_calls"))])
 def list_capital_calls(
     fund_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    calls = db.query(CapitalCall).filter(
+    calls = db.query(*response_columns(CapitalCall, CapitalCallResponse)).filter(
         CapitalCall.fund_id == fund_id,
         CapitalCall.deleted_at.is_(None)
-    ).order_by(CapitalCall.call_date.desc()).all()
-    return calls
+    ).order_by(CapitalCall.call_date.desc())
+    return json_response(row_dicts(calls))
 
 
 @router.post("/{fund_id}/capital-calls", response_model=CapitalCallResponse, status_code=status.HTTP_201_CREATED)
@@ -176,23 +220,25 @@ def mark_capital_call_paid(
     fund.called_capital_amount += call.amount
     fund.uncalled_capital_amount = fund.committed_capital_amount - fund.called_capital_amount
     
+    db.flush()
+    roll_forward_navs(db, [fund_id])
     db.commit()
     db.refresh(call)
     return call
 
 
 # Distributions
-@router.get("/{fund_id}/distributions", response_model=List[DistributionResponse])
+@router.get("/{fund_id}/distributions", response_model=List[DistributionResponse], dependencies=[Depends(conditional_get("distributions"))])
 def list_distributions(
     fund_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    dists = db.query(Distribution).filter(
+    dists = db.query(*response_columns(Distribution, DistributionResponse)).filter(
         Distribution.fund_id == fund_id,
         Distribution.deleted_at.is_(None)
-    ).order_by(Distribution.declaration_date.desc()).all()
-    return dists
+    ).order_by(Distribution.declaration_date.desc())
+    return json_response(row_dicts(dists))
 
 
 @router.post("/{fund_id}/distributions", response_model=DistributionResponse, status_code=status.HTTP_201_CREATED)
@@ -245,6 +291,97 @@ def mark_distribution_received(
     fund = db.query(PrivateFund).filter(PrivateFund.id == fund_id).first()
     fund.distributions_received += dist.amount
     
+    db.flush()
+    roll_forward_navs(db, [fund_id])
     db.commit()
     db.refresh(dist)
     return dist
+
+
+# Valuations
+def _get_valuation_or_404(db: Session, fund_id: UUID, valuation_id: UUID) -> FundValuation:
+    valuation = db.query(FundValuation).filter(
+        FundValuation.id == valuation_id,
+        FundValuation.fund_id == fund_id,
+        FundValuation.deleted_at.is_(None)
+    ).first()
+    
+    if not valuation:
+        raise HTTPException(status_code=404, detail="Valuation not found")
+    return valuation
+
+
+@router.get("/{fund_id}/valuations", response_model=List[FundValuationResponse], dependencies=[Depends(conditional_get("fund_valuations"))])
+def list_valuations(
+    fund_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valuations = db.query(*response_columns(FundValuation, FundValuationResponse)).filter(
+        FundValuation.fund_id == fund_id,
+        FundValuation.deleted_at.is_(None)
+    ).order_by(FundValuation.valuation_date.desc(), FundValuation.created_at.desc())
+    return json_response(row_dicts(valuations))
+
+
+@router.post("/{fund_id}/valuations", response_model=FundValuationResponse, status_code=status.HTTP_201_CREATED)
+def create_valuation(
+    fund_id: UUID,
+    valuation_in: FundValuationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    fund = db.query(PrivateFund.id).filter(
+        PrivateFund.id == fund_id,
+        PrivateFund.deleted_at.is_(None)
+    ).first()
+    
+    if not fund:
+        raise HTTPException(status_code=404, detail="Fund not found")
+    
+    valuation = FundValuation(fund_id=fund_id, **valuation_in.model_dump())
+    db.add(valuation)
+    db.flush()
+    sync_fund_valuation(db, fund_id)
+    invalidate_nav_series(db, valuation.valuation_date)
+    db.commit()
+    db.refresh(valuation)
+    return valuation
+
+
+@router.put("/{fund_id}/valuations/{valuation_id}", response_model=FundValuationResponse)
+def update_valuation(
+    fund_id: UUID,
+    valuation_id: UUID,
+    valuation_in: FundValuationUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valuation = _get_valuation_or_404(db, fund_id, valuation_id)
+    
+    changed_from = valuation.valuation_date
+    for field, value in valuation_in.model_dump(exclude_unset=True).items():
+        setattr(valuation, field, value)
+    
+    db.flush()
+    sync_fund_valuation(db, fund_id)
+    invalidate_nav_series(db, min(changed_from, valuation.valuation_date))
+    db.commit()
+    db.refresh(valuation)
+    return valuation
+
+
+@router.delete("/{fund_id}/valuations/{valuation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_valuation(
+    fund_id: UUID,
+    valuation_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valuation = _get_valuation_or_404(db, fund_id, valuation_id)
+    
+    valuation.deleted_at = datetime.utcnow()
+    db.flush()
+    sync_fund_valuation(db, fund_id)
+    invalidate_nav_series(db, valuation.valuation_date)
+    db.commit()
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
 from app.core.database import get_db
 from app.models.user import User
 from app.models.real_estate import Property, Unit, RentalIncome, PropertyExpense, PropertyValuation, UnitStatus
@@ -11,33 +12,73 @@ from app.schemas.real_estate import (
     UnitCreate, UnitUpdate, UnitResponse,
     RentalIncomeCreate, RentalIncomeResponse,
     PropertyExpenseCreate, PropertyExpenseResponse,
-    OccupancyReport
+    OccupancyReport, RentRollRequest, RentRollResult, ReceivablesAgingReport,
+    ExpiringLease, LeaseExpiryMonth, LeaseExpiryProfile, PropertyExpiryProfile,
+    PropertyAnalyticsReport,
+    PropertyValuationCreate, PropertyValuationUpdate, PropertyValuationResponse, LatestValuation
 )
-from app.schemas.common import PaginatedResponse
-from app.api.deps import get_current_user
+from app.schemas.common import PaginatedResponse, BatchResult
+from app.services.batch import MAX_BATCH_SIZE, validate_items, validate_updates, write_batch, batch_result
+from app.services.leases import expiring_leases, expiry_profile
+from app.services.property_analytics import get_analytics
+from app.services.property_valuations import latest_valuations, sync_property_valuation
+from app.services.receivables import occupancy, receivables_aging
+from app.services.rent_roll import generate_rent_roll
+from app.services.valuation import invalidate_nav_series, invalidate_returns
+from app.utils.fast_json import response_columns, row_dicts, json_response, page_content
+from app.api.deps import get_current_user, conditional_get
 
 router = APIRouter()
 
 
+def _with_parent(items: List[Any], field: str, parent_id: UUID) -> List[Any]:
+    """Fill a batch item's parent id from the path, as the single-item endpoints do."""
+    return [{**item, field: parent_id} if isinstance(item, dict) else item for item in items]
+
+
+def _get_property_or_404(db: Session, property_id: UUID) -> None:
+    found = db.query(Property.id).filter(
+        Property.id == property_id,
+        Property.deleted_at.is_(None)
+    ).first()
+    
+    if not found:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+
+def _with_units(db: Session, properties: List[dict]) -> List[dict]:
+    """Fill the nested `units` field of property rows with one query for the whole page."""
+    by_id = {p["id"]: p for p in properties}
+    for p in properties:
+        p["units"] = []
+    if by_id:
+        units = db.query(*response_columns(Unit, UnitResponse)).filter(Unit.property_id.in_(by_id))
+        for unit in row_dicts(units):
+            by_id[unit["property_id"]]["units"].append(unit)
+    return properties
+
+
+def _invalidate_collected(db: Session, incomes: List[RentalIncome]) -> None:
+    """Collected rent is an external flow of its property; drop returns cached over its payment dates."""
+    paid = [i.payment_date for i in incomes if i.received_amount and i.payment_date]
+    if paid:
+        invalidate_returns(db, min(paid))
+
+
 # Properties
-@router.get("/properties", response_model=PaginatedResponse[PropertyResponse])
+@router.get("/properties", response_model=PaginatedResponse[PropertyResponse], dependencies=[Depends(conditional_get("properties", "units"))])
 def list_properties(
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Property).filter(Property.deleted_at.is_(None))
-    total = query.count()
-    items = query.offset((page - 1) * size).limit(size).all()
-    
-    return PaginatedResponse(
-        items=items,
-        total=total,
-        page=page,
-        size=size,
-        pages=(total + size - 1) // size
+    query = db.query(*response_columns(Property, PropertyResponse, exclude=("units",))).filter(
+        Property.deleted_at.is_(None)
     )
+    content = page_content(query, page, size)
+    _with_units(db, content["items"])
+    return json_response(content)
 
 
 @router.post("/properties", response_model=PropertyResponse, status_code=status.HTTP_201_CREATED)
@@ -59,14 +100,14 @@ def get_property(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    prop = db.query(Property).filter(
+    prop = db.query(*response_columns(Property, PropertyResponse, exclude=("units",))).filter(
         Property.id == property_id,
         Property.deleted_at.is_(None)
     ).first()
     
     if not prop:
         raise HTTPException(status_code=404, detail="Property not found")
-    return prop
+    return json_response(_with_units(db, [prop._asdict()])[0])
 
 
 @router.put("/properties/{property_id}", response_model=PropertyResponse)
@@ -111,14 +152,14 @@ def delete_property(
 
 
 # Units
-@router.get("/properties/{property_id}/units", response_model=List[UnitResponse])
+@router.get("/properties/{property_id}/units", response_model=List[UnitResponse], dependencies=[Depends(conditional_get("units"))])
 def list_units(
     property_id: UUID,
     status: Optional[UnitStatus] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Unit).filter(
+    query = db.query(*response_columns(Unit, UnitResponse)).filter(
         Unit.property_id == property_id,
         Unit.deleted_at.is_(None)
     )
@@ -126,7 +167,7 @@ def list_units(
     if status:
         query = query.filter(Unit.status == status)
     
-    return query.all()
+    return json_response(row_dicts(query))
 
 
 @router.post("/properties/{property_id}/units", response_model=UnitResponse, status_code=status.HTTP_201_CREATED)
@@ -151,20 +192,77 @@ def create_unit(
     return unit
 
 
+@router.post("/properties/{property_id}/units/batch", response_model=BatchResult)
+def create_units_batch(
+    property_id: UUID,
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    _get_property_or_404(db, property_id)
+    valid, errors = validate_items(_with_parent(items, "property_id", property_id), UnitCreate)
+    
+    # Unit numbers must be unique within the property, across the batch too
+    taken = {
+        row.unit_number for row in db.query(Unit.unit_number).filter(
+            Unit.property_id == property_id,
+            Unit.deleted_at.is_(None)
+        )
+    }
+    for n, unit_in in list(valid.items()):
+        if unit_in.unit_number in taken:
+            errors[n] = f"Unit {unit_in.unit_number} already exists"
+            del valid[n]
+        else:
+            taken.add(unit_in.unit_number)
+    
+    ids = write_batch(db, lambda n: Unit(**valid[n].model_dump()), list(valid), errors)
+    return batch_result(len(items), ids, errors)
+
+
+@router.patch("/units/batch", response_model=BatchResult)
+def update_units_batch(
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valid, errors = validate_updates(items, UnitUpdate)
+    units = {
+        u.id: u for u in db.query(Unit).filter(
+            Unit.id.in_({unit_id for unit_id, _ in valid.values()}),
+            Unit.deleted_at.is_(None)
+        )
+    }
+    for n, (unit_id, _) in list(valid.items()):
+        if unit_id not in units:
+            errors[n] = "Unit not found"
+            del valid[n]
+    
+    def apply(n):
+        unit_id, unit_in = valid[n]
+        unit = units[unit_id]
+        for field, value in unit_in.model_dump(exclude_unset=True).items():
+            setattr(unit, field, value)
+        return unit
+    
+    ids = write_batch(db, apply, list(valid), errors)
+    return batch_result(len(items), ids, errors)
+
+
 @router.get("/units/{unit_id}", response_model=UnitResponse)
 def get_unit(
     unit_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    unit = db.query(Unit).filter(
+    unit = db.query(*response_columns(Unit, UnitResponse)).filter(
         Unit.id == unit_id,
         Unit.deleted_at.is_(None)
     ).first()
     
     if not unit:
         raise HTTPException(status_code=404, detail="Unit not found")
-    return unit
+    return json_response(unit._asdict())
 
 
 @router.put("/units/{unit_id}", response_model=UnitResponse)
@@ -196,36 +294,108 @@ def get_occupancy_report(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    properties = db.query(Property).filter(Property.deleted_at.is_(None)).all()
-    reports = []
-    
-    for prop in properties:
-        units = db.query(Unit).filter(
-            Unit.property_id == prop.id,
-            Unit.deleted_at.is_(None)
-        ).all()
-        
-        total_units = len(units)
-        occupied = len([u for u in units if u.status == UnitStatus.OCCUPIED])
-        vacant = len([u for u in units if u.status == UnitStatus.VACANT])
-        
-        total_rent = sum(u.monthly_rent_amount or 0 for u in units if u.status == UnitStatus.OCCUPIED)
-        total_outstanding = sum(u.outstanding_amount or 0 for u in units)
-        
-        reports.append(OccupancyReport(
-            property_id=prop.id,
-            property_name=prop.name,
-            total_units=total_units,
-            occupied_units=occupied,
-            vacant_units=vacant,
-            occupancy_rate=round(occupied / total_units * 100, 2) if total_units > 0 else 0,
-            total_monthly_rent=total_rent,
-            total_collected=total_rent - total_outstanding,
-            total_outstanding=total_outstanding,
+    return [
+        OccupancyReport(
+            **row,
+            occupancy_rate=round(row["occupied_units"] / row["total_units"] * 100, 2) if row["total_units"] > 0 else 0,
             currency="KWD"
+        )
+        for row in occupancy(db, date.today())
+    ]
+
+
+# Receivables
+@router.get("/receivables-aging", response_model=ReceivablesAgingReport, dependencies=[Depends(conditional_get("rental_income", "units", "properties"))])
+def get_receivables_aging(
+    as_of: Optional[date] = None,
+    property_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    as_of = as_of or date.today()
+    levels = {"total": [], "property": [], "unit": [], "tenant": []}
+    for row in receivables_aging(db, as_of, property_id):
+        levels[row["level"]].append(row)
+    
+    return ReceivablesAgingReport(
+        as_of=as_of,
+        totals=levels["total"],
+        properties=levels["property"],
+        units=levels["unit"],
+        tenants=levels["tenant"]
+    )
+
+
+# Analytics
+@router.get("/analytics", response_model=PropertyAnalyticsReport)
+def get_property_analytics(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    property_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    to_date = to_date or date.today()
+    from_date = from_date or to_date - relativedelta(months=11)
+    if from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if from_date < to_date - relativedelta(years=10):
+        raise HTTPException(status_code=400, detail="Range cannot exceed 10 years")
+    
+    items, cached = get_analytics(db, from_date, to_date, property_id)
+    db.commit()
+    return PropertyAnalyticsReport(
+        start=from_date,
+        end=to_date,
+        cached=cached,
+        items_missing_rate=sum(1 for item in items if item["missing_rate"]),
+        items=items
+    )
+
+
+# Lease Events
+@router.get("/leases/expiring", response_model=List[ExpiringLease], dependencies=[Depends(conditional_get("units", "properties"))])
+def get_expiring_leases(
+    days: int = Query(90, ge=1, le=1095),
+    property_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return json_response([dict(row) for row in expiring_leases(db, date.today(), days, property_id)])
+
+
+@router.get("/leases/rent-at-risk", response_model=List[LeaseExpiryMonth], dependencies=[Depends(conditional_get("units", "properties"))])
+def get_rent_at_risk(
+    months: int = Query(12, ge=1, le=60),
+    property_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    rows = expiry_profile(db, date.today(), months, property_id)
+    return [LeaseExpiryMonth(**row) for row in rows if row["is_portfolio"]]
+
+
+@router.get("/leases/expiry-profile", response_model=LeaseExpiryProfile, dependencies=[Depends(conditional_get("units", "properties"))])
+def get_lease_expiry_profile(
+    months: int = Query(24, ge=1, le=60),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    start = date.today()
+    portfolio, properties = [], {}
+    for row in expiry_profile(db, start, months):
+        month = LeaseExpiryMonth(**row)
+        if row["is_portfolio"]:
+            portfolio.append(month)
+            continue
+        profile = properties.setdefault(row["property_id"], PropertyExpiryProfile(
+            property_id=row["property_id"],
+            property_name=row["property_name"],
+            months=[]
         ))
+        profile.months.append(month)
     
-    return reports
+    return LeaseExpiryProfile(start=start, months=months, portfolio=portfolio, properties=list(properties.values()))
 
 
 # Rental Income
@@ -244,13 +414,85 @@ def create_rental_income(
     if not unit:
         raise HTTPException(status_code=404, detail="Unit not found")
     
+    existing = db.query(RentalIncome.id).filter(
+        RentalIncome.unit_id == unit_id,
+        RentalIncome.period_start == income_in.period_start,
+        RentalIncome.deleted_at.is_(None)
+    ).first()
+    
+    if existing:
+        raise HTTPException(status_code=400, detail="Rental income already recorded for this period")
+    
     income = RentalIncome(unit_id=unit_id, **income_in.model_dump(exclude={"unit_id"}))
     db.add(income)
+    
+    _invalidate_collected(db, [income])
     db.commit()
     db.refresh(income)
     return income
 
 
+@router.post("/rental-income/batch", response_model=BatchResult)
+def create_rental_income_batch(
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valid, errors = validate_items(items, RentalIncomeCreate)
+    found = {
+        row.id for row in db.query(Unit.id).filter(
+            Unit.id.in_({income_in.unit_id for income_in in valid.values()}),
+            Unit.deleted_at.is_(None)
+        )
+    }
+    for n, income_in in list(valid.items()):
+        if income_in.unit_id not in found:
+            errors[n] = "Unit not found"
+            del valid[n]
+    
+    # One rental income per unit and period, across the batch too
+    taken = {
+        (row.unit_id, row.period_start) for row in db.query(RentalIncome.unit_id, RentalIncome.period_start).filter(
+            RentalIncome.unit_id.in_({income_in.unit_id for income_in in valid.values()}),
+            RentalIncome.period_start.in_({income_in.period_start for income_in in valid.values()}),
+            RentalIncome.deleted_at.is_(None)
+        )
+    }
+    for n, income_in in list(valid.items()):
+        key = (income_in.unit_id, income_in.period_start)
+        if key in taken:
+            errors[n] = "Rental income already recorded for this period"
+            del valid[n]
+        else:
+            taken.add(key)
+    
+    ids = write_batch(
+        db, lambda n: RentalIncome(**valid[n].model_dump()), list(valid), errors,
+        before_commit=lambda incomes: _invalidate_collected(db, incomes)
+    )
+    return batch_result(len(items), ids, errors)
+
+
+@router.post("/rent-roll", response_model=RentRollResult)
+def run_rent_roll(
+    roll_in: RentRollRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if roll_in.property_id:
+        _get_property_or_404(db, roll_in.property_id)
+    
+    roll = generate_rent_roll(db, roll_in.month, roll_in.property_id)
+    db.commit()
+    return RentRollResult(
+        period_start=roll.period_start,
+        period_end=roll.period_end,
+        eligible_units=roll.eligible,
+        created=roll.created,
+        skipped=roll.skipped
+    )
+
+
 # Property Expenses
 @router.post("/properties/{property_id}/expenses", response_model=PropertyExpenseResponse, status_code=status.HTTP_201_CREATED)
 def create_expense(
@@ -274,14 +516,131 @@ def create_expense(
     return expense
 
 
-@router.get("/properties/{property_id}/expenses", response_model=List[PropertyExpenseResponse])
+@router.post("/properties/{property_id}/expenses/batch", response_model=BatchResult)
+def create_expenses_batch(
+    property_id: UUID,
+    items: List[Any] = Body(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    _get_property_or_404(db, property_id)
+    valid, errors = validate_items(_with_parent(items, "property_id", property_id), PropertyExpenseCreate)
+    ids = write_batch(db, lambda n: PropertyExpense(**valid[n].model_dump()), list(valid), errors)
+    return batch_result(len(items), ids, errors)
+
+
+@router.get("/properties/{property_id}/expenses", response_model=List[PropertyExpenseResponse], dependencies=[Depends(conditional_get("property_expenses"))])
 def list_expenses(
     property_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    expenses = db.query(PropertyExpense).filter(
+    expenses = db.query(*response_columns(PropertyExpense, PropertyExpenseResponse)).filter(
         PropertyExpense.property_id == property_id,
         PropertyExpense.deleted_at.is_(None)
-    ).order_by(PropertyExpense.expense_date.desc()).all()
-    return expenses
+    ).order_by(PropertyExpense.expense_date.desc())
+    return json_response(row_dicts(expenses))
+
+
+# Property Valuations
+def _change_bps(value: int, base: Optional[int], same_currency: bool) -> Optional[int]:
+    if not base or not same_currency:
+        return None
+    return int(round((value - base) * 10000 / base))
+
+
+@router.get("/valuations/latest", response_model=List[LatestValuation], dependencies=[Depends(conditional_get("property_valuations", "properties"))])
+def list_latest_valuations(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return [
+        LatestValuation(
+            **row,
+            change_bps=_change_bps(row["value_amount"], row["previous_value_amount"], row["previous_currency"] == row["currency"]),
+            change_since_purchase_bps=_change_bps(
+                row["value_amount"], row["purchase_price_amount"], row["purchase_price_currency"] == row["currency"]
+            )
+        )
+        for row in latest_valuations(db)
+    ]
+
+
+@router.get("/properties/{property_id}/valuations", response_model=List[PropertyValuationResponse], dependencies=[Depends(conditional_get("property_valuations"))])
+def list_valuations(
+    property_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valuations = db.query(*response_columns(PropertyValuation, PropertyValuationResponse)).filter(
+        PropertyValuation.property_id == property_id,
+        PropertyValuation.deleted_at.is_(None)
+    ).order_by(PropertyValuation.valuation_date.desc(), PropertyValuation.created_at.desc())
+    return json_response(row_dicts(valuations))
+
+
+@router.post("/properties/{property_id}/valuations", response_model=PropertyValuationResponse, status_code=status.HTTP_201_CREATED)
+def create_valuation(
+    property_id: UUID,
+    valuation_in: PropertyValuationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    _get_property_or_404(db, property_id)
+    
+    valuation = PropertyValuation(property_id=property_id, **valuation_in.model_dump())
+    db.add(valuation)
+    db.flush()
+    sync_property_valuation(db, property_id)
+    invalidate_nav_series(db, valuation.valuation_date)
+    db.commit()
+    db.refresh(valuation)
+    return valuation
+
+
+@router.put("/valuations/{valuation_id}", response_model=PropertyValuationResponse)
+def update_valuation(
+    valuation_id: UUID,
+    valuation_in: PropertyValuationUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valuation = db.query(PropertyValuation).filter(
+        PropertyValuation.id == valuation_id,
+        PropertyValuation.deleted_at.is_(None)
+    ).first()
+    
+    if not valuation:
+        raise HTTPException(status_code=404, detail="Valuation not found")
+    
+    changed_from = valuation.valuation_date
+    for field, value in valuation_in.model_dump(exclude_unset=True).items():
+        setattr(valuation, field, value)
+    
+    db.flush()
+    sync_property_valuation(db, valuation.property_id)
+    invalidate_nav_series(db, min(changed_from, valuation.valuation_date))
+    db.commit()
+    db.refresh(valuation)
+    return valuation
+
+
+@router.delete("/valuations/{valuation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_valuation(
+    valuation_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    valuation = db.query(PropertyValuation).filter(
+        PropertyValuation.id == valuation_id,
+        PropertyValuation.deleted_at.is_(None)
+    ).first()
+    
+    if not valuation:
+        raise HTTPException(status_code=404, detail="Valuation not found")
+    
+    valuation.deleted_at = datetime.utcnow()
+    db.flush()
+    sync_property_valuation(db, valuation.property_id)
+    invalidate_nav_series(db, valuation.valuation_date)
+    db.commit()
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.database import get_db
+from app.models.user import User
+from app.schemas.search import SearchResult
+from app.services.search import search
+from app.api.deps import get_current_user
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[SearchResult])
+def search_entities(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return search(db, q, limit)
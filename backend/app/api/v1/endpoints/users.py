@@ -8,6 +8,7 @@ from app.core.security import get_password_hash
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 from app.api.deps import get_current_user, get_admin_user
+from app.utils.fast_json import response_columns, row_dicts, json_response
 
 router = APIRouter()
 
@@ -17,8 +18,8 @@ def list_users(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_admin_user)
 ):
-    users = db.query(User).filter(User.deleted_at.is_(None)).all()
-    return users
+    users = db.query(*response_columns(User, UserResponse)).filter(User.deleted_at.is_(None))
+    return json_response(row_dicts(users))
 
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, portfolio, equities, fixed_income, real_estate, private_funds, exchange_rates, reports, imports
+from app.api.v1.endpoints import auth, users, portfolio, equities, fixed_income, real_estate, private_funds, exchange_rates, reports, imports, audit, search, autocomplete
 
 api_router = APIRouter()
 
@@ -13,3 +13,6 @@ api_router.include_router(private_funds.router, prefix="/private-funds", tags=["
 api_router.include_router(exchange_rates.router, prefix="/exchange-rates", tags=["Exchange Rates"])
 api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
 api_router.include_router(imports.router, prefix="/import", tags=["Import"])
+api_router.include_router(audit.router, prefix="/audit", tags=["Audit"])
+api_router.include_router(search.router, prefix="/search", tags=["Search"])
+api_router.include_router(autocomplete.router, prefix="/autocomplete", tags=["Search"])
@@ -9,6 +9,12 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    BCRYPT_ROUNDS: int = 12  # Hashes with any other cost are rehashed on next login
+    PASSWORD_HASH_WORKERS: int = 2  # Processes dedicated to bcrypt
+    LOGIN_CONCURRENCY: int = 8  # Logins in flight per API process; the rest queue
+    LOGIN_QUEUE_SIZE: int = 500  # Logins waiting for a slot; any beyond get 429. Waiting costs no thread
+    LOGIN_QUEUE_SECONDS: float = 60.0  # Longest wait for a slot before 429; a burst drains at the bcrypt rate
+    
     POSTGRES_SERVER: str = "localhost"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
@@ -25,6 +31,9 @@ class Settings(BaseSettings):
     
     TIMEZONE: str = "Asia/Kuwait"
     
+    AUDIT_RETENTION_MONTHS: int = 24  # Older audit partitions are archived to disk
+    AUDIT_ARCHIVE_DIR: str = "archive/audit_logs"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
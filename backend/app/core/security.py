@@ -1,13 +1,58 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost flags hashes made at any other cost for rehash
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 ALGORITHM = "HS256"
 
+# bcrypt is CPU bound and holds the GIL for the whole hash, so it runs in
+# dedicated processes instead of the request worker threads.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+# Logins admitted at once; each one parks a request thread until its hash is done
+login_slots = asyncio.Semaphore(settings.LOGIN_CONCURRENCY)
+# Logins waiting for a slot; they wait on the event loop and hold no thread
+_login_waiting = 0
+
+
+@asynccontextmanager
+async def login_slot() -> AsyncIterator[bool]:
+    """Hold a login slot for the block; yields False if the queue is full or no slot frees up in time."""
+    global _login_waiting
+    if _login_waiting >= settings.LOGIN_QUEUE_SIZE:
+        yield False
+        return
+    _login_waiting += 1
+    try:
+        await asyncio.wait_for(login_slots.acquire(), settings.LOGIN_QUEUE_SECONDS)
+        admitted = True
+    except asyncio.TimeoutError:
+        admitted = False
+    finally:
+        _login_waiting -= 1
+    try:
+        yield admitted
+    finally:
+        if admitted:
+            login_slots.release()
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -20,14 +65,62 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def _run_in_hash_pool(fn: Callable, *args):
+    global _hash_pool
+    try:
+        return _get_hash_pool().submit(fn, *args).result()
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool and retry once
+        with _hash_pool_lock:
+            _hash_pool = None
+        return _get_hash_pool().submit(fn, *args).result()
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+
+# Module-level so they can be pickled over to the pool's worker processes
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _run_in_hash_pool(_verify, plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a fresh hash as well when the stored one uses an outdated cost."""
+    return _run_in_hash_pool(_verify_and_update, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return _run_in_hash_pool(_hash, password)
+
+
 def decode_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
@@ -0,0 +1,25 @@
+from sqlalchemy.orm import sessionmaker
+from app.core.database import SessionLocal
+from app.models.equity import EquityTransaction
+from app.services.audit import register_audit_hooks
+from app.services.fx import register_fx_hooks
+from app.services.kwd_conversion import register_kwd_hooks
+from app.services.prices import register_price_cache_hooks
+from app.services.versions import register_version_hooks
+from app.utils.partitions import register_partition_hooks
+
+
+def register_session_hooks(session_factory: sessionmaker = SessionLocal) -> None:
+    """Hooks every writer needs, the API and the scripts alike; safe to call more than once."""
+    # Every ORM write lands in audit_logs
+    register_audit_hooks(session_factory)
+    # Amounts are converted to KWD at the rate of their date on every ORM write
+    register_kwd_hooks(session_factory)
+    # Dense rate coverage is cached process-wide only once the rows are committed
+    register_fx_hooks(session_factory)
+    # Appended closes reach the in-process price cache only once they are committed
+    register_price_cache_hooks(session_factory)
+    # Transactions dated in a month with no partition yet get one before they are flushed
+    register_partition_hooks(session_factory, {EquityTransaction: "transaction_date"})
+    # Last, so tables written by the before_commit hooks above are included
+    register_version_hooks(session_factory)
@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import shutdown_hash_pool
+from app.core.session_hooks import register_session_hooks
 from app.api.v1.router import api_router
+from app.services.autocomplete import build_autocomplete_index, register_autocomplete_hooks
+from app.services.fx import MissingRateError
+from app.utils.partitions import PartitionBusyError, create_upcoming_partitions
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -14,10 +21,64 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+
+@app.middleware("http")
+async def add_etag_header(request: Request, call_next):
+    # Set by the conditional_get dependency on versioned reads
+    response = await call_next(request)
+    etag = getattr(request.state, "etag", None)
+    if etag and response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.exception_handler(MissingRateError)
+async def missing_rate_handler(request: Request, exc: MissingRateError):
+    # Raised while flushing an amount that cannot be converted to KWD
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(PartitionBusyError)
+async def partition_busy_handler(request: Request, exc: PartitionBusyError):
+    # A write landed in a month with no partition and could not create one in time
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Audit, KWD conversion, rate coverage and partitions, shared with the scripts
+register_session_hooks(SessionLocal)
+# Committed holding changes go straight into the in-memory autocomplete index
+register_autocomplete_hooks(SessionLocal)
+
+
+@app.on_event("startup")
+def create_partitions():
+    # Normally already there from the daily job; covers a fresh database
+    db = SessionLocal()
+    try:
+        create_upcoming_partitions(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def load_autocomplete_index():
+    db = SessionLocal()
+    try:
+        build_autocomplete_index(db)
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+def stop_hash_pool():
+    shutdown_hash_pool()
+
 
 @app.get("/health")
 def health_check():
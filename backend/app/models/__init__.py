@@ -1,17 +1,23 @@
 from app.models.user import User
-from app.models.equity import EquityHolding, EquityTransaction, Dividend, CorporateAction
+from app.models.equity import EquityHolding, EquityTransaction, Dividend, CorporateAction, PriceHistory
 from app.models.fixed_income import FixedIncomeHolding
-from app.models.real_estate import Property, Unit, RentalIncome, PropertyExpense, PropertyValuation
+from app.models.real_estate import Property, Unit, RentalIncome, PropertyExpense, PropertyValuation, PropertyMonthlyAnalytics
 from app.models.private_fund import PrivateFund, CapitalCall, Distribution, FundValuation
-from app.models.currency import ExchangeRate
+from app.models.currency import ExchangeRate, FxRateDaily
 from app.models.audit import AuditLog
+from app.models.portfolio import PortfolioNav, PortfolioReturn, PortfolioReturnState
+from app.models.table_version import TableVersion
+from app.models.backfill import BackfillProgress
 
 __all__ = [
     "User",
-    "EquityHolding", "EquityTransaction", "Dividend", "CorporateAction",
+    "EquityHolding", "EquityTransaction", "Dividend", "CorporateAction", "PriceHistory",
     "FixedIncomeHolding",
-    "Property", "Unit", "RentalIncome", "PropertyExpense", "PropertyValuation",
+    "Property", "Unit", "RentalIncome", "PropertyExpense", "PropertyValuation", "PropertyMonthlyAnalytics",
     "PrivateFund", "CapitalCall", "Distribution", "FundValuation",
-    "ExchangeRate",
+    "ExchangeRate", "FxRateDaily",
     "AuditLog",
+    "PortfolioNav", "PortfolioReturn", "PortfolioReturnState",
+    "TableVersion",
+    "BackfillProgress",
 ]
@@ -1,10 +1,23 @@
-from sqlalchemy import Column, String, Text, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.models.base import BaseModel
 
 
 class AuditLog(BaseModel):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_created", text("created_at DESC"), text("id DESC")),
+        Index("ix_audit_logs_entity", "entity_type", "entity_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_audit_logs_user", "user_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_audit_logs_action", "action", text("created_at DESC"), text("id DESC")),
+        Index("ix_audit_logs_old_values", "old_values", postgresql_using="gin", postgresql_ops={"old_values": "jsonb_path_ops"}),
+        Index("ix_audit_logs_new_values", "new_values", postgresql_using="gin", postgresql_ops={"new_values": "jsonb_path_ops"}),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    
+    # Part of the primary key so rows can be range partitioned by month
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     action = Column(String(50), nullable=False)  # CREATE, UPDATE, DELETE, LOGIN, LOGOUT
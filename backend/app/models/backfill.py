@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class BackfillProgress(Base):
+    # Checkpoint of a resumable data backfill: one row per job and table,
+    # advanced in primary key order after every committed batch
+    __tablename__ = "backfill_progress"
+    
+    job = Column(String(50), primary_key=True)
+    table_name = Column(String(63), primary_key=True)
+    
+    last_id = Column(UUID(as_uuid=True))  # Highest id processed so far
+    total_rows = Column(BigInteger, nullable=False, default=0)  # Counted when the table was started
+    rows_scanned = Column(BigInteger, nullable=False, default=0)
+    rows_updated = Column(BigInteger, nullable=False, default=0)
+    rows_missing_rate = Column(BigInteger, nullable=False, default=0)
+    
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime)
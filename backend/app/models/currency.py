@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, BigInteger, Date, UniqueConstraint
+from sqlalchemy import Column, String, BigInteger, Boolean, Date, UniqueConstraint
+from app.core.database import Base
 from app.models.base import BaseModel
 
 
@@ -17,3 +18,18 @@ class ExchangeRate(BaseModel):
     rate = Column(BigInteger, nullable=False)
     
     source = Column(String(100))  # API source or "manual"
+
+
+class FxRateDaily(Base):
+    # Derived from exchange_rates by services.fx: every pair on every day,
+    # quotes carried over weekends and holidays, so lookups are an equi-join
+    # on date instead of a search for the latest quote
+    __tablename__ = "fx_rates_daily"
+    
+    from_currency = Column(String(3), primary_key=True)
+    to_currency = Column(String(3), primary_key=True)
+    rate_date = Column(Date, primary_key=True)
+    
+    rate = Column(BigInteger, nullable=False)  # 8 decimal places, as exchange_rates
+    quote_date = Column(Date)  # Oldest quote the rate rests on
+    triangulated = Column(Boolean, nullable=False, default=False)  # Crossed rather than quoted or inverted
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, BigInteger, Date, ForeignKey, Enum, Text
+from sqlalchemy import Column, String, BigInteger, Date, ForeignKey, Enum, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
+from app.core.database import Base
 from app.models.base import BaseModel
 
 
@@ -46,6 +47,10 @@ class CorporateActionType(str, enum.Enum):
 
 class EquityHolding(BaseModel):
     __tablename__ = "equity_holdings"
+    __table_args__ = (
+        Index("ix_equity_holdings_ticker_trgm", "ticker", postgresql_using="gin", postgresql_ops={"ticker": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_equity_holdings_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+    )
     
     ticker = Column(String(20), nullable=False, index=True)
     name = Column(String(255), nullable=False)
@@ -70,10 +75,19 @@ class EquityHolding(BaseModel):
     transactions = relationship("EquityTransaction", back_populates="holding")
     dividends = relationship("Dividend", back_populates="holding")
     corporate_actions = relationship("CorporateAction", back_populates="holding")
+    price_history = relationship("PriceHistory", back_populates="holding")
 
 
 class EquityTransaction(BaseModel):
     __tablename__ = "equity_transactions"
+    __table_args__ = (
+        Index("ix_equity_transactions_holding_date", "holding_id", "transaction_date"),
+        Index("ix_equity_transactions_date", "transaction_date", "id"),
+        {"postgresql_partition_by": "RANGE (transaction_date)"},
+    )
+    
+    # Part of the primary key so rows can be range partitioned by month
+    transaction_date = Column(Date, primary_key=True, nullable=False)
     
     holding_id = Column(UUID(as_uuid=True), ForeignKey("equity_holdings.id"), nullable=False)
     transaction_type = Column(String(10), nullable=False)  # BUY or SELL
@@ -82,7 +96,6 @@ class EquityTransaction(BaseModel):
     price_currency = Column(String(3), nullable=False)
     total_amount = Column(BigInteger, nullable=False)
     total_amount_kwd = Column(BigInteger, nullable=False)
-    transaction_date = Column(Date, nullable=False)
     fees_amount = Column(BigInteger, default=0)
     notes = Column(Text)
     
@@ -115,3 +128,17 @@ class CorporateAction(BaseModel):
     notes = Column(Text)
     
     holding = relationship("EquityHolding", back_populates="corporate_actions")
+
+
+class PriceHistory(Base):
+    # Daily closes, range-partitioned by month on price_date. Deliberately not a
+    # BaseModel: no surrogate id or audit timestamps, just the natural key.
+    __tablename__ = "price_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (price_date)"}
+    
+    holding_id = Column(UUID(as_uuid=True), ForeignKey("equity_holdings.id"), primary_key=True)
+    price_date = Column(Date, primary_key=True)
+    close_amount = Column(BigInteger, nullable=False)  # In smallest currency unit
+    currency = Column(String(3), nullable=False)
+    
+    holding = relationship("EquityHolding", back_populates="price_history")
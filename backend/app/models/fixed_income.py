@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, BigInteger, Date, Enum, Text, Integer
+from sqlalchemy import Column, String, BigInteger, Date, Enum, Text, Integer, Index, text
 import enum
 from app.models.base import BaseModel
 
@@ -20,6 +20,11 @@ class FixedIncomeStatus(str, enum.Enum):
 
 class FixedIncomeHolding(BaseModel):
     __tablename__ = "fixed_income_holdings"
+    __table_args__ = (
+        Index("ix_fixed_income_holdings_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_fixed_income_holdings_isin_trgm", "isin", postgresql_using="gin", postgresql_ops={"isin": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_fixed_income_holdings_issuer_trgm", "issuer", postgresql_using="gin", postgresql_ops={"issuer": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+    )
     
     name = Column(String(255), nullable=False)
     isin = Column(String(20), index=True)
@@ -0,0 +1,56 @@
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Date, DateTime, Float, Integer, String
+from app.core.database import Base
+
+
+class PortfolioNav(Base):
+    # Derived daily series, rebuilt from source tables; keyed by date only
+    __tablename__ = "portfolio_nav"
+    
+    nav_date = Column(Date, primary_key=True)
+    
+    # All values in KWD fils
+    equities_value = Column(BigInteger, nullable=False, default=0)
+    fixed_income_value = Column(BigInteger, nullable=False, default=0)
+    real_estate_value = Column(BigInteger, nullable=False, default=0)
+    private_funds_value = Column(BigInteger, nullable=False, default=0)
+    total_value_kwd = Column(BigInteger, nullable=False, default=0)
+    
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PortfolioReturn(Base):
+    # Returns cached per closed period end; entity_key is a holding id,
+    # an asset class name or "portfolio" depending on entity_type
+    __tablename__ = "portfolio_returns"
+    
+    as_of_date = Column(Date, primary_key=True)
+    entity_type = Column(String(20), primary_key=True)  # holding, asset_class, portfolio
+    entity_key = Column(String(64), primary_key=True)
+    period = Column(String(3), primary_key=True)  # MTD, QTD, YTD, ITD
+    
+    asset_class = Column(String(20))
+    period_start = Column(Date, nullable=False)
+    
+    twr_dietz_bps = Column(Integer)  # Modified Dietz
+    twr_daily_bps = Column(Integer)  # Daily-linked
+    mwr_bps = Column(Integer)  # Money-weighted (IRR over the period)
+    
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PortfolioReturnState(Base):
+    # Running return inputs per entity, so returns resume from the last closed
+    # month end: a row for every entity on each closed month end and one for
+    # any other day it had an external flow
+    __tablename__ = "portfolio_return_state"
+    
+    state_date = Column(Date, primary_key=True)
+    entity_type = Column(String(20), primary_key=True)  # holding, asset_class, portfolio
+    entity_key = Column(String(64), primary_key=True)
+    
+    asset_class = Column(String(20))
+    
+    value = Column(Float, nullable=False)  # KWD fils at the end of the day
+    flow = Column(Float, nullable=False)  # External flow that day, KWD fils
+    growth = Column(Float, nullable=False)  # Cumulative daily log growth since inception
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, BigInteger, Date, ForeignKey, Enum, Text, Integer, Boolean
+from sqlalchemy import Column, String, BigInteger, Date, ForeignKey, Enum, Text, Integer, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -24,6 +24,10 @@ class FundStatus(str, enum.Enum):
 
 class PrivateFund(BaseModel):
     __tablename__ = "private_funds"
+    __table_args__ = (
+        Index("ix_private_funds_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_private_funds_fund_manager_trgm", "fund_manager", postgresql_using="gin", postgresql_ops={"fund_manager": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+    )
     
     name = Column(String(255), nullable=False)
     fund_type = Column(Enum(FundType, values_callable=lambda x: [e.value for e in x]), nullable=False)
@@ -68,6 +72,9 @@ class PrivateFund(BaseModel):
 
 class CapitalCall(BaseModel):
     __tablename__ = "capital_calls"
+    __table_args__ = (
+        Index("ix_capital_calls_fund_payment", "fund_id", "payment_date"),
+    )
     
     fund_id = Column(UUID(as_uuid=True), ForeignKey("private_funds.id"), nullable=False)
     call_number = Column(Integer)
@@ -90,6 +97,9 @@ class CapitalCall(BaseModel):
 
 class Distribution(BaseModel):
     __tablename__ = "distributions"
+    __table_args__ = (
+        Index("ix_distributions_fund_payment", "fund_id", "payment_date"),
+    )
     
     fund_id = Column(UUID(as_uuid=True), ForeignKey("private_funds.id"), nullable=False)
     distribution_number = Column(Integer)
@@ -111,6 +121,9 @@ class Distribution(BaseModel):
 
 class FundValuation(BaseModel):
     __tablename__ = "fund_valuations"
+    __table_args__ = (
+        Index("ix_fund_valuations_fund_date", "fund_id", text("valuation_date DESC")),
+    )
     
     fund_id = Column(UUID(as_uuid=True), ForeignKey("private_funds.id"), nullable=False)
     valuation_date = Column(Date, nullable=False)
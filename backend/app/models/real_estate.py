@@ -1,7 +1,9 @@
-from sqlalchemy import Column, String, BigInteger, Date, ForeignKey, Enum, Text, Integer, Boolean
-from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, Date, DateTime, ForeignKey, Enum, Text, Integer, Boolean, Index, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import enum
+from app.core.database import Base
 from app.models.base import BaseModel
 
 
@@ -22,6 +24,10 @@ class UnitStatus(str, enum.Enum):
 
 class Property(BaseModel):
     __tablename__ = "properties"
+    __table_args__ = (
+        Index("ix_properties_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_properties_city_trgm", "city", postgresql_using="gin", postgresql_ops={"city": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+    )
     
     name = Column(String(255), nullable=False)
     property_type = Column(Enum(PropertyType, values_callable=lambda x: [e.value for e in x]), nullable=False)
@@ -53,6 +59,16 @@ class Property(BaseModel):
 
 class Unit(BaseModel):
     __tablename__ = "units"
+    __table_args__ = (
+        Index("ix_units_tenant_name_trgm", "tenant_name", postgresql_using="gin", postgresql_ops={"tenant_name": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_units_unit_number_trgm", "unit_number", postgresql_using="gin", postgresql_ops={"unit_number": "gin_trgm_ops"}, postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_units_property", "property_id", postgresql_where=text("deleted_at IS NULL")),
+        Index(
+            "ix_units_lease_end", "lease_end_date",
+            postgresql_include=["property_id", "status", "monthly_rent_amount", "monthly_rent_currency"],
+            postgresql_where=text("deleted_at IS NULL AND lease_end_date IS NOT NULL")
+        ),
+    )
     
     property_id = Column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False)
     unit_number = Column(String(50), nullable=False)
@@ -80,6 +96,14 @@ class Unit(BaseModel):
 
 class RentalIncome(BaseModel):
     __tablename__ = "rental_income"
+    __table_args__ = (
+        Index("uq_rental_income_unit_period", "unit_id", "period_start", unique=True, postgresql_where=text("deleted_at IS NULL")),
+        Index(
+            "ix_rental_income_open", "unit_id", "period_end",
+            postgresql_include=["period_start", "expected_amount", "received_amount", "currency"],
+            postgresql_where=text("deleted_at IS NULL AND is_collected IS NOT TRUE")
+        ),
+    )
     
     unit_id = Column(UUID(as_uuid=True), ForeignKey("units.id"), nullable=False)
     period_start = Column(Date, nullable=False)
@@ -118,6 +142,13 @@ class PropertyExpense(BaseModel):
 
 class PropertyValuation(BaseModel):
     __tablename__ = "property_valuations"
+    __table_args__ = (
+        Index(
+            "ix_property_valuations_latest", "property_id", text("valuation_date DESC"), text("created_at DESC"),
+            postgresql_include=["id", "value_amount", "currency"],
+            postgresql_where=text("deleted_at IS NULL")
+        ),
+    )
     
     property_id = Column(UUID(as_uuid=True), ForeignKey("properties.id"), nullable=False)
     valuation_date = Column(Date, nullable=False)
@@ -130,3 +161,29 @@ class PropertyValuation(BaseModel):
     notes = Column(Text)
     
     property = relationship("Property", back_populates="valuations")
+
+
+class PropertyMonthlyAnalytics(Base):
+    # Derived P&L per property and closed month, rebuilt from rental income,
+    # expenses and rates whenever the month's source_version no longer matches
+    __tablename__ = "property_monthly_analytics"
+    
+    property_id = Column(UUID(as_uuid=True), primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    
+    # All amounts in KWD fils
+    gross_rent = Column(BigInteger, nullable=False, default=0)
+    collections = Column(BigInteger, nullable=False, default=0)
+    expenses = Column(BigInteger, nullable=False, default=0)
+    expenses_by_type = Column(JSONB, nullable=False, default=dict)
+    noi = Column(BigInteger, nullable=False, default=0)
+    property_value = Column(BigInteger)
+    
+    area_sqm = Column(BigInteger)  # In square centimeters
+    gross_yield_bps = Column(Integer)  # Annualised
+    net_yield_bps = Column(Integer)  # Annualised
+    expenses_per_sqm = Column(BigInteger)  # Fils per square meter
+    missing_rate = Column(Integer, nullable=False, default=0)  # Amounts left out: no KWD rate for their currency
+    
+    source_version = Column(String(32), nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
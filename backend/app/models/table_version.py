@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, DateTime, String
+from app.core.database import Base
+
+
+class TableVersion(Base):
+    # Bumped at the commit of every transaction that wrote the named table; see migration 018
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String(63), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from uuid import UUID
+
+
+class AuditLogResponse(BaseModel):
+    id: UUID
+    created_at: datetime
+    user_id: Optional[UUID] = None
+    action: str
+    entity_type: str
+    entity_id: Optional[UUID] = None
+    old_values: Optional[Dict[str, Any]] = None
+    new_values: Optional[Dict[str, Any]] = None
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    description: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class AuditArchive(BaseModel):
+    month: date
+    size_bytes: int
+
+
+class RetentionRun(BaseModel):
+    month: date
+    rows: int
+    path: str
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogResponse]
+    next_cursor: Optional[str] = None
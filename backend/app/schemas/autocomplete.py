@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class AutocompleteSuggestion(BaseModel):
+    entity_type: str  # equity, fixed_income
+    id: UUID
+    code: Optional[str] = None  # Ticker or ISIN
+    name: str
+
+
+class AutocompleteStats(BaseModel):
+    entries: int
+    keys: int
+    memory_bytes: int
+    built_at: Optional[datetime] = None
+    build_ms: float
+    versions: Dict[str, int]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Generic, TypeVar, List, Optional
 from datetime import date, datetime
 from uuid import UUID
@@ -6,6 +6,15 @@ from uuid import UUID
 T = TypeVar('T')
 
 
+def not_null(*fields: str):
+    """Validator for update schemas: the fields may be left out but not set to null."""
+    def check(cls, value):
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+    return field_validator(*fields)(check)
+
+
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
     total: int
@@ -30,6 +39,24 @@ class ExchangeRateResponse(BaseModel):
         from_attributes = True
 
 
+class FxImportRowError(BaseModel):
+    row: int  # Line in the file, the header being line 1
+    message: str
+
+
+class FxImportResult(BaseModel):
+    rows: int
+    inserted: int
+    updated: int
+    unchanged: int
+    invalid: int
+    errors: List[FxImportRowError]  # The first 100
+    start: Optional[date] = None  # Earliest changed rate date
+    end: Optional[date] = None
+    revalued_currencies: List[str] = []  # Whose rate today moved
+    revalued_rows: int = 0  # Holdings and funds whose KWD value changed
+
+
 class BaseResponse(BaseModel):
     id: UUID
     created_at: datetime
@@ -37,3 +64,15 @@ class BaseResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class BatchItemResult(BaseModel):
+    index: int  # Position in the request array
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
@@ -79,6 +79,15 @@ class EquityTransactionResponse(BaseModel):
         from_attributes = True
 
 
+class EquityLedgerEntry(EquityTransactionResponse):
+    ticker: str
+
+
+class EquityLedgerPage(BaseModel):
+    items: List[EquityLedgerEntry]
+    next_cursor: Optional[str] = None
+
+
 class DividendCreate(BaseModel):
     holding_id: UUID
     amount: int
@@ -126,3 +135,26 @@ class CorporateActionResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class PricePointCreate(BaseModel):
+    holding_id: UUID
+    price_date: date
+    close_amount: int
+    currency: str
+
+
+class PriceAppendResult(BaseModel):
+    appended: int
+
+
+class PricePoint(BaseModel):
+    date: date
+    close_amount: int
+
+
+class PriceSeriesResponse(BaseModel):
+    holding_id: UUID
+    currency: Optional[str]
+    interval: str
+    points: List[PricePoint]
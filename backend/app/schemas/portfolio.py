@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import date
 
 
@@ -65,3 +65,57 @@ class IRRMatrixItem(BaseModel):
 class IRRMatrix(BaseModel):
     items: List[IRRMatrixItem]
     portfolio_irr_bps: Optional[int]
+
+
+class PeriodReturn(BaseModel):
+    period: str  # MTD, QTD, YTD, ITD
+    start_date: date
+    end_date: date
+    twr_dietz_bps: Optional[int] = None
+    twr_daily_bps: Optional[int] = None
+    mwr_bps: Optional[int] = None
+
+
+class EntityReturns(BaseModel):
+    entity_type: str  # holding, asset_class, portfolio
+    entity_key: str
+    asset_class: Optional[str] = None
+    periods: List[PeriodReturn]
+
+
+class ReturnsReport(BaseModel):
+    as_of_date: date
+    cached: bool
+    items: List[EntityReturns]
+
+
+class ScenarioShock(BaseModel):
+    name: str
+    fx_shocks_bps: Dict[str, int] = {}  # Change in a currency's KWD value; -1000 = 10% weaker
+    price_shocks_bps: Dict[str, int] = {}  # By asset class: equities, fixed_income, real_estate
+    nav_shock_bps: int = 0  # Private fund NAVs
+
+
+class ScenarioRequest(BaseModel):
+    scenarios: List[ScenarioShock]
+
+
+class ScenarioBreakdownItem(BaseModel):
+    category: str
+    base_value_kwd: int
+    pnl_kwd: int
+
+
+class ScenarioOutcome(BaseModel):
+    name: str
+    base_value_kwd: int
+    shocked_value_kwd: int
+    pnl_kwd: int
+    pnl_bps: Optional[int]
+    by_asset_class: List[ScenarioBreakdownItem]
+    by_currency: List[ScenarioBreakdownItem]
+
+
+class ScenarioReport(BaseModel):
+    as_of_date: date
+    scenarios: List[ScenarioOutcome]
@@ -3,6 +3,7 @@ from typing import Optional, List
 from datetime import date, datetime
 from uuid import UUID
 from app.models.private_fund import FundType, FundStatus
+from app.schemas.common import not_null
 
 
 class PrivateFundCreate(BaseModel):
@@ -127,3 +128,69 @@ class DistributionResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class FundValuationCreate(BaseModel):
+    valuation_date: date
+    nav_amount: int
+    currency: str = "USD"
+    irr_bps: Optional[int] = None
+    tvpi_bps: Optional[int] = None
+    notes: Optional[str] = None
+
+
+class FundValuationUpdate(BaseModel):
+    valuation_date: Optional[date] = None
+    nav_amount: Optional[int] = None
+    currency: Optional[str] = None
+    irr_bps: Optional[int] = None
+    tvpi_bps: Optional[int] = None
+    notes: Optional[str] = None
+
+    _required = not_null("valuation_date", "nav_amount", "currency")
+
+
+class FundValuationResponse(BaseModel):
+    id: UUID
+    fund_id: UUID
+    valuation_date: date
+    nav_amount: int
+    currency: str
+    nav_kwd: Optional[int]
+    irr_bps: Optional[int]
+    tvpi_bps: Optional[int]
+    notes: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class NavRollForwardResult(BaseModel):
+    funds_updated: int
+
+
+class PacingBand(BaseModel):
+    p5: int
+    p25: int
+    p50: int
+    p75: int
+    p95: int
+
+
+class PacingQuarter(BaseModel):
+    quarter_start: date
+    calls: PacingBand
+    distributions: PacingBand
+    net: PacingBand  # Distributions less calls
+    cumulative_net: PacingBand
+
+
+class PacingReport(BaseModel):
+    as_of_date: date
+    funds: int
+    funds_missing_rate: int  # Left out of the bands: no KWD rate for their currency
+    paths: int
+    uncalled_kwd: int
+    nav_kwd: int
+    quarters: List[PacingQuarter]
@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import date, datetime
 from uuid import UUID
 from app.models.real_estate import PropertyType, UnitStatus
+from app.schemas.common import not_null
 
 
 class PropertyCreate(BaseModel):
@@ -23,8 +24,6 @@ class PropertyCreate(BaseModel):
 class PropertyUpdate(BaseModel):
     name: Optional[str] = None
     address: Optional[str] = None
-    current_value_amount: Optional[int] = None
-    current_value_currency: Optional[str] = None
     ownership_entity: Optional[str] = None
     irr_bps: Optional[int] = None
     notes: Optional[str] = None
@@ -172,3 +171,165 @@ class OccupancyReport(BaseModel):
     total_collected: int
     total_outstanding: int
     currency: str = "KWD"
+
+
+class RentRollRequest(BaseModel):
+    month: date  # Any day in the month
+    property_id: Optional[UUID] = None  # Default: every property
+
+
+class RentRollResult(BaseModel):
+    period_start: date
+    period_end: date
+    eligible_units: int
+    created: int
+    skipped: int  # Already had a row for the period
+
+
+class AgingBuckets(BaseModel):
+    currency: str
+    days_0_30: int
+    days_31_60: int
+    days_61_90: int
+    days_over_90: int
+    total_outstanding: int
+    open_periods: int
+    oldest_days_past_due: int
+    share_bps: int  # Share of the level's total in the same currency
+
+
+class PropertyAging(AgingBuckets):
+    property_id: UUID
+    property_name: str
+
+
+class UnitAging(AgingBuckets):
+    property_id: UUID
+    property_name: str
+    unit_id: UUID
+    unit_number: str
+    tenant_name: Optional[str]
+
+
+class TenantAging(AgingBuckets):
+    tenant_name: Optional[str]
+
+
+class ReceivablesAgingReport(BaseModel):
+    as_of: date
+    totals: List[AgingBuckets]  # One per currency
+    properties: List[PropertyAging]
+    units: List[UnitAging]
+    tenants: List[TenantAging]
+
+
+class ExpiringLease(BaseModel):
+    unit_id: UUID
+    unit_number: str
+    tenant_name: Optional[str]
+    property_id: UUID
+    property_name: str
+    lease_start_date: Optional[date]
+    lease_end_date: date
+    days_remaining: int
+    monthly_rent_amount: int
+    monthly_rent_currency: str
+
+
+class LeaseExpiryMonth(BaseModel):
+    month: date
+    currency: str
+    expiring_leases: int
+    monthly_rent_amount: int  # Rent at risk: monthly rent of the leases ending
+
+
+class PropertyExpiryProfile(BaseModel):
+    property_id: UUID
+    property_name: str
+    months: List[LeaseExpiryMonth]
+
+
+class LeaseExpiryProfile(BaseModel):
+    start: date
+    months: int
+    portfolio: List[LeaseExpiryMonth]
+    properties: List[PropertyExpiryProfile]
+
+
+class PropertyMonthAnalytics(BaseModel):
+    property_id: UUID
+    property_name: str
+    month: date
+    # Amounts in KWD fils
+    gross_rent: int
+    collections: int
+    expenses: int
+    expenses_by_type: Dict[str, int]
+    noi: int
+    property_value: Optional[int]
+    area_sqm: Optional[int]  # In square centimeters
+    gross_yield_bps: Optional[int]  # Annualised
+    net_yield_bps: Optional[int]
+    expenses_per_sqm: Optional[int]  # Fils per square meter
+    missing_rate: int  # Amounts left out of the month: no KWD rate for their currency
+
+
+class PropertyAnalyticsReport(BaseModel):
+    start: date
+    end: date
+    currency: str = "KWD"
+    cached: bool
+    items_missing_rate: int  # Property-months with amounts left out for want of a KWD rate
+    items: List[PropertyMonthAnalytics]
+
+
+class PropertyValuationCreate(BaseModel):
+    valuation_date: date
+    value_amount: int
+    currency: str = "KWD"
+    appraiser: Optional[str] = None
+    valuation_method: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class PropertyValuationUpdate(BaseModel):
+    valuation_date: Optional[date] = None
+    value_amount: Optional[int] = None
+    currency: Optional[str] = None
+    appraiser: Optional[str] = None
+    valuation_method: Optional[str] = None
+    notes: Optional[str] = None
+
+    _required = not_null("valuation_date", "value_amount", "currency")
+
+
+class PropertyValuationResponse(BaseModel):
+    id: UUID
+    property_id: UUID
+    valuation_date: date
+    value_amount: int
+    currency: str
+    appraiser: Optional[str]
+    valuation_method: Optional[str]
+    notes: Optional[str]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class LatestValuation(BaseModel):
+    property_id: UUID
+    property_name: str
+    country: Optional[str]
+    purchase_price_amount: int
+    purchase_price_currency: Optional[str]
+    purchase_date: date
+    valuation_id: UUID
+    valuation_date: date
+    value_amount: int
+    currency: str
+    previous_valuation_date: Optional[date]
+    previous_value_amount: Optional[int]
+    change_bps: Optional[int]  # Since the previous valuation, same currency only
+    change_since_purchase_bps: Optional[int]  # Same currency only
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+
+
+class SearchResult(BaseModel):
+    entity_type: str  # equity, fixed_income, property, unit, private_fund
+    id: UUID
+    parent_id: Optional[UUID] = None  # Property of a unit
+    title: str
+    subtitle: Optional[str] = None
+    score: float
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,215 @@
+from datetime import date
+from types import SimpleNamespace
+from typing import List, NamedTuple
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.fx import load_kwd_rate_series, minor_unit
+
+# Every lookup below is "latest row on or before D" per position, served by a
+# LIMIT 1 lateral probe on a (position, date) index rather than a full scan.
+
+
+class PortfolioSnapshot(NamedTuple):
+    equities: List[SimpleNamespace]
+    fixed_income: List[SimpleNamespace]
+    properties: List[SimpleNamespace]
+    funds: List[SimpleNamespace]
+    units_count: int
+
+
+def _kwd_converter(db: Session, currencies: set, as_of: date):
+    rates = {c: series[0] for c, series in load_kwd_rate_series(db, currencies, as_of, as_of).items()}
+
+    def convert(amount, currency) -> int:
+        if not amount:
+            return 0
+        if not currency or currency == settings.BASE_CURRENCY:
+            return int(amount)
+        rate = rates.get(currency)
+        if rate is None or np.isnan(rate):
+            return 0
+        return int(round(amount / minor_unit(currency) * rate * minor_unit(settings.BASE_CURRENCY)))
+
+    return convert
+
+
+def _equities(db: Session, as_of: date) -> List:
+    return db.execute(text("""
+        SELECT h.id, h.country, h.sector, h.cost_basis_currency, h.cost_basis_amount,
+               COALESCE(p.currency, h.current_price_currency, h.cost_basis_currency) AS price_currency,
+               COALESCE(p.close_amount, h.current_price_amount) AS price_amount,
+               h.quantity, h.quantity - COALESCE(t.net_after, 0) AS quantity_as_of
+        FROM equity_holdings h
+        LEFT JOIN LATERAL (
+            SELECT SUM(CASE WHEN transaction_type = 'BUY' THEN quantity ELSE -quantity END)::bigint AS net_after
+            FROM equity_transactions
+            WHERE holding_id = h.id AND deleted_at IS NULL AND transaction_date > :as_of
+        ) t ON true
+        LEFT JOIN LATERAL (
+            SELECT close_amount, currency
+            FROM price_history
+            WHERE holding_id = h.id AND price_date <= :as_of
+            ORDER BY price_date DESC
+            LIMIT 1
+        ) p ON true
+        WHERE (h.deleted_at IS NULL OR h.deleted_at::date > :as_of)
+          AND (h.created_at::date <= :as_of OR EXISTS (
+              SELECT 1 FROM equity_transactions
+              WHERE holding_id = h.id AND deleted_at IS NULL AND transaction_date <= :as_of
+          ))
+    """), {"as_of": as_of}).all()
+
+
+def _fixed_income(db: Session, as_of: date) -> List:
+    return db.execute(text("""
+        SELECT id, face_value_currency, purchase_price_amount, purchase_price_currency,
+               COALESCE(current_market_value_amount, purchase_price_amount) AS value_amount,
+               COALESCE(current_market_value_currency, purchase_price_currency) AS value_currency
+        FROM fixed_income_holdings
+        WHERE (deleted_at IS NULL OR deleted_at::date > :as_of)
+          AND purchase_date <= :as_of
+          AND NOT (status = 'matured' AND COALESCE(maturity_date, updated_at::date) <= :as_of)
+          AND NOT (status IN ('sold', 'defaulted') AND updated_at::date <= :as_of)
+    """), {"as_of": as_of}).all()
+
+
+def _properties(db: Session, as_of: date) -> List:
+    # Carried at cost until the first appraisal; a hand-entered value counts as one
+    return db.execute(text("""
+        SELECT p.id, p.country, p.purchase_price_amount, p.purchase_price_currency,
+               COALESCE(v.value_amount,
+                        CASE WHEN p.last_valuation_date <= :as_of THEN p.current_value_amount END,
+                        p.purchase_price_amount) AS value_amount,
+               COALESCE(v.currency, p.current_value_currency, p.purchase_price_currency) AS value_currency
+        FROM properties p
+        LEFT JOIN LATERAL (
+            SELECT value_amount, currency
+            FROM property_valuations
+            WHERE property_id = p.id AND deleted_at IS NULL AND valuation_date <= :as_of
+            ORDER BY valuation_date DESC
+            LIMIT 1
+        ) v ON true
+        WHERE (p.deleted_at IS NULL OR p.deleted_at::date > :as_of) AND p.purchase_date <= :as_of
+    """), {"as_of": as_of}).all()
+
+
+def _funds(db: Session, as_of: date) -> List:
+    # The last reported NAV is rolled forward by calls and distributions paid since
+    return db.execute(text("""
+        SELECT f.id, f.geography, f.sector, f.committed_capital_currency,
+               COALESCE(f.current_nav_currency, f.committed_capital_currency) AS nav_currency,
+               COALESCE(c.called, 0) AS called_capital_amount,
+               COALESCE(d.received, 0) AS distributions_received,
+               v.nav_amount + COALESCE(c.called_since, 0) - COALESCE(d.received_since, 0) AS nav_amount
+        FROM private_funds f
+        LEFT JOIN LATERAL (
+            SELECT nav_amount, valuation_date
+            FROM fund_valuations
+            WHERE fund_id = f.id AND deleted_at IS NULL AND valuation_date <= :as_of
+            ORDER BY valuation_date DESC
+            LIMIT 1
+        ) v ON true
+        LEFT JOIN LATERAL (
+            SELECT SUM(amount)::bigint AS called,
+                   SUM(amount) FILTER (WHERE payment_date > v.valuation_date)::bigint AS called_since
+            FROM capital_calls
+            WHERE fund_id = f.id AND deleted_at IS NULL AND is_paid AND payment_date <= :as_of
+        ) c ON true
+        LEFT JOIN LATERAL (
+            SELECT SUM(amount)::bigint AS received,
+                   SUM(amount) FILTER (WHERE payment_date > v.valuation_date)::bigint AS received_since
+            FROM distributions
+            WHERE fund_id = f.id AND deleted_at IS NULL AND is_received AND payment_date <= :as_of
+        ) d ON true
+        WHERE (f.deleted_at IS NULL OR f.deleted_at::date > :as_of)
+          AND (f.created_at::date <= :as_of OR c.called IS NOT NULL)
+    """), {"as_of": as_of}).all()
+
+
+def _units_count(db: Session, as_of: date) -> int:
+    return db.execute(text("""
+        SELECT COUNT(*)
+        FROM units u
+        JOIN properties p ON p.id = u.property_id
+        WHERE u.created_at::date <= :as_of
+          AND (u.deleted_at IS NULL OR u.deleted_at::date > :as_of)
+          AND (p.deleted_at IS NULL OR p.deleted_at::date > :as_of)
+          AND p.purchase_date <= :as_of
+    """), {"as_of": as_of}).scalar()
+
+
+def portfolio_as_of(db: Session, as_of: date) -> PortfolioSnapshot:
+    """Holdings as they stood at the end of `as_of`, valued in KWD at that day's prices and rates.
+
+    Rows carry the same attribute names as the live models so the portfolio
+    endpoints can aggregate either. Realized gains and coupon income are not
+    tracked historically and are reported as zero.
+    """
+    equity_rows = _equities(db, as_of)
+    fi_rows = _fixed_income(db, as_of)
+    property_rows = _properties(db, as_of)
+    fund_rows = _funds(db, as_of)
+
+    currencies = {r.price_currency for r in equity_rows} | {r.cost_basis_currency for r in equity_rows}
+    currencies |= {r.value_currency for r in fi_rows} | {r.purchase_price_currency for r in fi_rows}
+    currencies |= {r.value_currency for r in property_rows} | {r.purchase_price_currency for r in property_rows}
+    currencies |= {r.nav_currency for r in fund_rows}
+    kwd = _kwd_converter(db, {c for c in currencies if c}, as_of)
+
+    equities = []
+    for r in equity_rows:
+        value = kwd((r.quantity_as_of or 0) * (r.price_amount or 0), r.price_currency)
+        # Average cost carried over to the quantity held on the day
+        cost = r.cost_basis_amount * r.quantity_as_of / r.quantity if r.quantity else 0
+        cost = kwd(int(round(cost)), r.cost_basis_currency)
+        equities.append(SimpleNamespace(
+            id=r.id,
+            country=r.country,
+            sector=r.sector,
+            current_price_currency=r.price_currency,
+            cost_basis_currency=r.cost_basis_currency,
+            quantity=r.quantity_as_of,
+            current_value_kwd=value,
+            cost_basis_amount=cost,
+            unrealized_gain_loss=value - cost,
+            realized_gain_loss=0,
+        ))
+
+    fixed_income = [
+        SimpleNamespace(
+            id=r.id,
+            face_value_currency=r.face_value_currency,
+            current_value_kwd=kwd(r.value_amount, r.value_currency),
+            purchase_price_amount=kwd(r.purchase_price_amount, r.purchase_price_currency),
+            total_interest_received=0,
+        )
+        for r in fi_rows
+    ]
+
+    properties = [
+        SimpleNamespace(
+            id=r.id,
+            country=r.country,
+            current_value_amount=kwd(r.value_amount, r.value_currency),
+            purchase_price_amount=kwd(r.purchase_price_amount, r.purchase_price_currency),
+        )
+        for r in property_rows
+    ]
+
+    # Before its first valuation a fund is carried at called capital
+    funds = [
+        SimpleNamespace(
+            id=r.id,
+            geography=r.geography,
+            sector=r.sector,
+            committed_capital_currency=r.committed_capital_currency,
+            current_nav_kwd=kwd(r.nav_amount if r.nav_amount is not None else r.called_capital_amount, r.nav_currency),
+            called_capital_amount=kwd(r.called_capital_amount, r.nav_currency),
+            distributions_received=kwd(r.distributions_received, r.nav_currency),
+        )
+        for r in fund_rows
+    ]
+
+    return PortfolioSnapshot(equities, fixed_income, properties, funds, _units_count(db, as_of))
@@ -0,0 +1,166 @@
+import enum
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.audit import AuditLog
+from app.models.base import BaseModel
+from app.utils.partitions import ensure_monthly_partitions
+
+# Keys in session.info
+BUFFER_KEY = "audit_buffer"
+USER_KEY = "audit_user_id"
+IP_KEY = "audit_ip_address"
+USER_AGENT_KEY = "audit_user_agent"
+
+REDACTED_FIELDS = {"hashed_password"}
+
+# Bookkeeping columns that never make an UPDATE worth recording on their own
+IGNORED_FIELDS = {"updated_at"}
+
+
+def set_audit_context(
+    session: Session,
+    user_id: Optional[UUID],
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> None:
+    """Attribute audit records written by this session to a user and client."""
+    session.info[USER_KEY] = user_id
+    session.info[IP_KEY] = ip_address
+    session.info[USER_AGENT_KEY] = user_agent
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _column_keys(obj: BaseModel) -> List[str]:
+    return [attr.key for attr in inspect(obj).mapper.column_attrs]
+
+
+def _snapshot(obj: BaseModel) -> Dict[str, Any]:
+    return {
+        key: "***" if key in REDACTED_FIELDS else _jsonable(getattr(obj, key))
+        for key in _column_keys(obj)
+    }
+
+
+def _diff(obj: BaseModel) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    state = inspect(obj)
+    old, new = {}, {}
+    for key in _column_keys(obj):
+        history = state.attrs[key].history
+        if not history.has_changes():
+            continue
+        before = history.deleted[0] if history.deleted else None
+        after = history.added[0] if history.added else None
+        if before == after:
+            continue
+        if key in REDACTED_FIELDS:
+            before, after = "***", "***"
+        old[key] = _jsonable(before)
+        new[key] = _jsonable(after)
+    return old, new
+
+
+def _record(session: Session, action: str, obj: BaseModel, old: Optional[dict], new: Optional[dict]) -> dict:
+    return _entry(session, action, obj.__tablename__, obj.id, old, new)
+
+
+def _entry(
+    session: Session,
+    action: str,
+    entity_type: str,
+    entity_id: UUID,
+    old: Optional[dict],
+    new: Optional[dict]
+) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": session.info.get(USER_KEY),
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "old_values": old,
+        "new_values": new,
+        "ip_address": session.info.get(IP_KEY),
+        "user_agent": session.info.get(USER_AGENT_KEY),
+    }
+
+
+def record_inserts(session: Session, entity_type: str, rows: List[Mapping[str, Any]]) -> None:
+    """Buffer CREATE records for rows written by a Core INSERT ... RETURNING, which flushes never see."""
+    records = session.info.setdefault(BUFFER_KEY, [])
+    for row in rows:
+        new = {key: _jsonable(value) for key, value in row.items()}
+        records.append(_entry(session, "CREATE", entity_type, row["id"], None, new))
+
+
+def record_updates(session: Session, entity_type: str, changes: List[Tuple[UUID, Mapping[str, Any], Mapping[str, Any]]]) -> None:
+    """Buffer UPDATE records for (id, old, new) changes written by a Core statement."""
+    records = session.info.setdefault(BUFFER_KEY, [])
+    for entity_id, old, new in changes:
+        old = {key: _jsonable(value) for key, value in old.items()}
+        new = {key: _jsonable(value) for key, value in new.items()}
+        records.append(_entry(session, "UPDATE", entity_type, entity_id, old, new))
+
+
+def _capture(session: Session, flush_context) -> None:
+    """Diff everything the flush just wrote; new/dirty/deleted still hold the pre-flush state here."""
+    records = session.info.setdefault(BUFFER_KEY, [])
+
+    for obj in session.new:
+        if isinstance(obj, BaseModel) and not isinstance(obj, AuditLog):
+            records.append(_record(session, "CREATE", obj, None, _snapshot(obj)))
+
+    for obj in session.dirty:
+        if not isinstance(obj, BaseModel) or isinstance(obj, AuditLog):
+            continue
+        old, new = _diff(obj)
+        if not set(new) - IGNORED_FIELDS:
+            continue
+        # Soft deletes are recorded as deletes
+        action = "DELETE" if old.get("deleted_at") is None and new.get("deleted_at") else "UPDATE"
+        records.append(_record(session, action, obj, old, new))
+
+    for obj in session.deleted:
+        if isinstance(obj, BaseModel) and not isinstance(obj, AuditLog):
+            records.append(_record(session, "DELETE", obj, _snapshot(obj), None))
+
+
+def _write(session: Session) -> None:
+    """Flush pending changes, then write the transaction's audit trail as multi-row INSERTs."""
+    now = datetime.utcnow()
+    # Normally a cache hit; only the first write of a new month touches the catalog
+    ensure_monthly_partitions(session, AuditLog.__tablename__, now.date(), now.date())
+    session.flush()
+    records = session.info.pop(BUFFER_KEY, None)
+    if not records:
+        return
+    for record in records:
+        record["created_at"] = now
+        record["updated_at"] = now
+    session.connection().execute(insert(AuditLog.__table__), records)
+
+
+def _discard(session: Session, previous_transaction=None) -> None:
+    session.info.pop(BUFFER_KEY, None)
+
+
+def register_audit_hooks(session_factory: sessionmaker) -> None:
+    """Record CREATE/UPDATE/DELETE of every BaseModel written through sessions of this factory."""
+    if event.contains(session_factory, "after_flush", _capture):
+        return
+    event.listen(session_factory, "after_flush", _capture)
+    event.listen(session_factory, "before_commit", _write)
+    event.listen(session_factory, "after_rollback", _discard)
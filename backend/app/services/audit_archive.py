@@ -0,0 +1,114 @@
+import gzip
+import json
+import os
+import re
+from datetime import date
+from typing import Iterator, List, Optional
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.audit import AuditLog
+from app.utils.partitions import (
+    MONTHS_AHEAD, ensure_monthly_partitions, forget_partition, list_partitions, month_start, partition_name
+)
+
+TABLE = AuditLog.__tablename__
+
+_PARTITION_MONTH = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def archive_path(month: date) -> str:
+    return os.path.join(settings.AUDIT_ARCHIVE_DIR, f"{partition_name(TABLE, month)}.jsonl.gz")
+
+
+def retention_cutoff(today: Optional[date] = None) -> date:
+    """First month still kept in the database."""
+    return month_start(today or date.today()) - relativedelta(months=settings.AUDIT_RETENTION_MONTHS)
+
+
+def _partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_MONTH.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def expired_partitions(db: Session, today: Optional[date] = None) -> List[date]:
+    cutoff = retention_cutoff(today)
+    months = (_partition_month(name) for name in list_partitions(db, TABLE))
+    return sorted(m for m in months if m and m < cutoff)
+
+
+def archive_partition(db: Session, month: date) -> int:
+    """Export one monthly partition to gzipped JSON lines, then detach and drop it.
+
+    The file is written under a temporary name and renamed once complete, so a
+    crash never leaves a truncated archive behind a dropped partition.
+    """
+    name = partition_name(TABLE, month)
+    path = archive_path(month)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    rows = db.execute(
+        text(f"SELECT row_to_json(a)::text FROM {name} a ORDER BY created_at, id"),
+        execution_options={"stream_results": True, "yield_per": 5000}
+    )
+    count = 0
+    partial = path + ".partial"
+    with gzip.open(partial, "wt", encoding="utf-8") as f:
+        for (line,) in rows:
+            f.write(line)
+            f.write("\n")
+            count += 1
+    os.replace(partial, path)
+
+    db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+    db.execute(text(f"DROP TABLE {name}"))
+    forget_partition(TABLE, name)
+    return count
+
+
+def apply_retention(db: Session, today: Optional[date] = None) -> List[dict]:
+    """Pre-create upcoming partitions and archive every month past retention. Commits per month."""
+    today = today or date.today()
+    ensure_monthly_partitions(db, TABLE, today, today + relativedelta(months=MONTHS_AHEAD))
+    db.commit()
+
+    archived = []
+    for month in expired_partitions(db, today):
+        rows = archive_partition(db, month)
+        db.commit()
+        archived.append({"month": month, "rows": rows, "path": archive_path(month)})
+    return archived
+
+
+def list_archives() -> List[date]:
+    if not os.path.isdir(settings.AUDIT_ARCHIVE_DIR):
+        return []
+    months = (
+        _partition_month(filename[:-len(".jsonl.gz")])
+        for filename in os.listdir(settings.AUDIT_ARCHIVE_DIR)
+        if filename.endswith(".jsonl.gz")
+    )
+    return sorted(m for m in months if m)
+
+
+def read_archive(
+    month: date,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    user_id: Optional[str] = None
+) -> Iterator[dict]:
+    """Stream records of an archived month, filtered on the fly."""
+    filters = {
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "user_id": user_id,
+    }
+    filters = {k: v for k, v in filters.items() if v is not None}
+    with gzip.open(archive_path(month), "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if all(record.get(k) == v for k, v in filters.items()):
+                yield record
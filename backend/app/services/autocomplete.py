@@ -0,0 +1,243 @@
+import logging
+import sys
+import threading
+from array import array
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.database import SessionLocal
+from app.models.equity import EquityHolding
+from app.models.fixed_income import FixedIncomeHolding
+from app.services.versions import BUMPED_KEY, table_versions
+
+logger = logging.getLogger(__name__)
+
+# Keys in session.info
+PENDING_KEY = "autocomplete_pending"
+PARTIAL_KEY = "autocomplete_partial"
+
+# Writes from other processes (other workers, raw SQL imports) are picked up
+# by comparing table versions at most this often
+VERSION_CHECK_SECONDS = 5.0
+
+TABLES = (EquityHolding.__tablename__, FixedIncomeHolding.__tablename__)
+
+
+class Suggestion(NamedTuple):
+    entity_type: str  # equity, fixed_income
+    id: str
+    code: Optional[str]  # Ticker or ISIN
+    name: str
+
+
+def _suggestion(obj) -> Optional[Suggestion]:
+    if obj.deleted_at is not None:
+        return None
+    if isinstance(obj, EquityHolding):
+        return Suggestion("equity", str(obj.id), obj.ticker, obj.name)
+    return Suggestion("fixed_income", str(obj.id), obj.isin, obj.name)
+
+
+def _keys(s: Suggestion) -> List[str]:
+    return sorted({k.casefold() for k in (s.code, s.name) if k})
+
+
+class PrefixIndex:
+    """Sorted array of lowercased keys searched with bisect.
+
+    Each holding is reachable by its ticker or ISIN and by its name. A parallel
+    array maps every key to the slot of its holding. Lookups and updates take a
+    lock; updates are O(n) list inserts, cheap at portfolio sizes, and keep
+    lookups to one binary search plus a short scan.
+    """
+
+    def __init__(self):
+        # Slots live in a typed array: 4 bytes each instead of a pointer and an int object
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._slots = array("I")
+        self._entries: List[Optional[Suggestion]] = []
+        self._slot_by_id: Dict[str, int] = {}
+        self.versions: Dict[str, int] = {}
+        self.built_at: Optional[datetime] = None
+        self.build_ms = 0.0
+        self.checked_at = 0.0
+
+    def load(self, suggestions: List[Suggestion], versions: Dict[str, int]) -> None:
+        pairs = sorted((k, slot) for slot, s in enumerate(suggestions) for k in _keys(s))
+        keys = [k for k, _ in pairs]
+        slots = array("I", (slot for _, slot in pairs))
+        slot_by_id = {s.id: slot for slot, s in enumerate(suggestions)}
+        with self._lock:
+            self._keys, self._slots = keys, slots
+            self._entries, self._slot_by_id = list(suggestions), slot_by_id
+            self.versions = versions
+            self.built_at = datetime.utcnow()
+            self.checked_at = time.monotonic()
+
+    def _remove(self, entity_id: str) -> None:
+        slot = self._slot_by_id.pop(entity_id, None)
+        if slot is None:
+            return
+        for key in _keys(self._entries[slot]):
+            n = bisect_left(self._keys, key)
+            while n < len(self._keys) and self._keys[n] == key:
+                if self._slots[n] == slot:
+                    del self._keys[n], self._slots[n]
+                    break
+                n += 1
+        # Slots are not reused; a rebuild compacts them
+        self._entries[slot] = None
+
+    def apply(self, changes: Dict[str, Optional[Suggestion]]) -> None:
+        """Replace or drop (None) entries by holding id."""
+        with self._lock:
+            for entity_id, suggestion in changes.items():
+                self._remove(entity_id)
+                if suggestion is None:
+                    continue
+                slot = len(self._entries)
+                self._entries.append(suggestion)
+                self._slot_by_id[entity_id] = slot
+                for key in _keys(suggestion):
+                    n = bisect_right(self._keys, key)
+                    self._keys.insert(n, key)
+                    self._slots.insert(n, slot)
+
+    def advance(self, bumped: Dict[str, int]) -> None:
+        """Take the versions a local commit, already applied here, bumped its tables to.
+
+        A version more than one past the index's means another process wrote
+        in between; it is left for the next check to rebuild.
+        """
+        with self._lock:
+            for table, version in bumped.items():
+                if table in self.versions and version == self.versions[table] + 1:
+                    self.versions[table] = version
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        prefix = prefix.casefold()
+        results, seen = [], set()
+        with self._lock:
+            n = bisect_left(self._keys, prefix)
+            while n < len(self._keys) and len(results) < limit and self._keys[n].startswith(prefix):
+                slot = self._slots[n]
+                if slot not in seen:
+                    seen.add(slot)
+                    results.append(self._entries[slot])
+                n += 1
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = [e for e in self._entries if e is not None]
+            # Arrays plus every object they own; strings shared between the
+            # key array and entries are counted once
+            size = sum(sys.getsizeof(a) for a in (self._keys, self._slots, self._entries, self._slot_by_id))
+            seen = set()
+            for obj in [*self._keys, *entries, *(part for e in entries for part in e)]:
+                if obj is not None and id(obj) not in seen:
+                    seen.add(id(obj))
+                    size += sys.getsizeof(obj)
+            return {
+                "entries": len(entries),
+                "keys": len(self._keys),
+                "memory_bytes": size,
+                "built_at": self.built_at,
+                "build_ms": round(self.build_ms, 2),
+                "versions": dict(self.versions),
+            }
+
+
+autocomplete_index = PrefixIndex()
+
+# Held while a background rebuild runs
+_rebuilding = threading.Lock()
+
+
+def build_autocomplete_index(db: Session) -> None:
+    started = time.perf_counter()
+    # Versions first, so a write landing during the load triggers another rebuild
+    versions = table_versions(db, TABLES)
+    rows = db.execute(text("""
+        SELECT 'equity', id::text, ticker, name FROM equity_holdings WHERE deleted_at IS NULL
+        UNION ALL
+        SELECT 'fixed_income', id::text, isin, name FROM fixed_income_holdings WHERE deleted_at IS NULL
+    """))
+    autocomplete_index.load([Suggestion(*r) for r in rows], versions)
+    autocomplete_index.build_ms = (time.perf_counter() - started) * 1000
+
+
+def _rebuild() -> None:
+    db = SessionLocal()
+    try:
+        build_autocomplete_index(db)
+    except Exception:
+        logger.exception("Autocomplete index rebuild failed")
+    finally:
+        db.close()
+        _rebuilding.release()
+
+
+def refresh_if_stale(db: Session) -> None:
+    """Pick up writes made outside this process by comparing table versions.
+
+    Checks at most every VERSION_CHECK_SECONDS. The first build blocks; later
+    rebuilds run in a background thread while lookups keep using the current
+    arrays.
+    """
+    if autocomplete_index.built_at is None:
+        build_autocomplete_index(db)
+        return
+    if time.monotonic() - autocomplete_index.checked_at < VERSION_CHECK_SECONDS:
+        return
+    autocomplete_index.checked_at = time.monotonic()
+    if table_versions(db, TABLES) != autocomplete_index.versions and _rebuilding.acquire(blocking=False):
+        threading.Thread(target=_rebuild, name="autocomplete-rebuild", daemon=True).start()
+
+
+def _collect(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, (EquityHolding, FixedIncomeHolding)):
+            pending[str(obj.id)] = _suggestion(obj)
+    for obj in session.deleted:
+        if isinstance(obj, (EquityHolding, FixedIncomeHolding)):
+            pending[str(obj.id)] = None
+
+
+def _apply(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(PENDING_KEY, None)
+    partial = session.info.pop(PARTIAL_KEY, False)
+    if pending:
+        autocomplete_index.apply(pending)
+    # Left by the version hooks just before commit. Holding names only change
+    # through the ORM here, so this commit is fully applied unless a savepoint
+    # of it rolled back
+    bumped = session.info.get(BUMPED_KEY)
+    if bumped and not partial:
+        autocomplete_index.advance({t: v for t, v in bumped.items() if t in TABLES})
+
+
+def _discard(session: Session, previous_transaction=None) -> None:
+    if session.in_nested_transaction():
+        # The savepoint's changes cannot be told from the rest: keep them all
+        # and let the version check rebuild the index
+        session.info[PARTIAL_KEY] = True
+        return
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(PARTIAL_KEY, None)
+
+
+def register_autocomplete_hooks(session_factory: sessionmaker) -> None:
+    """Apply committed holding changes made through sessions of this factory to the index."""
+    if event.contains(session_factory, "after_flush", _collect):
+        return
+    event.listen(session_factory, "after_flush", _collect)
+    event.listen(session_factory, "after_commit", _apply)
+    event.listen(session_factory, "after_rollback", _discard)
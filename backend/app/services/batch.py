@@ -0,0 +1,126 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+from uuid import UUID
+from pydantic import BaseModel as Schema, ValidationError
+from sqlalchemy import inspect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import ObjectDeletedError, StaleDataError
+from app.models.base import BaseModel
+from app.schemas.common import BatchItemResult, BatchResult
+from app.services.fx import MissingRateError
+
+MAX_BATCH_SIZE = 1000
+
+
+def _errors(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+def validate_items(items: List[Any], schema: Type[Schema]) -> Tuple[Dict[int, Schema], Dict[int, str]]:
+    """Validate every item on its own; returns valid items and errors, both keyed by position."""
+    valid, errors = {}, {}
+    for n, item in enumerate(items):
+        try:
+            valid[n] = schema.model_validate(item)
+        except ValidationError as exc:
+            errors[n] = _errors(exc)
+    return valid, errors
+
+
+def validate_updates(items: List[Any], schema: Type[Schema]) -> Tuple[Dict[int, Tuple[UUID, Schema]], Dict[int, str]]:
+    """Like validate_items, for update payloads that carry the target's `id` next to the fields."""
+    valid, errors = {}, {}
+    for n, item in enumerate(items):
+        if not isinstance(item, dict) or "id" not in item:
+            errors[n] = "id: Field required"
+            continue
+        try:
+            entity_id = UUID(str(item["id"]))
+        except ValueError:
+            errors[n] = "id: Input should be a valid UUID"
+            continue
+        try:
+            valid[n] = (entity_id, schema.model_validate({k: v for k, v in item.items() if k != "id"}))
+        except ValidationError as exc:
+            errors[n] = _errors(exc)
+    return valid, errors
+
+
+def _db_error(exc: DBAPIError) -> str:
+    return str(exc.orig).strip().splitlines()[0]
+
+
+def _reload_expired(db: Session, objects: Iterable[BaseModel]) -> None:
+    """Refresh loaded objects a savepoint rollback expired, one SELECT per model."""
+    expired = defaultdict(list)
+    for obj in objects:
+        state = inspect(obj)
+        if state.persistent and state.expired_attributes:
+            # From the identity key, as reading obj.id would load the row
+            expired[type(obj)].append(state.identity[0])
+    for model, ids in expired.items():
+        db.query(model).filter(model.id.in_(ids)).all()
+
+
+def write_batch(
+    db: Session,
+    build: Callable[[int], BaseModel],
+    positions: List[int],
+    errors: Dict[int, str],
+    before_commit: Optional[Callable[[List[BaseModel]], None]] = None
+) -> Dict[int, UUID]:
+    """Insert or update the objects `build` returns for each position in one flush and commit.
+
+    New objects get their ids client side and are flushed with identical column
+    sets, so the flush goes out as one multi-row INSERT per table; loaded
+    objects go out as one batched UPDATE. The audit and autocomplete hooks see
+    every row as usual. The batch is flushed under a savepoint; if the
+    database rejects it, or an amount has no KWD rate, only that savepoint is
+    rolled back and the batch is replayed item by item under savepoints so
+    only the offending items fail. Rows deleted in the meantime fail as
+    items too.
+
+    `before_commit` gets the written objects for follow-up writes that belong
+    in the same transaction.
+    """
+    objects = {}
+    try:
+        with db.begin_nested():
+            objects = {n: build(n) for n in positions}
+            db.add_all(objects.values())
+            db.flush()
+    except (DBAPIError, MissingRateError, StaleDataError):
+        # New objects were expunged with the savepoint; loaded ones expired
+        _reload_expired(db, objects.values())
+        objects = {}
+        for n in positions:
+            try:
+                with db.begin_nested():
+                    obj = build(n)
+                    db.add(obj)
+            except DBAPIError as exc:
+                errors[n] = _db_error(exc)
+            except MissingRateError as exc:
+                # Raised by the KWD conversion hook before the row reaches the database
+                errors[n] = str(exc)
+            except (ObjectDeletedError, StaleDataError):
+                errors[n] = "Not found"
+            else:
+                objects[n] = obj
+    ids = {n: obj.id for n, obj in objects.items()}
+    if before_commit and objects:
+        before_commit(list(objects.values()))
+    db.commit()
+    return ids
+
+
+def batch_result(size: int, ids: Dict[int, UUID], errors: Dict[int, str]) -> BatchResult:
+    return BatchResult(
+        succeeded=len(ids),
+        failed=len(errors),
+        results=[BatchItemResult(index=n, id=ids.get(n), error=errors.get(n)) for n in range(size)]
+    )
@@ -0,0 +1,106 @@
+from datetime import date
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.private_fund import FundValuation, PrivateFund
+from app.services.fx import MINOR_UNITS, RATE_SCALE, ensure_fx_rates_daily, minor_unit_sql
+
+# Paid calls and received distributions dated after each fund's NAV date are
+# summed in one grouped pass over the flow tables, not a lookup per fund, and
+# the estimates are converted at today's rate in the same UPDATE. Only rows
+# whose estimate moved are written, so a rerun touches nothing.
+ROLL_FORWARD_SQL = f"""
+    WITH funds AS (
+        SELECT id, nav_date, current_nav_amount, called_capital_amount,
+               COALESCE(current_nav_currency, committed_capital_currency) AS currency
+        FROM private_funds
+        WHERE deleted_at IS NULL
+          AND (CAST(:fund_ids AS uuid[]) IS NULL OR id = ANY(CAST(:fund_ids AS uuid[])))
+          AND (CAST(:currencies AS text[]) IS NULL
+               OR COALESCE(current_nav_currency, committed_capital_currency) = ANY(CAST(:currencies AS text[])))
+    ),
+    flows AS (
+        SELECT c.fund_id, c.amount AS called, 0::bigint AS received
+        FROM capital_calls c
+        JOIN funds f ON f.id = c.fund_id
+        WHERE c.deleted_at IS NULL AND c.is_paid AND c.payment_date > f.nav_date
+        UNION ALL
+        SELECT d.fund_id, 0, d.amount
+        FROM distributions d
+        JOIN funds f ON f.id = d.fund_id
+        WHERE d.deleted_at IS NULL AND d.is_received AND d.payment_date > f.nav_date
+    ),
+    estimates AS (
+        SELECT f.id, f.currency,
+               CASE WHEN f.current_nav_amount IS NOT NULL
+                    THEN f.current_nav_amount + COALESCE(SUM(fl.called), 0) - COALESCE(SUM(fl.received), 0)
+                    ELSE COALESCE(f.called_capital_amount, 0)
+               END AS nav
+        FROM funds f
+        LEFT JOIN flows fl ON fl.fund_id = f.id
+        GROUP BY f.id, f.currency, f.current_nav_amount, f.called_capital_amount
+    ),
+    converted AS (
+        SELECT e.id,
+               CASE WHEN e.currency IS NULL OR e.currency = :base THEN e.nav
+                    ELSE round(e.nav::numeric / {minor_unit_sql("e.currency")} * r.rate / :scale * :base_minor)::bigint
+               END AS nav_kwd
+        FROM estimates e
+        LEFT JOIN fx_rates_daily r ON r.from_currency = e.currency AND r.to_currency = :base AND r.rate_date = :today
+    )
+    UPDATE private_funds p
+    SET current_nav_kwd = c.nav_kwd, updated_at = now()
+    FROM converted c
+    WHERE p.id = c.id AND c.nav_kwd IS NOT NULL AND p.current_nav_kwd IS DISTINCT FROM c.nav_kwd
+"""
+
+
+def roll_forward_navs(
+    db: Session,
+    fund_ids: Optional[Iterable[UUID]] = None,
+    currencies: Optional[Iterable[str]] = None
+) -> int:
+    """Refresh current_nav_kwd of the given funds, or all of them, at today's rates.
+
+    The estimate is the last reported NAV plus calls paid less distributions
+    received since nav_date; before its first NAV a fund is carried at called
+    capital. current_nav_amount and nav_date keep the reported figure, so
+    rolling forward again never double counts. `currencies` narrows the run
+    to funds valued in them. Funds without a rate for their currency are left
+    alone. Returns how many funds changed; does not commit.
+    """
+    today = date.today()
+    ensure_fx_rates_daily(db, today)
+    return db.execute(text(ROLL_FORWARD_SQL), {
+        "fund_ids": [str(i) for i in fund_ids] if fund_ids is not None else None,
+        "currencies": list(currencies) if currencies is not None else None,
+        "base": settings.BASE_CURRENCY,
+        "base_minor": MINOR_UNITS[settings.BASE_CURRENCY],
+        "scale": RATE_SCALE,
+        "today": today,
+    }).rowcount
+
+
+def sync_fund_valuation(db: Session, fund_id: UUID) -> None:
+    """Make the latest live valuation the fund's reported NAV, then roll it forward.
+
+    A fund whose valuations were all removed keeps its last NAV.
+    """
+    latest = db.query(FundValuation).filter(
+        FundValuation.fund_id == fund_id,
+        FundValuation.deleted_at.is_(None)
+    ).order_by(FundValuation.valuation_date.desc(), FundValuation.created_at.desc()).first()
+    
+    if latest:
+        fund = db.get(PrivateFund, fund_id)
+        fund.current_nav_amount = latest.nav_amount
+        fund.current_nav_currency = latest.currency
+        fund.nav_date = latest.valuation_date
+        if latest.irr_bps is not None:
+            fund.irr_bps = latest.irr_bps
+        if latest.tvpi_bps is not None:
+            fund.tvpi_bps = latest.tvpi_bps
+        db.flush()
+    roll_forward_navs(db, [fund_id])
@@ -0,0 +1,267 @@
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rates are stored as integers with 8 decimal places
+RATE_SCALE = 100000000
+
+# Smallest-unit divisor per currency (KWD fils, everything else cents)
+MINOR_UNITS = {"KWD": 1000}
+DEFAULT_MINOR_UNIT = 100
+
+# Currencies held at a fixed rate to another; they move with their anchor
+FX_PEGS = {"AED": "USD", "SAR": "USD"}
+
+
+class MissingRateError(ValueError):
+    def __init__(self, currency: str, on: date):
+        super().__init__(f"No {settings.BASE_CURRENCY} exchange rate for {currency} on or before {on}")
+        self.currency = currency
+        self.on = on
+
+
+def minor_unit(currency: str) -> int:
+    return MINOR_UNITS.get(currency, DEFAULT_MINOR_UNIT)
+
+
+def minor_unit_sql(column: str) -> str:
+    """SQL CASE giving the smallest-unit divisor of the currency code in `column`."""
+    cases = " ".join(f"WHEN '{c}' THEN {unit}" for c, unit in MINOR_UNITS.items())
+    return f"(CASE {column} {cases} ELSE {DEFAULT_MINOR_UNIT} END)"
+
+
+def to_kwd(amount: int, currency: str, rate: float) -> int:
+    """Convert an amount in the smallest unit of `currency` to KWD fils at `rate` KWD per unit."""
+    if currency == settings.BASE_CURRENCY:
+        return amount
+    return int(round(amount / minor_unit(currency) * rate * MINOR_UNITS[settings.BASE_CURRENCY]))
+
+
+def kwd_factor_series(rates: Dict[str, np.ndarray], currency: str, days: int) -> np.ndarray:
+    """Per-day multiplier taking smallest units of `currency` to KWD fils."""
+    if currency == settings.BASE_CURRENCY:
+        return np.ones(days)
+    series = rates.get(currency)
+    if series is None:
+        return np.full(days, np.nan)
+    return series / minor_unit(currency) * MINOR_UNITS[settings.BASE_CURRENCY]
+
+
+def forward_fill(matrix: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value along axis 1; leading gaps stay NaN."""
+    observed = ~np.isnan(matrix)
+    idx = np.where(observed, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return matrix[np.arange(matrix.shape[0])[:, None], idx]
+
+
+# Dense rates run this far past today. Only writers and the daily
+# scripts/extend_fx_rates.py job extend the table; reads never do.
+FX_FORWARD_DAYS = 31
+
+# Every ordered pair on every day from start through :through. A quote, or the
+# inverse of one, is carried forward until the next; direct quotes win over
+# inverted ones on the same day. Currencies without a quote against the base
+# go through the pivot currency, and pairs never quoted directly are crossed
+# through the base.
+FX_RATES_DAILY_SQL = """
+    WITH quotes AS (
+        SELECT DISTINCT ON (from_currency, to_currency, rate_date)
+            from_currency, to_currency, rate_date, rate
+        FROM (
+            SELECT from_currency, to_currency, rate_date, rate::numeric / :scale AS rate, 0 AS inverted
+            FROM exchange_rates
+            WHERE deleted_at IS NULL AND rate > 0
+            UNION ALL
+            SELECT to_currency, from_currency, rate_date, :scale / rate::numeric, 1
+            FROM exchange_rates
+            WHERE deleted_at IS NULL AND rate > 0
+        ) q
+        ORDER BY from_currency, to_currency, rate_date, inverted
+    ),
+    quoted AS (
+        SELECT q.from_currency, q.to_currency, d::date AS rate_date, q.rate, q.rate_date AS quote_date
+        FROM (
+            SELECT *, LEAD(rate_date) OVER (PARTITION BY from_currency, to_currency ORDER BY rate_date) AS next_date
+            FROM quotes
+        ) q
+        CROSS JOIN LATERAL generate_series(
+            GREATEST(q.rate_date, CAST(:start AS date)),
+            LEAST(COALESCE(q.next_date - 1, CAST(:through AS date)), CAST(:through AS date)),
+            interval '1 day'
+        ) d
+        WHERE q.next_date IS NULL OR q.next_date > CAST(:start AS date)
+    ),
+    via_pivot AS (
+        SELECT x.from_currency, x.rate_date, x.rate * p.rate AS rate, LEAST(x.quote_date, p.quote_date) AS quote_date
+        FROM quoted x
+        JOIN quoted p ON p.from_currency = x.to_currency AND p.to_currency = :base AND p.rate_date = x.rate_date
+        WHERE x.to_currency = :pivot AND x.from_currency <> :base
+    ),
+    in_base AS (
+        SELECT CAST(:base AS varchar) AS currency, d::date AS rate_date, 1::numeric AS rate, NULL::date AS quote_date
+        FROM generate_series(CAST(:start AS date), CAST(:through AS date), interval '1 day') d
+        UNION ALL
+        SELECT COALESCE(b.from_currency, v.from_currency), COALESCE(b.rate_date, v.rate_date),
+               COALESCE(b.rate, v.rate), COALESCE(b.quote_date, v.quote_date)
+        FROM (SELECT * FROM quoted WHERE to_currency = :base) b
+        FULL JOIN via_pivot v ON v.from_currency = b.from_currency AND v.rate_date = b.rate_date
+    ),
+    crossed AS (
+        SELECT a.currency AS from_currency, c.currency AS to_currency, a.rate_date,
+               a.rate / c.rate AS rate, LEAST(a.quote_date, c.quote_date) AS quote_date
+        FROM in_base a
+        JOIN in_base c ON c.rate_date = a.rate_date AND c.currency <> a.currency
+    )
+    SELECT COALESCE(q.from_currency, x.from_currency) AS from_currency,
+           COALESCE(q.to_currency, x.to_currency) AS to_currency,
+           COALESCE(q.rate_date, x.rate_date) AS rate_date,
+           round(COALESCE(q.rate, x.rate) * :scale)::bigint AS rate,
+           COALESCE(q.quote_date, x.quote_date) AS quote_date,
+           q.rate IS NULL AS triangulated
+    FROM quoted q
+    FULL JOIN crossed x ON x.from_currency = q.from_currency AND x.to_currency = q.to_currency
+                       AND x.rate_date = q.rate_date
+"""
+
+# Last day fx_rates_daily covered when last read from the database. Only
+# committed coverage is cached, so a rollback can never leave it ahead:
+# coverage a transaction wrote itself is held in session.info until it commits.
+_fx_daily_through: Optional[date] = None
+
+# Keys in session.info
+WRITTEN_KEY = "fx_daily_written"
+PENDING_KEY = "fx_daily_through"
+
+
+def refresh_fx_rates_daily(db: Session, start: Optional[date] = None, through: Optional[date] = None) -> int:
+    """Rebuild fx_rates_daily from `start` (all history when None) onwards.
+
+    Call after exchange_rates change, with the earliest changed date: every
+    later day can carry the changed quote. Does not commit.
+    """
+    covered = db.execute(text("SELECT MAX(rate_date) FROM fx_rates_daily")).scalar()
+    through = max(d for d in (through, covered, date.today() + timedelta(days=FX_FORWARD_DAYS)) if d)
+    db.info[WRITTEN_KEY] = True
+    if start is None:
+        db.execute(text("DELETE FROM fx_rates_daily"))
+        start = db.execute(text("SELECT MIN(rate_date) FROM exchange_rates WHERE deleted_at IS NULL")).scalar()
+        if start is None:
+            return 0
+    else:
+        db.execute(text("DELETE FROM fx_rates_daily WHERE rate_date >= :start"), {"start": start})
+    db.info[PENDING_KEY] = through
+    return db.execute(text(f"""
+        INSERT INTO fx_rates_daily (from_currency, to_currency, rate_date, rate, quote_date, triangulated)
+        {FX_RATES_DAILY_SQL}
+        ON CONFLICT (from_currency, to_currency, rate_date) DO UPDATE
+        SET rate = excluded.rate, quote_date = excluded.quote_date, triangulated = excluded.triangulated
+    """), {
+        "base": settings.BASE_CURRENCY,
+        "pivot": settings.SECONDARY_CURRENCY,
+        "scale": RATE_SCALE,
+        "start": start,
+        "through": through,
+    }).rowcount
+
+
+def fx_daily_coverage(db: Session, on: Optional[date] = None) -> Optional[date]:
+    """Last day fx_rates_daily covers; the database is only read when the cache falls short of `on`."""
+    global _fx_daily_through
+    if _fx_daily_through is not None and (on is None or _fx_daily_through >= on):
+        return _fx_daily_through
+    covered = db.execute(text("SELECT MAX(rate_date) FROM fx_rates_daily")).scalar()
+    if covered is not None:
+        if db.info.get(WRITTEN_KEY):
+            db.info[PENDING_KEY] = covered
+        elif _fx_daily_through is None or covered > _fx_daily_through:
+            _fx_daily_through = covered
+    return covered
+
+
+def ensure_fx_rates_daily(db: Session, through: date) -> None:
+    """Extend fx_rates_daily to cover `through`; normally a cache hit.
+
+    For writers and the scheduled job only: the extension is a write that a
+    read-only request would roll back and repeat on every call.
+    """
+    covered = fx_daily_coverage(db, through)
+    if covered is None or covered < through:
+        refresh_fx_rates_daily(db, covered + timedelta(days=1) if covered else None, through)
+
+
+def _publish_coverage(session: Session) -> None:
+    global _fx_daily_through
+    # Also fired on releasing a savepoint, when nothing is committed yet
+    if session.in_nested_transaction():
+        return
+    session.info.pop(WRITTEN_KEY, None)
+    covered = session.info.pop(PENDING_KEY, None)
+    if covered is not None and (_fx_daily_through is None or covered > _fx_daily_through):
+        _fx_daily_through = covered
+
+
+def _discard_coverage(session: Session, previous_transaction=None) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(WRITTEN_KEY, None)
+    session.info.pop(PENDING_KEY, None)
+
+
+def register_fx_hooks(session_factory: sessionmaker) -> None:
+    """Cache fx_rates_daily coverage written by sessions of this factory once it is committed."""
+    if event.contains(session_factory, "after_commit", _publish_coverage):
+        return
+    event.listen(session_factory, "after_commit", _publish_coverage)
+    event.listen(session_factory, "after_rollback", _discard_coverage)
+
+
+def load_kwd_rate_series(db: Session, currencies: Iterable[str], start: date, end: date) -> Dict[str, np.ndarray]:
+    """Daily KWD-per-unit rates for each currency over start..end from fx_rates_daily.
+
+    NaN before a currency's first quote. Only reads: days past the table's
+    coverage carry its last day, which is what extending it would write.
+    """
+    base = settings.BASE_CURRENCY
+    currencies = sorted(set(currencies) - {base})
+    if not currencies:
+        return {}
+
+    covered = fx_daily_coverage(db, end)
+    # Read from the last covered day when the range starts past it
+    first = covered if covered is not None and covered < start else start
+    rows = db.execute(text("""
+        SELECT from_currency, rate_date, rate
+        FROM fx_rates_daily
+        WHERE to_currency = :base AND from_currency = ANY(:ccys) AND rate_date BETWEEN :first AND :end
+    """), {"first": first, "end": end, "ccys": currencies, "base": base}).all()
+
+    days = (end - first).days + 1
+    index = {c: i for i, c in enumerate(currencies)}
+    rates = np.full((len(currencies), days), np.nan)
+    for r in rows:
+        rates[index[r.from_currency], (r.rate_date - first).days] = r.rate / RATE_SCALE
+    if covered is not None and covered < end:
+        tail = (covered - first).days
+        rates[:, tail:] = forward_fill(rates[:, tail:])
+    rates = rates[:, (start - first).days:]
+
+    missing = [c for c in currencies if np.isnan(rates[index[c]]).all()]
+    if missing:
+        logger.warning("No %s exchange rates for %s up to %s", base, ", ".join(missing), end)
+    return {c: rates[index[c]] for c in currencies}
+
+
+def kwd_rates_on(db: Session, on: date) -> Dict[str, int]:
+    """Stored KWD rate of every currency on `on`, as in fx_rates_daily."""
+    rows = db.execute(text("""
+        SELECT from_currency, rate FROM fx_rates_daily
+        WHERE to_currency = :base AND rate_date = :on
+    """), {"base": settings.BASE_CURRENCY, "on": on}).all()
+    return {r.from_currency: r.rate for r in rows}
@@ -0,0 +1,180 @@
+import csv
+from datetime import date, datetime
+from typing import BinaryIO, List, NamedTuple, Optional
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models.currency import ExchangeRate
+from app.services.audit import record_inserts, record_updates
+from app.services.fx import RATE_SCALE
+from app.services.revaluation import Revaluation, apply_rate_changes
+
+REQUIRED_COLUMNS = ("from_currency", "to_currency", "rate_date", "rate")
+OPTIONAL_COLUMNS = ("source",)
+
+# Row errors beyond this are counted but not listed
+MAX_REPORTED_ERRORS = 100
+
+STAGING_TABLE = "fx_rates_staging"
+
+# Whole-file checks in one pass; casts further down only see rows passing these.
+# Dates are ISO; Postgres 15 has no pg_input_is_valid, hence the day check.
+VALIDATE_SQL = f"""
+    UPDATE {STAGING_TABLE}
+    SET error = CASE
+        WHEN from_currency IS NULL OR trim(from_currency) !~ '^[A-Za-z]{{3}}$' THEN 'Invalid from_currency'
+        WHEN to_currency IS NULL OR trim(to_currency) !~ '^[A-Za-z]{{3}}$' THEN 'Invalid to_currency'
+        WHEN upper(trim(from_currency)) = upper(trim(to_currency)) THEN 'from_currency and to_currency are the same'
+        WHEN rate_date IS NULL OR trim(rate_date) !~ '^\\d{{4}}-(0[1-9]|1[0-2])-(0[1-9]|[12]\\d|3[01])$' THEN 'Invalid rate_date, expected YYYY-MM-DD'
+        WHEN split_part(trim(rate_date), '-', 3)::int > extract(day from
+            make_date(split_part(trim(rate_date), '-', 1)::int, split_part(trim(rate_date), '-', 2)::int, 1)
+            + interval '1 month - 1 day') THEN 'Invalid rate_date, expected YYYY-MM-DD'
+        WHEN rate IS NULL OR trim(rate) !~ '^\\d*\\.?\\d+([eE][-+]?\\d+)?$' THEN 'Invalid rate'
+        WHEN CAST(trim(rate) AS numeric) <= 0 OR CAST(trim(rate) AS numeric) * :scale >= 9.2e18 THEN 'Rate out of range'
+    END
+"""
+
+# The last line wins for a pair and date repeated in the file. Stored rates
+# are only rewritten when they change; soft-deleted ones are restored.
+UPSERT_SQL = f"""
+    WITH incoming AS (
+        SELECT DISTINCT ON (from_currency, to_currency, rate_date) *
+        FROM (
+            SELECT line,
+                   upper(trim(from_currency)) AS from_currency,
+                   upper(trim(to_currency)) AS to_currency,
+                   CAST(trim(rate_date) AS date) AS rate_date,
+                   round(CAST(trim(rate) AS numeric) * :scale)::bigint AS rate,
+                   COALESCE(NULLIF(trim(source), ''), :source) AS source
+            FROM {STAGING_TABLE}
+            WHERE error IS NULL
+        ) s
+        ORDER BY from_currency, to_currency, rate_date, line DESC
+    ),
+    previous AS (
+        SELECT e.id, e.rate, e.source, e.deleted_at
+        FROM exchange_rates e
+        JOIN incoming i USING (from_currency, to_currency, rate_date)
+    ),
+    upserted AS (
+        INSERT INTO exchange_rates (id, created_at, updated_at, from_currency, to_currency, rate_date, rate, source)
+        SELECT gen_random_uuid(), :now, :now, from_currency, to_currency, rate_date, rate, source
+        FROM incoming
+        ON CONFLICT ON CONSTRAINT uq_exchange_rate DO UPDATE
+        SET rate = excluded.rate, source = excluded.source, updated_at = excluded.updated_at, deleted_at = NULL
+        WHERE exchange_rates.rate IS DISTINCT FROM excluded.rate OR exchange_rates.deleted_at IS NOT NULL
+        RETURNING *
+    )
+    SELECT u.*, p.id IS NULL AS inserted,
+           p.rate AS previous_rate, p.source AS previous_source, p.deleted_at AS previous_deleted_at
+    FROM upserted u
+    LEFT JOIN previous p ON p.id = u.id
+"""
+
+
+class FxImportFormatError(ValueError):
+    pass
+
+
+class FxRowError(NamedTuple):
+    row: int  # Line in the file, the header being line 1
+    message: str
+
+
+class FxImport(NamedTuple):
+    rows: int
+    inserted: int
+    updated: int
+    unchanged: int  # Including lines superseded by a later one for the same pair and date
+    invalid: int
+    errors: List[FxRowError]
+    start: Optional[date]  # Earliest changed rate date
+    end: Optional[date]
+    revaluation: Optional[Revaluation]
+
+
+def _columns(header: bytes) -> List[str]:
+    columns = [c.strip().lower() for c in next(csv.reader([header.decode("utf-8-sig")]), [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    unknown = [c for c in columns if c not in REQUIRED_COLUMNS + OPTIONAL_COLUMNS]
+    if missing or unknown or len(set(columns)) != len(columns):
+        raise FxImportFormatError(
+            f"Expected a header of {', '.join(REQUIRED_COLUMNS)} and optionally {', '.join(OPTIONAL_COLUMNS)}; "
+            f"got {', '.join(columns) or 'nothing'}"
+        )
+    return columns
+
+
+def load_fx_csv(db: Session, stream: BinaryIO, source: str = "import") -> FxImport:
+    """Upsert a CSV of exchange rates, one per line, then revalue what they move.
+
+    The file is streamed into a temp table with COPY, validated and merged
+    on uq_exchange_rate in set-based statements, so a decade of daily history
+    is a handful of round trips. Rates are decimal units of to_currency per
+    from_currency. Invalid lines are reported and skipped. Does not commit.
+    """
+    columns = _columns(stream.readline())
+
+    db.execute(text(f"DROP TABLE IF EXISTS {STAGING_TABLE}"))
+    db.execute(text(f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            line bigserial, from_currency text, to_currency text, rate_date text, rate text, source text, error text
+        ) ON COMMIT DROP
+    """))
+    try:
+        with db.connection().connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {STAGING_TABLE} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream)
+            rows = cursor.rowcount
+    except psycopg2.Error as e:
+        raise FxImportFormatError(f"Malformed CSV: {str(e).strip()}") from e
+
+    db.execute(text(VALIDATE_SQL), {"scale": RATE_SCALE})
+    invalid = db.execute(text(f"SELECT COUNT(*) FROM {STAGING_TABLE} WHERE error IS NOT NULL")).scalar()
+    errors = [
+        FxRowError(r.line + 1, r.error)
+        for r in db.execute(text(f"""
+            SELECT line, error FROM {STAGING_TABLE}
+            WHERE error IS NOT NULL
+            ORDER BY line
+            LIMIT {MAX_REPORTED_ERRORS}
+        """))
+    ]
+
+    changed = db.execute(text(UPSERT_SQL), {
+        "scale": RATE_SCALE,
+        "source": source,
+        "now": datetime.utcnow(),
+    }).mappings().all()
+
+    inserted = [
+        {k: v for k, v in row.items() if k in ExchangeRate.__table__.c}
+        for row in changed if row["inserted"]
+    ]
+    record_inserts(db, ExchangeRate.__tablename__, inserted)
+    record_updates(db, ExchangeRate.__tablename__, [
+        (
+            row["id"],
+            {"rate": row["previous_rate"], "source": row["previous_source"], "deleted_at": row["previous_deleted_at"]},
+            {"rate": row["rate"], "source": row["source"], "deleted_at": None},
+        )
+        for row in changed if not row["inserted"]
+    ])
+
+    start = end = revaluation = None
+    if changed:
+        start = min(row["rate_date"] for row in changed)
+        end = max(row["rate_date"] for row in changed)
+        revaluation = apply_rate_changes(db, start)
+
+    valid = rows - invalid
+    return FxImport(
+        rows=rows,
+        inserted=len(inserted),
+        updated=len(changed) - len(inserted),
+        unchanged=valid - len(changed),
+        invalid=invalid,
+        errors=errors,
+        start=start,
+        end=end,
+        revaluation=revaluation,
+    )
@@ -0,0 +1,172 @@
+from datetime import date, datetime
+from typing import Callable, List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.backfill import BackfillProgress
+from app.services.fund_nav import roll_forward_navs
+from app.services.fx import MINOR_UNITS, RATE_SCALE, ensure_fx_rates_daily, minor_unit_sql
+
+JOB = "kwd"
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+class BackfillTarget(NamedTuple):
+    table: str
+    target: str  # The *_kwd column
+    amount: str  # SQL over alias t
+    currency: str
+    on: str  # Rate date
+
+
+# The same amounts, currencies and dates the write-time conversion uses
+BACKFILL_TARGETS = (
+    BackfillTarget("equity_transactions", "total_amount_kwd", "t.total_amount", "t.price_currency", "t.transaction_date"),
+    BackfillTarget("dividends", "amount_kwd", "t.amount", "t.currency", "COALESCE(t.payment_date, t.ex_date)"),
+    BackfillTarget("capital_calls", "amount_kwd", "t.amount", "t.currency", "COALESCE(t.payment_date, t.call_date)"),
+    BackfillTarget("distributions", "amount_kwd", "t.amount", "t.currency", "COALESCE(t.payment_date, t.declaration_date)"),
+    BackfillTarget("fund_valuations", "nav_kwd", "t.nav_amount", "t.currency", "t.valuation_date"),
+    BackfillTarget(
+        "equity_holdings", "current_value_kwd", "t.quantity * t.current_price_amount",
+        "COALESCE(t.current_price_currency, t.cost_basis_currency)", "CAST(:through AS date)"
+    ),
+    BackfillTarget(
+        "fixed_income_holdings", "current_value_kwd",
+        "COALESCE(t.current_market_value_amount, t.purchase_price_amount)",
+        "CASE WHEN t.current_market_value_amount IS NULL THEN t.purchase_price_currency "
+        "ELSE COALESCE(t.current_market_value_currency, t.purchase_price_currency) END",
+        "CAST(:through AS date)"
+    ),
+)
+
+
+# Batches are primary key ranges, so both the read and the UPDATE are index
+# range scans rather than joins against an id list
+RANGE = """
+    {alias}id > COALESCE(CAST(:after AS uuid), '00000000-0000-0000-0000-000000000000')
+    AND {alias}id <= COALESCE(CAST(:upto AS uuid), 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+"""
+
+
+def _batch_end_sql(table: str) -> str:
+    """Last id of the next batch; none when fewer than a batch remain."""
+    return f"""
+        SELECT id FROM {table}
+        WHERE id > COALESCE(CAST(:after AS uuid), '00000000-0000-0000-0000-000000000000')
+        ORDER BY id
+        OFFSET :size - 1
+        LIMIT 1
+    """
+
+
+def _value_sql(target: BackfillTarget) -> str:
+    rate = f"""(
+        SELECT r.rate::numeric / :scale FROM fx_rates_daily r
+        WHERE r.from_currency = {target.currency} AND r.to_currency = :base
+          AND r.rate_date = LEAST({target.on}, CAST(:through AS date))
+    )"""
+    return f"""
+        CASE WHEN {target.currency} = :base THEN {target.amount}
+             ELSE round({target.amount}::numeric / {minor_unit_sql(target.currency)} * {rate} * :base_minor)::bigint
+        END
+    """
+
+
+def _batch_sql(target: BackfillTarget) -> str:
+    # The rate is a primary key lookup per row rather than a join: row
+    # estimates for uuid ranges are poor, and a misestimated join against
+    # the batch turns quadratic.
+    # updated_at is left alone: this corrects derived values, and the as-of
+    # reconstruction reads updated_at as the date of status changes.
+    # Amounts with no rate on or before their date keep their stored value.
+    value = _value_sql(target)
+    return f"""
+        WITH updated AS (
+            UPDATE {target.table} t
+            SET {target.target} = {value}
+            WHERE {RANGE.format(alias="t.")}
+              AND {value} IS NOT NULL AND t.{target.target} IS DISTINCT FROM {value}
+            RETURNING 1
+        )
+        SELECT COUNT(*) AS scanned,
+               COUNT(*) FILTER (WHERE amount IS NOT NULL AND value_kwd IS NULL) AS missing,
+               (SELECT COUNT(*) FROM updated) AS updated
+        FROM (
+            SELECT {target.amount} AS amount, {value} AS value_kwd
+            FROM {target.table} t
+            WHERE {RANGE.format(alias="t.")}
+        ) AS batch
+    """
+
+
+def _progress(db: Session, table: str) -> BackfillProgress:
+    progress = db.get(BackfillProgress, (JOB, table))
+    if progress is None:
+        progress = BackfillProgress(
+            job=JOB,
+            table_name=table,
+            total_rows=db.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar(),
+            rows_scanned=0,
+            rows_updated=0,
+            rows_missing_rate=0
+        )
+        db.add(progress)
+        db.commit()
+    return progress
+
+
+def backfill_status(db: Session) -> List[BackfillProgress]:
+    return db.query(BackfillProgress).filter(BackfillProgress.job == JOB).order_by(BackfillProgress.started_at).all()
+
+
+def run_kwd_backfill(
+    db: Session,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+    on_batch: Optional[Callable[[BackfillProgress], None]] = None,
+    through: Optional[date] = None
+) -> List[BackfillProgress]:
+    """Recompute every stored *_kwd value from its amount, currency and date.
+
+    Each table is walked in primary key order, one set-based UPDATE per
+    batch with rates looked up in fx_rates_daily, and the checkpoint is
+    committed with the batch. An interrupted run picks up after the last
+    committed batch; restart=True starts over. Fund NAV estimates are rolled
+    forward at the end.
+    """
+    through = through or date.today()
+    if restart:
+        db.query(BackfillProgress).filter(BackfillProgress.job == JOB).delete()
+        db.commit()
+
+    ensure_fx_rates_daily(db, through)
+    db.commit()
+    params = {
+        "base": settings.BASE_CURRENCY,
+        "scale": RATE_SCALE,
+        "base_minor": MINOR_UNITS[settings.BASE_CURRENCY],
+        "through": through,
+    }
+
+    for target in BACKFILL_TARGETS:
+        progress = _progress(db, target.table)
+        end_sql, sql = text(_batch_end_sql(target.table)), text(_batch_sql(target))
+        while progress.completed_at is None:
+            upto = db.execute(end_sql, {"after": progress.last_id, "size": batch_size}).scalar()
+            batch = db.execute(sql, {**params, "after": progress.last_id, "upto": upto}).one()
+            progress.rows_scanned += batch.scanned
+            progress.rows_updated += batch.updated
+            progress.rows_missing_rate += batch.missing
+            progress.updated_at = datetime.utcnow()
+            if upto is None:
+                progress.completed_at = progress.updated_at
+            else:
+                progress.last_id = upto
+            db.commit()
+            if on_batch:
+                on_batch(progress)
+
+    roll_forward_navs(db)
+    db.commit()
+    return backfill_status(db)
@@ -0,0 +1,146 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.models.equity import Dividend, EquityHolding, EquityTransaction
+from app.models.fixed_income import FixedIncomeHolding
+from app.models.private_fund import CapitalCall, Distribution, FundValuation
+from app.services.fx import MissingRateError, load_kwd_rate_series, to_kwd
+
+
+class Conversion(NamedTuple):
+    model: type
+    target: str  # The *_kwd column
+    sources: Tuple[str, ...]  # A change to any of these reconverts
+    amount: Callable[[Any], Optional[int]]
+    currency: Callable[[Any], Optional[str]]
+    on: Callable[[Any], Optional[date]]  # Rate date; None means today
+
+
+def _fi_value(f: FixedIncomeHolding) -> Tuple[Optional[int], Optional[str]]:
+    if f.current_market_value_amount is not None:
+        return f.current_market_value_amount, f.current_market_value_currency or f.purchase_price_currency
+    return f.purchase_price_amount, f.purchase_price_currency
+
+
+# Flows convert at the rate of the day the cash moved, or the trade/declaration
+# date until then; current values convert at today's rate
+CONVERSIONS = (
+    Conversion(
+        EquityTransaction, "total_amount_kwd", ("total_amount", "price_currency", "transaction_date"),
+        lambda t: t.total_amount, lambda t: t.price_currency, lambda t: t.transaction_date
+    ),
+    Conversion(
+        Dividend, "amount_kwd", ("amount", "currency", "ex_date", "payment_date"),
+        lambda d: d.amount, lambda d: d.currency, lambda d: d.payment_date or d.ex_date
+    ),
+    Conversion(
+        CapitalCall, "amount_kwd", ("amount", "currency", "call_date", "payment_date"),
+        lambda c: c.amount, lambda c: c.currency, lambda c: c.payment_date or c.call_date
+    ),
+    Conversion(
+        Distribution, "amount_kwd", ("amount", "currency", "declaration_date", "payment_date"),
+        lambda d: d.amount, lambda d: d.currency, lambda d: d.payment_date or d.declaration_date
+    ),
+    Conversion(
+        FundValuation, "nav_kwd", ("nav_amount", "currency", "valuation_date"),
+        lambda v: v.nav_amount, lambda v: v.currency, lambda v: v.valuation_date
+    ),
+    Conversion(
+        EquityHolding, "current_value_kwd", ("quantity", "current_price_amount", "current_price_currency"),
+        lambda h: None if h.current_price_amount is None else (h.quantity or 0) * h.current_price_amount,
+        lambda h: h.current_price_currency or h.cost_basis_currency, lambda h: None
+    ),
+    Conversion(
+        FixedIncomeHolding, "current_value_kwd",
+        ("current_market_value_amount", "current_market_value_currency", "purchase_price_amount", "purchase_price_currency"),
+        lambda f: _fi_value(f)[0], lambda f: _fi_value(f)[1], lambda f: None
+    ),
+)
+
+_BY_MODEL = {c.model: c for c in CONVERSIONS}
+
+
+def _changed(obj, sources: Tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in sources)
+
+
+def convert_to_kwd(db: Session, items: Iterable[Tuple[Optional[int], Optional[str], date]]) -> List[Optional[int]]:
+    """KWD fils for each (amount, currency, rate date), with one rate query for the lot.
+
+    None when there is no amount or currency, or no rate on or before the date.
+    """
+    items = list(items)
+    foreign = [(c, d) for a, c, d in items if a is not None and c and c != settings.BASE_CURRENCY]
+    rates = {}
+    if foreign:
+        start = min(d for _, d in foreign)
+        end = max(d for _, d in foreign)
+        rates = load_kwd_rate_series(db, {c for c, _ in foreign}, start, end)
+
+    converted = []
+    for amount, currency, on in items:
+        if amount is None or not currency:
+            converted.append(None)
+        elif currency == settings.BASE_CURRENCY:
+            converted.append(amount)
+        else:
+            rate = rates.get(currency, [np.nan])[(on - start).days]
+            converted.append(None if np.isnan(rate) else to_kwd(amount, currency, rate))
+    return converted
+
+
+def _convert(session: Session, flush_context, instances) -> None:
+    """Fill *_kwd columns of new rows and rows whose amount, currency or date changed."""
+    pending = [
+        (obj, _BY_MODEL[type(obj)])
+        for obj in list(session.new) + list(session.dirty)
+        if type(obj) in _BY_MODEL and (obj in session.new or _changed(obj, _BY_MODEL[type(obj)].sources))
+    ]
+    if not pending:
+        return
+
+    today = date.today()
+    items = [(c.amount(obj), c.currency(obj), c.on(obj) or today) for obj, c in pending]
+    with session.no_autoflush:
+        values = convert_to_kwd(session, items)
+
+    for (obj, c), (amount, currency, on), value in zip(pending, items, values):
+        if value is None and amount is not None and not c.model.__table__.c[c.target].nullable:
+            raise MissingRateError(currency, on)
+        setattr(obj, c.target, value)
+
+
+def refresh_holding_values(db: Session, holding_ids: Iterable[UUID]) -> int:
+    """Recompute current_value_kwd of equity holdings repriced by a Core UPDATE, which flushes never see."""
+    rows = db.execute(text("""
+        SELECT id, quantity, current_price_amount, COALESCE(current_price_currency, cost_basis_currency) AS currency
+        FROM equity_holdings
+        WHERE id = ANY(CAST(:ids AS uuid[]))
+    """), {"ids": [str(i) for i in holding_ids]}).all()
+    if not rows:
+        return 0
+
+    today = date.today()
+    values = convert_to_kwd(db, (
+        (None if r.current_price_amount is None else (r.quantity or 0) * r.current_price_amount, r.currency, today)
+        for r in rows
+    ))
+    return db.execute(text("""
+        UPDATE equity_holdings h
+        SET current_value_kwd = v.value_kwd
+        FROM unnest(CAST(:ids AS uuid[]), CAST(:values AS bigint[])) AS v(id, value_kwd)
+        WHERE h.id = v.id AND h.current_value_kwd IS DISTINCT FROM v.value_kwd
+    """), {"ids": [str(r.id) for r in rows], "values": values}).rowcount
+
+
+def register_kwd_hooks(session_factory: sessionmaker) -> None:
+    """Convert amounts to KWD on every ORM write made through sessions of this factory."""
+    if event.contains(session_factory, "before_flush", _convert):
+        return
+    event.listen(session_factory, "before_flush", _convert)
@@ -0,0 +1,74 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.utils.partitions import month_start
+
+# Both queries are a single range on lease_end_date served by ix_units_lease_end;
+# only occupied units have a lease that can run out
+
+EXPIRING_SQL = """
+    SELECT u.id AS unit_id, u.unit_number, u.tenant_name,
+           p.id AS property_id, p.name AS property_name,
+           u.lease_start_date, u.lease_end_date,
+           u.lease_end_date - CAST(:start AS date) AS days_remaining,
+           COALESCE(u.monthly_rent_amount, 0) AS monthly_rent_amount,
+           COALESCE(u.monthly_rent_currency, 'KWD') AS monthly_rent_currency
+    FROM units u
+    JOIN properties p ON p.id = u.property_id AND p.deleted_at IS NULL
+    WHERE u.deleted_at IS NULL
+      AND u.lease_end_date IS NOT NULL
+      AND u.lease_end_date BETWEEN :start AND :end
+      AND u.status = 'occupied'
+      AND (CAST(:property_id AS uuid) IS NULL OR u.property_id = :property_id)
+    ORDER BY u.lease_end_date, p.name, u.unit_number
+"""
+
+# Per property and month, plus the portfolio per month, in one pass
+PROFILE_SQL = """
+    WITH expiring AS (
+        SELECT p.id AS property_id, p.name AS property_name,
+               CAST(date_trunc('month', u.lease_end_date) AS date) AS month,
+               COALESCE(u.monthly_rent_currency, 'KWD') AS currency,
+               COALESCE(u.monthly_rent_amount, 0) AS monthly_rent_amount
+        FROM units u
+        JOIN properties p ON p.id = u.property_id AND p.deleted_at IS NULL
+        WHERE u.deleted_at IS NULL
+          AND u.lease_end_date IS NOT NULL
+          AND u.lease_end_date BETWEEN :start AND :end
+          AND u.status = 'occupied'
+          AND (CAST(:property_id AS uuid) IS NULL OR u.property_id = :property_id)
+    )
+    SELECT property_id, property_name, month, currency,
+           COUNT(*) AS expiring_leases,
+           SUM(monthly_rent_amount)::bigint AS monthly_rent_amount,
+           GROUPING(property_id) = 1 AS is_portfolio
+    FROM expiring
+    GROUP BY GROUPING SETS ((property_id, property_name, month, currency), (month, currency))
+    ORDER BY property_name NULLS FIRST, property_id, month, currency
+"""
+
+
+def expiring_leases(db: Session, start: date, days: int, property_id: Optional[UUID] = None) -> List[dict]:
+    """Occupied units whose lease ends within `days` days of `start`, soonest first."""
+    return db.execute(text(EXPIRING_SQL), {
+        "start": start,
+        "end": start + relativedelta(days=days),
+        "property_id": property_id,
+    }).mappings().all()
+
+
+def expiry_profile(db: Session, start: date, months: int, property_id: Optional[UUID] = None) -> List[dict]:
+    """Leases ending and their monthly rent per calendar month, from `start`'s month for `months` months.
+
+    Rows with is_portfolio set are the per-month totals over all properties.
+    Rent is summed per currency.
+    """
+    first = month_start(start)
+    return db.execute(text(PROFILE_SQL), {
+        "start": start,
+        "end": first + relativedelta(months=months, days=-1),
+        "property_id": property_id,
+    }).mappings().all()
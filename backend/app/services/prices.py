@@ -0,0 +1,201 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.equity import PriceHistory
+from app.services.kwd_conversion import refresh_holding_values
+from app.services.valuation import invalidate_nav_series
+from app.utils.partitions import ensure_monthly_partitions
+
+RECENT_WINDOW_DAYS = 400
+
+DOWNSAMPLE_INTERVALS = ("day", "week", "month")
+
+# Keys in session.info
+PENDING_KEY = "pending_prices"
+PARTIAL_KEY = "pending_prices_partial"
+
+
+class PriceCache:
+    """Recent closes per holding, kept as parallel date-ordinal / amount arrays."""
+
+    def __init__(self, window_days: int = RECENT_WINDOW_DAYS):
+        self.window_days = window_days
+        self._series: Dict[UUID, Tuple[array, array, str]] = {}
+        self._lock = threading.Lock()
+
+    def window_start(self) -> date:
+        return date.today() - timedelta(days=self.window_days)
+
+    def covers(self, start: date) -> bool:
+        return start >= self.window_start()
+
+    def get(self, db: Session, holding_id: UUID, start: date, end: date) -> Tuple[List[Tuple[date, int]], Optional[str]]:
+        with self._lock:
+            series = self._series.get(holding_id)
+        if series is None:
+            series = self._load(db, holding_id)
+        ordinals, closes, currency = series
+        lo = bisect_left(ordinals, start.toordinal())
+        hi = bisect_right(ordinals, end.toordinal())
+        return [(date.fromordinal(ordinals[i]), closes[i]) for i in range(lo, hi)], currency
+
+    def _load(self, db: Session, holding_id: UUID) -> Tuple[array, array, str]:
+        rows = db.query(
+            PriceHistory.price_date, PriceHistory.close_amount, PriceHistory.currency
+        ).filter(
+            PriceHistory.holding_id == holding_id,
+            PriceHistory.price_date >= self.window_start()
+        ).order_by(PriceHistory.price_date).all()
+
+        series = (
+            array("i", (r.price_date.toordinal() for r in rows)),
+            array("q", (r.close_amount for r in rows)),
+            rows[-1].currency if rows else None,
+        )
+        with self._lock:
+            self._series[holding_id] = series
+        return series
+
+    def apply(self, rows: List[dict]) -> None:
+        """Merge committed price points into any series already cached."""
+        cutoff = self.window_start().toordinal()
+        with self._lock:
+            for row in rows:
+                series = self._series.get(row["holding_id"])
+                if series is None:
+                    continue
+                ordinals, closes, _ = series
+                ordinal = row["price_date"].toordinal()
+                if ordinal < cutoff:
+                    continue
+                i = bisect_left(ordinals, ordinal)
+                if i < len(ordinals) and ordinals[i] == ordinal:
+                    closes[i] = row["close_amount"]
+                else:
+                    ordinals.insert(i, ordinal)
+                    closes.insert(i, row["close_amount"])
+                # Slide the window forward as new days arrive
+                drop = bisect_left(ordinals, cutoff)
+                if drop:
+                    del ordinals[:drop]
+                    del closes[:drop]
+                self._series[row["holding_id"]] = (ordinals, closes, row["currency"])
+
+    def evict(self, holding_ids) -> None:
+        """Drop cached series so the next read reloads them."""
+        with self._lock:
+            for holding_id in holding_ids:
+                self._series.pop(holding_id, None)
+
+
+price_cache = PriceCache()
+
+
+def append_prices(db: Session, rows: List[dict]) -> int:
+    """Upsert daily closes in one multi-row statement and refresh current prices."""
+    if not rows:
+        return 0
+
+    # Last write wins for duplicate (holding, date) pairs within one batch
+    deduped = {(r["holding_id"], r["price_date"]): r for r in rows}
+    rows = list(deduped.values())
+
+    start = min(r["price_date"] for r in rows)
+    end = max(r["price_date"] for r in rows)
+    ensure_monthly_partitions(db, PriceHistory.__tablename__, start, end)
+
+    stmt = insert(PriceHistory).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PriceHistory.holding_id, PriceHistory.price_date],
+        set_={
+            "close_amount": stmt.excluded.close_amount,
+            "currency": stmt.excluded.currency,
+        }
+    )
+    db.execute(stmt)
+
+    # The newest close of each touched holding is on or after the earliest
+    # appended date, so the lookup only has to scan those partitions.
+    db.execute(text("""
+        UPDATE equity_holdings h
+        SET current_price_amount = p.close_amount,
+            current_price_currency = p.currency,
+            updated_at = now()
+        FROM (
+            SELECT DISTINCT ON (holding_id) holding_id, close_amount, currency
+            FROM price_history
+            WHERE holding_id = ANY(:holding_ids) AND price_date >= :start
+            ORDER BY holding_id, price_date DESC
+        ) p
+        WHERE h.id = p.holding_id
+          AND (h.current_price_amount IS DISTINCT FROM p.close_amount
+               OR h.current_price_currency IS DISTINCT FROM p.currency)
+    """), {"holding_ids": list({r["holding_id"] for r in rows}), "start": start})
+    refresh_holding_values(db, {r["holding_id"] for r in rows})
+    invalidate_nav_series(db, start)
+
+    db.info.setdefault(PENDING_KEY, []).extend(rows)
+    return len(rows)
+
+
+def _apply_prices(session: Session) -> None:
+    # Also fired on releasing a savepoint, when nothing is committed yet
+    if session.in_nested_transaction():
+        return
+    rows = session.info.pop(PENDING_KEY, None)
+    partial = session.info.pop(PARTIAL_KEY, False)
+    if not rows:
+        return
+    if partial:
+        # Some of the rows may have been rolled back with a savepoint
+        price_cache.evict({r["holding_id"] for r in rows})
+    else:
+        price_cache.apply(rows)
+
+
+def _discard_prices(session: Session, previous_transaction=None) -> None:
+    if session.in_nested_transaction():
+        if session.info.get(PENDING_KEY):
+            session.info[PARTIAL_KEY] = True
+        return
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(PARTIAL_KEY, None)
+
+
+def register_price_cache_hooks(session_factory: sessionmaker) -> None:
+    """Merge prices appended by sessions of this factory into the cache once they are committed."""
+    if event.contains(session_factory, "after_commit", _apply_prices):
+        return
+    event.listen(session_factory, "after_commit", _apply_prices)
+    event.listen(session_factory, "after_rollback", _discard_prices)
+
+
+def get_price_series(
+    db: Session,
+    holding_id: UUID,
+    start: date,
+    end: date,
+    interval: str = "day"
+) -> Tuple[List[Tuple[date, int]], Optional[str]]:
+    """Closes between start and end, keeping the last close of each interval bucket."""
+    if interval not in DOWNSAMPLE_INTERVALS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    if interval == "day" and price_cache.covers(start):
+        return price_cache.get(db, holding_id, start, end)
+
+    rows = db.execute(text(f"""
+        SELECT DISTINCT ON (date_trunc('{interval}', price_date))
+            price_date, close_amount, currency
+        FROM price_history
+        WHERE holding_id = :holding_id AND price_date BETWEEN :start AND :end
+        ORDER BY date_trunc('{interval}', price_date), price_date DESC
+    """), {"holding_id": holding_id, "start": start, "end": end}).all()
+
+    currency = rows[-1].currency if rows else None
+    return [(r.price_date, r.close_amount) for r in rows], currency
@@ -0,0 +1,256 @@
+import hashlib
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.real_estate import PropertyMonthlyAnalytics
+from app.services.fx import kwd_factor_series, load_kwd_rate_series
+from app.services.versions import source_version
+from app.utils.partitions import month_start
+
+# Property value, area and membership feed every month, so any write to
+# these makes every cached month stale
+PROPERTY_TABLES = ("properties", "units")
+
+CM2_PER_SQM = 10000
+
+# One grouped query per metric family over the whole range, for every property
+
+RENT_SQL = """
+    SELECT u.property_id, CAST(date_trunc('month', r.period_start) AS date) AS month, r.currency,
+           SUM(r.expected_amount)::bigint AS gross_rent,
+           SUM(COALESCE(r.received_amount, 0))::bigint AS collections
+    FROM rental_income r
+    JOIN units u ON u.id = r.unit_id
+    WHERE r.deleted_at IS NULL AND r.period_start BETWEEN :start AND :end
+    GROUP BY 1, 2, 3
+"""
+
+EXPENSES_SQL = """
+    SELECT property_id, CAST(date_trunc('month', expense_date) AS date) AS month, expense_type, currency,
+           SUM(amount)::bigint AS amount
+    FROM property_expenses
+    WHERE deleted_at IS NULL AND expense_date BETWEEN :start AND :end
+    GROUP BY 1, 2, 3, 4
+"""
+
+# What else a closed month is computed from: its own rent and expense rows
+# and the rates on its last day. Fingerprinted per month, so a write only
+# makes the months it lands in stale.
+MONTH_INPUTS_SQL = """
+    WITH months AS (
+        SELECT CAST(m AS date) AS month
+        FROM generate_series(CAST(:start AS date), CAST(:end AS date), interval '1 month') AS m
+    ),
+    rent AS (
+        SELECT CAST(date_trunc('month', period_start) AS date) AS month,
+               string_agg(CAST((unit_id, expected_amount, received_amount, currency) AS text), ',' ORDER BY id) AS rows
+        FROM rental_income
+        WHERE deleted_at IS NULL AND period_start BETWEEN :start AND :last
+        GROUP BY 1
+    ),
+    expenses AS (
+        SELECT CAST(date_trunc('month', expense_date) AS date) AS month,
+               string_agg(CAST((property_id, expense_type, amount, currency) AS text), ',' ORDER BY id) AS rows
+        FROM property_expenses
+        WHERE deleted_at IS NULL AND expense_date BETWEEN :start AND :last
+        GROUP BY 1
+    ),
+    rates AS (
+        SELECT CAST(date_trunc('month', rate_date) AS date) AS month,
+               string_agg(from_currency || '=' || rate, ',' ORDER BY from_currency) AS rows
+        FROM fx_rates_daily
+        WHERE to_currency = :base AND rate_date BETWEEN :start AND :last
+          AND rate_date = CAST(date_trunc('month', rate_date) + interval '1 month - 1 day' AS date)
+        GROUP BY 1
+    )
+    SELECT m.month, md5(concat_ws('|', COALESCE(r.rows, ''), COALESCE(e.rows, ''), COALESCE(x.rows, ''))) AS digest
+    FROM months m
+    LEFT JOIN rent r ON r.month = m.month
+    LEFT JOIN expenses e ON e.month = m.month
+    LEFT JOIN rates x ON x.month = m.month
+"""
+
+PROPERTIES_SQL = """
+    SELECT p.id, p.name, p.purchase_date,
+           COALESCE(p.current_value_amount, p.purchase_price_amount) AS value_amount,
+           COALESCE(p.current_value_currency, p.purchase_price_currency, 'KWD') AS value_currency,
+           COALESCE(NULLIF(SUM(u.area_sqm), 0), p.total_area_sqm)::bigint AS area_sqm
+    FROM properties p
+    LEFT JOIN units u ON u.property_id = p.id AND u.deleted_at IS NULL
+    WHERE p.deleted_at IS NULL
+    GROUP BY p.id
+"""
+
+
+def _months(start: date, end: date) -> List[date]:
+    months, month = [], month_start(start)
+    while month <= end:
+        months.append(month)
+        month += relativedelta(months=1)
+    return months
+
+
+def _bps(numerator: int, denominator: Optional[int]) -> Optional[int]:
+    return int(round(numerator * 10000 / denominator)) if denominator else None
+
+
+def compute_analytics(db: Session, start: date, end: date) -> List[dict]:
+    """Monthly P&L for every live property from `start`'s month through `end`'s, in KWD fils.
+
+    Amounts are converted at each month's closing rate (today's for the
+    current month). Yields are annualised from the month on current value.
+    """
+    months = _months(start, end)
+    if not months:
+        return []
+    first, last = months[0], months[-1] + relativedelta(months=1, days=-1)
+    params = {"start": first, "end": last}
+    rent = db.execute(text(RENT_SQL), params).all()
+    expenses = db.execute(text(EXPENSES_SQL), params).all()
+    properties = db.execute(text(PROPERTIES_SQL)).all()
+
+    currencies = {r.currency for r in rent} | {e.currency for e in expenses} | {p.value_currency for p in properties}
+    close = min(last, date.today())
+    days = (close - first).days + 1
+    rates = load_kwd_rate_series(db, {c for c in currencies if c}, first, close)
+    factors = {c: kwd_factor_series(rates, c, days) for c in currencies if c}
+
+    def kwd(amount: int, currency: str, month: date) -> Optional[int]:
+        """None when there is no rate for the currency by the month's close."""
+        if not amount:
+            return 0
+        t = min((month + relativedelta(months=1, days=-1) - first).days, days - 1)
+        factor = factors.get(currency or "KWD", np.ones(days))[t]
+        return None if np.isnan(factor) else int(round(amount * factor))
+
+    totals: Dict[Tuple[UUID, date], dict] = defaultdict(lambda: {
+        "gross_rent": 0, "collections": 0, "expenses": 0, "expenses_by_type": defaultdict(int), "missing_rate": 0
+    })
+    for r in rent:
+        entry = totals[(r.property_id, r.month)]
+        gross_rent, collections = kwd(r.gross_rent, r.currency, r.month), kwd(r.collections, r.currency, r.month)
+        if gross_rent is None or collections is None:
+            entry["missing_rate"] += 1
+            continue
+        entry["gross_rent"] += gross_rent
+        entry["collections"] += collections
+    for e in expenses:
+        amount = kwd(e.amount, e.currency, e.month)
+        entry = totals[(e.property_id, e.month)]
+        if amount is None:
+            entry["missing_rate"] += 1
+            continue
+        entry["expenses"] += amount
+        entry["expenses_by_type"][e.expense_type] += amount
+
+    rows = []
+    for p in properties:
+        for month in months:
+            if month < month_start(p.purchase_date):
+                continue
+            entry = totals.get((p.id, month)) or totals.default_factory()
+            value = kwd(p.value_amount, p.value_currency, month)
+            missing_rate = entry["missing_rate"] + (value is None)
+            value = value or None
+            noi = entry["gross_rent"] - entry["expenses"]
+            rows.append({
+                "property_id": p.id,
+                "property_name": p.name,
+                "month": month,
+                "gross_rent": entry["gross_rent"],
+                "collections": entry["collections"],
+                "expenses": entry["expenses"],
+                "expenses_by_type": dict(entry["expenses_by_type"]),
+                "noi": noi,
+                "property_value": value,
+                "area_sqm": p.area_sqm,
+                "gross_yield_bps": _bps(entry["gross_rent"] * 12, value),
+                "net_yield_bps": _bps(noi * 12, value),
+                "expenses_per_sqm": int(round(entry["expenses"] * CM2_PER_SQM / p.area_sqm)) if p.area_sqm else None,
+                "missing_rate": missing_rate,
+            })
+    return rows
+
+
+def month_versions(db: Session, months: List[date]) -> Dict[date, str]:
+    """Fingerprint per month of everything its cached P&L was computed from."""
+    if not months:
+        return {}
+    version = source_version(db, PROPERTY_TABLES)
+    digests = db.execute(text(MONTH_INPUTS_SQL), {
+        "start": months[0],
+        "end": months[-1],
+        "last": months[-1] + relativedelta(months=1, days=-1),
+        "base": settings.BASE_CURRENCY,
+    }).all()
+    return {
+        d.month: hashlib.blake2b(f"{version}|{d.digest}".encode(), digest_size=16).hexdigest()
+        for d in digests
+    }
+
+
+def _store(db: Session, rows: List[dict], versions: Dict[date, str]) -> None:
+    if not rows:
+        return
+    now = datetime.utcnow()
+    values = [
+        {
+            **{k: v for k, v in row.items() if k != "property_name"},
+            "source_version": versions[row["month"]],
+            "computed_at": now,
+        }
+        for row in rows
+    ]
+    stmt = insert(PropertyMonthlyAnalytics)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[PropertyMonthlyAnalytics.property_id, PropertyMonthlyAnalytics.month],
+        set_={c: stmt.excluded[c] for c in values[0] if c not in ("property_id", "month")}
+    ), values)
+
+
+def get_analytics(db: Session, start: date, end: date, property_id: Optional[UUID] = None) -> Tuple[List[dict], bool]:
+    """Monthly property P&L between `start` and `end`; closed months come from the cache.
+
+    A closed month is recomputed, for all properties at once, when it was
+    never stored or anything it is computed from changed since: its own rent,
+    expenses or closing rates, or any property or unit. The current month is
+    always computed live. Second item tells if everything came from cache.
+    Does not commit.
+    """
+    current = month_start(date.today())
+    months = [m for m in _months(start, end) if m <= current]
+    closed = [m for m in months if m < current]
+    versions = month_versions(db, closed)
+
+    cached = []
+    if closed:
+        cached = db.execute(text("""
+            SELECT a.*, p.name AS property_name
+            FROM property_monthly_analytics a
+            JOIN properties p ON p.id = a.property_id AND p.deleted_at IS NULL
+            WHERE a.month BETWEEN :start AND :end
+        """), {"start": closed[0], "end": closed[-1]}).mappings().all()
+    cached = [row for row in cached if row["source_version"] == versions[row["month"]]]
+    cached_months = {row["month"] for row in cached}
+    rows = [dict(row) for row in cached]
+
+    stale = [m for m in closed if m not in cached_months]
+    if stale:
+        computed = compute_analytics(db, stale[0], stale[-1])
+        computed = [row for row in computed if row["month"] not in cached_months]
+        _store(db, computed, versions)
+        rows.extend(computed)
+    if months and months[-1] == current:
+        rows.extend(compute_analytics(db, current, current))
+
+    if property_id:
+        rows = [row for row in rows if row["property_id"] == property_id]
+    rows.sort(key=lambda row: (row["property_name"], row["month"]))
+    return rows, not stale and current not in months
@@ -0,0 +1,58 @@
+from typing import List
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models.real_estate import Property, PropertyValuation
+
+# DISTINCT ON reads ix_property_valuations_latest in order and keeps the
+# first entry per property; the previous valuation is one more probe into the
+# same index
+LATEST_VALUATIONS_SQL = """
+    SELECT p.id AS property_id, p.name AS property_name, p.country,
+           p.purchase_price_amount, p.purchase_price_currency, p.purchase_date,
+           v.id AS valuation_id, v.valuation_date, v.value_amount, v.currency,
+           prev.valuation_date AS previous_valuation_date,
+           prev.value_amount AS previous_value_amount,
+           prev.currency AS previous_currency
+    FROM (
+        SELECT DISTINCT ON (property_id) id, property_id, valuation_date, created_at, value_amount, currency
+        FROM property_valuations
+        WHERE deleted_at IS NULL
+        ORDER BY property_id, valuation_date DESC, created_at DESC
+    ) v
+    JOIN properties p ON p.id = v.property_id AND p.deleted_at IS NULL
+    LEFT JOIN LATERAL (
+        SELECT valuation_date, value_amount, currency
+        FROM property_valuations
+        WHERE property_id = v.property_id
+          AND deleted_at IS NULL
+          AND (valuation_date, created_at) < (v.valuation_date, v.created_at)
+        ORDER BY valuation_date DESC, created_at DESC
+        LIMIT 1
+    ) prev ON true
+    ORDER BY p.name
+"""
+
+
+def latest_valuations(db: Session) -> List[dict]:
+    """Most recent live valuation of every property, with the one before it."""
+    return db.execute(text(LATEST_VALUATIONS_SQL)).mappings().all()
+
+
+def sync_property_valuation(db: Session, property_id: UUID) -> None:
+    """Copy the latest live valuation onto the property's current value.
+
+    A property whose valuations were all removed keeps its last value.
+    """
+    latest = db.query(PropertyValuation).filter(
+        PropertyValuation.property_id == property_id,
+        PropertyValuation.deleted_at.is_(None)
+    ).order_by(PropertyValuation.valuation_date.desc(), PropertyValuation.created_at.desc()).first()
+    
+    if not latest:
+        return
+    
+    prop = db.get(Property, property_id)
+    prop.current_value_amount = latest.value_amount
+    prop.current_value_currency = latest.currency
+    prop.last_valuation_date = latest.valuation_date
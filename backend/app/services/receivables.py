@@ -0,0 +1,109 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Open items are billed periods not marked collected with something still
+# unpaid. Days past due count from period_end; items not yet past it age as 0-30.
+OPEN_ITEMS_SQL = """
+    SELECT p.id AS property_id, p.name AS property_name,
+           u.id AS unit_id, u.unit_number, u.tenant_name,
+           r.currency,
+           r.expected_amount - COALESCE(r.received_amount, 0) AS outstanding,
+           CAST(:as_of AS date) - r.period_end AS days_past_due
+    FROM rental_income r
+    JOIN units u ON u.id = r.unit_id AND u.deleted_at IS NULL
+    JOIN properties p ON p.id = u.property_id AND p.deleted_at IS NULL
+    WHERE r.deleted_at IS NULL
+      AND r.is_collected IS NOT TRUE
+      AND r.period_start <= :as_of
+      AND r.expected_amount > COALESCE(r.received_amount, 0)
+      AND (CAST(:property_id AS uuid) IS NULL OR p.id = :property_id)
+"""
+
+# Every level comes out of one pass over the open items; GROUPING() tells the
+# levels apart and the window over the grouped rows gives each row's share of
+# its level's total, per currency
+AGING_SQL = f"""
+    WITH open_items AS ({OPEN_ITEMS_SQL})
+    SELECT CASE
+               WHEN GROUPING(unit_id) = 0 THEN 'unit'
+               WHEN GROUPING(property_id) = 0 THEN 'property'
+               WHEN GROUPING(tenant_name) = 0 THEN 'tenant'
+               ELSE 'total'
+           END AS level,
+           property_id, property_name, unit_id, unit_number, tenant_name, currency,
+           COALESCE(SUM(outstanding) FILTER (WHERE days_past_due <= 30), 0)::bigint AS days_0_30,
+           COALESCE(SUM(outstanding) FILTER (WHERE days_past_due BETWEEN 31 AND 60), 0)::bigint AS days_31_60,
+           COALESCE(SUM(outstanding) FILTER (WHERE days_past_due BETWEEN 61 AND 90), 0)::bigint AS days_61_90,
+           COALESCE(SUM(outstanding) FILTER (WHERE days_past_due > 90), 0)::bigint AS days_over_90,
+           SUM(outstanding)::bigint AS total_outstanding,
+           COUNT(*) AS open_periods,
+           GREATEST(MAX(days_past_due), 0) AS oldest_days_past_due,
+           ROUND(10000 * SUM(outstanding) / SUM(SUM(outstanding)) OVER (
+               PARTITION BY GROUPING(property_id, unit_id, tenant_name), currency
+           ))::int AS share_bps
+    FROM open_items
+    GROUP BY GROUPING SETS (
+        (currency, property_id, property_name, unit_id, unit_number, tenant_name),
+        (currency, property_id, property_name),
+        (currency, tenant_name),
+        (currency)
+    )
+    ORDER BY level, currency, total_outstanding DESC
+"""
+
+OCCUPANCY_SQL = """
+    WITH unit_totals AS (
+        SELECT property_id,
+               COUNT(*) AS total_units,
+               COUNT(*) FILTER (WHERE status = 'occupied') AS occupied_units,
+               COUNT(*) FILTER (WHERE status = 'vacant') AS vacant_units,
+               COALESCE(SUM(monthly_rent_amount) FILTER (WHERE status = 'occupied'), 0)::bigint AS total_monthly_rent
+        FROM units
+        WHERE deleted_at IS NULL
+        GROUP BY property_id
+    ),
+    income_totals AS (
+        SELECT u.property_id,
+               COALESCE(SUM(r.received_amount) FILTER (
+                   WHERE r.period_start <= :as_of AND r.period_end >= :month_start
+               ), 0)::bigint AS total_collected,
+               COALESCE(SUM(r.expected_amount - COALESCE(r.received_amount, 0)) FILTER (
+                   WHERE r.is_collected IS NOT TRUE
+                     AND r.period_start <= :as_of
+                     AND r.expected_amount > COALESCE(r.received_amount, 0)
+               ), 0)::bigint AS total_outstanding
+        FROM rental_income r
+        JOIN units u ON u.id = r.unit_id AND u.deleted_at IS NULL
+        WHERE r.deleted_at IS NULL
+        GROUP BY u.property_id
+    )
+    SELECT p.id AS property_id, p.name AS property_name,
+           COALESCE(t.total_units, 0) AS total_units,
+           COALESCE(t.occupied_units, 0) AS occupied_units,
+           COALESCE(t.vacant_units, 0) AS vacant_units,
+           COALESCE(t.total_monthly_rent, 0) AS total_monthly_rent,
+           COALESCE(i.total_collected, 0) AS total_collected,
+           COALESCE(i.total_outstanding, 0) AS total_outstanding
+    FROM properties p
+    LEFT JOIN unit_totals t ON t.property_id = p.id
+    LEFT JOIN income_totals i ON i.property_id = p.id
+    WHERE p.deleted_at IS NULL
+    ORDER BY p.name
+"""
+
+
+def receivables_aging(db: Session, as_of: date, property_id: Optional[UUID] = None) -> List[dict]:
+    """Outstanding rent in 0-30/31-60/61-90/90+ day buckets per unit, property, tenant and overall.
+
+    Amounts stay in each row's rent currency; every level is split by currency.
+    """
+    return db.execute(text(AGING_SQL), {"as_of": as_of, "property_id": property_id}).mappings().all()
+
+
+def occupancy(db: Session, as_of: date) -> List[dict]:
+    """Per property unit counts and rent; collected is what was received for
+    the month of `as_of` and outstanding is every open rental income item."""
+    return db.execute(text(OCCUPANCY_SQL), {"as_of": as_of, "month_start": as_of.replace(day=1)}).mappings().all()
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+from uuid import UUID
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.models.real_estate import RentalIncome
+from app.services.audit import record_inserts
+from app.utils.partitions import month_start
+
+# Occupied live units whose lease overlaps the period; a missing lease date
+# is treated as open ended. The partial unique index on (unit_id, period_start)
+# is the conflict arbiter, so rows already recorded for the period (generated
+# or entered by hand) are skipped.
+RENT_ROLL_SQL = """
+    WITH eligible AS (
+        SELECT u.id, u.monthly_rent_amount, u.monthly_rent_currency
+        FROM units u
+        JOIN properties p ON p.id = u.property_id AND p.deleted_at IS NULL
+        WHERE u.deleted_at IS NULL
+          AND u.status = 'occupied'
+          AND u.monthly_rent_amount > 0
+          AND (u.lease_start_date IS NULL OR u.lease_start_date <= :period_end)
+          AND (u.lease_end_date IS NULL OR u.lease_end_date >= :period_start)
+          AND (CAST(:property_id AS uuid) IS NULL OR u.property_id = :property_id)
+    ),
+    inserted AS (
+        INSERT INTO rental_income (
+            id, created_at, updated_at, unit_id, period_start, period_end,
+            expected_amount, received_amount, currency, is_collected
+        )
+        SELECT gen_random_uuid(), :now, :now, e.id, :period_start, :period_end,
+               e.monthly_rent_amount, 0, COALESCE(e.monthly_rent_currency, 'KWD'), false
+        FROM eligible e
+        ON CONFLICT (unit_id, period_start) WHERE deleted_at IS NULL DO NOTHING
+        RETURNING *
+    )
+    SELECT i.*, t.eligible
+    FROM (SELECT COUNT(*) AS eligible FROM eligible) t
+    LEFT JOIN inserted i ON true
+"""
+
+
+class RentRoll(NamedTuple):
+    period_start: date
+    period_end: date
+    eligible: int
+    created: int
+    skipped: int
+
+
+def generate_rent_roll(db: Session, month: date, property_id: Optional[UUID] = None) -> RentRoll:
+    """Create the month's expected rent for every occupied unit with an active lease.
+
+    One INSERT ... SELECT over units, safe to rerun: units that already have a
+    row for the period are counted as skipped. Does not commit.
+    """
+    period_start = month_start(month)
+    period_end = period_start + relativedelta(months=1, days=-1)
+    rows = db.execute(text(RENT_ROLL_SQL), {
+        "period_start": period_start,
+        "period_end": period_end,
+        "property_id": property_id,
+        "now": datetime.utcnow(),
+    }).mappings().all()
+    
+    eligible = rows[0]["eligible"]
+    created = [{k: v for k, v in row.items() if k != "eligible"} for row in rows if row["id"] is not None]
+    record_inserts(db, RentalIncome.__tablename__, created)
+    return RentRoll(period_start, period_end, eligible, len(created), eligible - len(created))
@@ -0,0 +1,335 @@
+import calendar
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.portfolio import PortfolioReturn, PortfolioReturnState
+from app.services.fx import forward_fill, kwd_factor_series, load_kwd_rate_series
+from app.services.valuation import ASSET_CLASSES, ValueMatrix, build_value_matrix, inception_date
+
+PERIODS = ("MTD", "QTD", "YTD", "ITD")
+
+NEWTON_ITERATIONS = 50
+
+# State rows per INSERT, well inside the 65535 bind parameter limit
+STATE_INSERT_ROWS = 5000
+
+
+def period_start(period: str, as_of: date, inception: date) -> date:
+    if period == "MTD":
+        start = as_of.replace(day=1)
+    elif period == "QTD":
+        start = date(as_of.year, 3 * ((as_of.month - 1) // 3) + 1, 1)
+    elif period == "YTD":
+        start = date(as_of.year, 1, 1)
+    else:
+        start = inception
+    return max(start, inception)
+
+
+def is_period_close(as_of: date) -> bool:
+    """Month ends in the past are closed and their returns can be cached."""
+    return as_of < date.today() and as_of.day == calendar.monthrange(as_of.year, as_of.month)[1]
+
+
+def _external_flows(db: Session, m: ValueMatrix) -> np.ndarray:
+    """Recorded external flows in KWD fils per position and day; inflows to the position are positive."""
+    rows = db.execute(text("""
+        SELECT 'equities' AS asset_class, holding_id AS entity_id, transaction_date AS flow_date,
+               CASE WHEN transaction_type = 'BUY' THEN total_amount ELSE -total_amount END AS amount,
+               price_currency AS currency
+        FROM equity_transactions
+        WHERE deleted_at IS NULL AND transaction_date BETWEEN :start AND :end
+        UNION ALL
+        SELECT 'equities', holding_id, COALESCE(payment_date, ex_date), -amount, currency
+        FROM dividends
+        WHERE deleted_at IS NULL AND COALESCE(payment_date, ex_date) BETWEEN :start AND :end
+        UNION ALL
+        SELECT 'private_funds', fund_id, payment_date, amount, currency
+        FROM capital_calls
+        WHERE deleted_at IS NULL AND is_paid AND payment_date BETWEEN :start AND :end
+        UNION ALL
+        SELECT 'private_funds', fund_id, payment_date, -amount, currency
+        FROM distributions
+        WHERE deleted_at IS NULL AND is_received AND payment_date BETWEEN :start AND :end
+        UNION ALL
+        SELECT 'real_estate', u.property_id, r.payment_date, -r.received_amount, r.currency
+        FROM rental_income r
+        JOIN units u ON u.id = r.unit_id
+        WHERE r.deleted_at IS NULL AND r.received_amount > 0 AND r.payment_date BETWEEN :start AND :end
+    """), {"start": m.start, "end": m.end}).all()
+
+    flows = np.zeros((len(m.keys), m.days))
+    if not rows:
+        return flows
+    row = {key: n for n, key in enumerate(m.keys)}
+    rates = load_kwd_rate_series(db, {r.currency for r in rows if r.currency}, m.start, m.end)
+    factors = {c: kwd_factor_series(rates, c, m.days) for c in {r.currency for r in rows if r.currency}}
+    for r in rows:
+        n = row.get((r.asset_class, r.entity_id))
+        if n is None or not r.currency:
+            continue
+        t = m.day_index(r.flow_date)
+        flows[n, t] += r.amount * np.nan_to_num(factors[r.currency][t])
+    return flows
+
+
+def _aggregate(m: ValueMatrix, values: np.ndarray, flows: np.ndarray) -> Tuple[List[Tuple[str, str, Optional[str]]], np.ndarray, np.ndarray]:
+    """Stack holdings, asset-class totals and the portfolio total into one matrix."""
+    classes = m.asset_classes
+    groups = [(ac, classes == ac) for ac in ASSET_CLASSES]
+    grouping = np.vstack([mask for _, mask in groups] + [np.ones(len(classes), dtype=bool)]).astype(float)
+
+    entities = [("holding", str(entity_id), ac) for ac, entity_id in m.keys]
+    entities += [("asset_class", ac, ac) for ac, _ in groups]
+    entities.append(("portfolio", "portfolio", None))
+    return entities, np.vstack([values, grouping @ values]), np.vstack([flows, grouping @ flows])
+
+
+def _modified_dietz(values: np.ndarray, flows: np.ndarray, base: int, end: int) -> np.ndarray:
+    period_flows = flows[:, base + 1:end + 1]
+    length = end - base
+    # Flows land at the start of their day, so they are weighted for the rest of the period
+    weights = (end - np.arange(base + 1, end + 1) + 1) / length
+    gain = values[:, end] - values[:, base] - period_flows.sum(axis=1)
+    capital = values[:, base] + period_flows @ weights
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(capital > 0, gain / capital, np.nan)
+
+
+def _daily_log_returns(values: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """Cumulative log growth per day; inflows at the start of the day, outflows at the end."""
+    previous = np.zeros(values.shape)
+    previous[:, 1:] = values[:, :-1]
+    gain = values - previous - flows
+    capital = previous + np.maximum(flows, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = np.where(capital > 0, gain / capital, 0.0)
+    return np.cumsum(np.log1p(np.maximum(daily, -0.999999)), axis=1)
+
+
+def _money_weighted(values: np.ndarray, flows: np.ndarray, base: int, end: int, guess: np.ndarray) -> np.ndarray:
+    """Period IRR for every row at once by vectorised Newton iteration on a daily rate."""
+    # Investor cash flows: pay the opening value and every inflow, receive the closing value
+    cash = -flows[:, base:end + 1].copy()
+    cash[:, 0] = -values[:, base]
+    cash[:, -1] += values[:, end]
+    t = np.arange(end - base + 1)
+    length = max(end - base, 1)
+
+    # Keep (1 + rate) ** -t finite over long periods
+    lower, upper = np.expm1(-600 / length), min(np.expm1(600 / length), 10.0)
+    rate = np.clip(np.nan_to_num(guess) / length, lower, upper)
+    invested = (cash < 0).any(axis=1)
+    for _ in range(NEWTON_ITERATIONS):
+        discount = (1 + rate[:, None]) ** -t
+        npv = (cash * discount).sum(axis=1)
+        slope = (-t * cash * discount / (1 + rate[:, None])).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(slope != 0, npv / slope, 0.0)
+        rate = np.clip(rate - step, lower, upper)
+        if np.all(np.abs(step) < 1e-12):
+            break
+    # Rows whose NPV never reached zero inside the bounds have no IRR
+    residual = np.abs((cash * (1 + rate[:, None]) ** -t).sum(axis=1))
+    converged = residual <= 1e-6 * np.maximum(np.abs(cash).sum(axis=1), 1)
+    with np.errstate(over="ignore", invalid="ignore"):
+        period = (1 + rate) ** length - 1
+    return np.where(invested & converged & np.isfinite(period), period, np.nan)
+
+
+# Largest value the INTEGER bps columns can hold
+MAX_BPS = 2 ** 31 - 1
+
+
+def _bps(value: float) -> Optional[int]:
+    if not np.isfinite(value) or abs(value * 10000) > MAX_BPS:
+        return None
+    return int(round(value * 10000))
+
+
+def last_closed_month_end(as_of: date) -> date:
+    """Latest closed month end on or before as_of."""
+    return as_of if is_period_close(as_of) else as_of.replace(day=1) - timedelta(days=1)
+
+
+def _state_checkpoint(db: Session, eve: date, as_of: date) -> date:
+    """Latest stored month end after the eve of inception and on or before as_of; the eve when none is."""
+    checkpoint = db.execute(text("""
+        SELECT MAX(state_date)
+        FROM portfolio_return_state
+        WHERE entity_type = 'portfolio' AND state_date > :eve AND state_date <= :as_of
+          AND EXTRACT(DAY FROM state_date + 1) = 1
+    """), {"eve": eve, "as_of": as_of}).scalar()
+    return checkpoint or eve
+
+
+def _load_state(db: Session, eve: date, checkpoint: date) -> list:
+    return db.execute(text("""
+        SELECT state_date, entity_type, entity_key, asset_class, value, flow, growth
+        FROM portfolio_return_state
+        WHERE state_date > :eve AND state_date <= :checkpoint
+    """), {"eve": eve, "checkpoint": checkpoint}).all()
+
+
+def _store_state(
+    db: Session,
+    entities: List[Tuple[str, str, Optional[str]]],
+    eve: date,
+    values: np.ndarray,
+    flows: np.ndarray,
+    growth: np.ndarray,
+    first: int,
+    last: int
+) -> None:
+    """Persist days first..last: every entity on month ends, entities with a flow on other days."""
+    closing = np.array([(eve + timedelta(days=t + 1)).day == 1 for t in range(values.shape[1])])
+    keep = (flows != 0) | closing
+    keep[:, :first] = False
+    keep[:, last + 1:] = False
+    rows = [
+        {
+            "state_date": eve + timedelta(days=int(t)),
+            "entity_type": entities[n][0],
+            "entity_key": entities[n][1],
+            "asset_class": entities[n][2],
+            "value": float(values[n, t]),
+            "flow": float(flows[n, t]),
+            "growth": float(growth[n, t]),
+        }
+        for n, t in zip(*np.nonzero(keep))
+    ]
+    for i in range(0, len(rows), STATE_INSERT_ROWS):
+        db.execute(insert(PortfolioReturnState).values(rows[i:i + STATE_INSERT_ROWS]).on_conflict_do_nothing())
+
+
+def compute_returns(db: Session, as_of: date) -> List[dict]:
+    """TWR (Modified Dietz and daily-linked) and MWR for every holding, asset class and the total.
+
+    Only the days after the last stored month end are valued; earlier values,
+    flows and growth come from portfolio_return_state, which is extended here
+    through the last closed month end.
+    """
+    inception = inception_date(db)
+    if inception is None or inception > as_of:
+        return []
+
+    # Day 0 is the eve of inception so every period has an opening value
+    eve = inception - timedelta(days=1)
+    checkpoint = _state_checkpoint(db, eve, as_of)
+    m = build_value_matrix(db, checkpoint, as_of)
+    entities, tail_values, tail_flows = _aggregate(m, m.values, m.flows + _external_flows(db, m))
+    # Flows on the checkpoint itself are already stored
+    tail_flows[:, 0] = 0
+    tail_growth = _daily_log_returns(tail_values, tail_flows)
+
+    # Positions that left the book before the checkpoint only have stored rows
+    stored = _load_state(db, eve, checkpoint)
+    valued = len(entities)
+    known = {(entity_type, entity_key) for entity_type, entity_key, _ in entities}
+    for r in stored:
+        if (r.entity_type, r.entity_key) not in known:
+            known.add((r.entity_type, r.entity_key))
+            entities.append((r.entity_type, r.entity_key, r.asset_class))
+    row = {(entity_type, entity_key): n for n, (entity_type, entity_key, _) in enumerate(entities)}
+
+    days = (as_of - eve).days + 1
+    first = (checkpoint - eve).days
+    values = np.zeros((len(entities), days))
+    flows = np.zeros((len(entities), days))
+    growth = np.full((len(entities), days), np.nan)
+    growth[:, 0] = 0
+    for r in stored:
+        n, t = row[(r.entity_type, r.entity_key)], (r.state_date - eve).days
+        values[n, t], flows[n, t], growth[n, t] = r.value, r.flow, r.growth
+    # Growth only moves while a position holds value, and it has a row on every such month end
+    growth = forward_fill(growth)
+    values[:valued, first:] = tail_values
+    flows[:valued, first + 1:] = tail_flows[:, 1:]
+    growth[:valued, first + 1:] = growth[:valued, first:first + 1] + tail_growth[:, 1:]
+
+    closed = (last_closed_month_end(as_of) - eve).days
+    if closed > first:
+        _store_state(db, entities[:valued], eve, values[:valued], flows[:valued], growth[:valued], first + 1, closed)
+
+    end = days - 1
+    results: Dict[Tuple[str, str], dict] = {}
+    for period in PERIODS:
+        start = period_start(period, as_of, inception)
+        base = (start - eve).days - 1
+        dietz = _modified_dietz(values, flows, base, end)
+        linked = np.expm1(growth[:, end] - growth[:, base])
+        mwr = _money_weighted(values, flows, base, end, dietz)
+        for n, (entity_type, entity_key, asset_class) in enumerate(entities):
+            entry = results.setdefault((entity_type, entity_key), {
+                "entity_type": entity_type,
+                "entity_key": entity_key,
+                "asset_class": asset_class,
+                "periods": [],
+            })
+            entry["periods"].append({
+                "period": period,
+                "start_date": start,
+                "end_date": as_of,
+                "twr_dietz_bps": _bps(dietz[n]),
+                "twr_daily_bps": _bps(linked[n]),
+                "mwr_bps": _bps(mwr[n]),
+            })
+    return list(results.values())
+
+
+def _load_cached(db: Session, as_of: date) -> List[dict]:
+    rows = db.query(PortfolioReturn).filter(PortfolioReturn.as_of_date == as_of).all()
+    results: Dict[Tuple[str, str], dict] = {}
+    for r in sorted(rows, key=lambda r: PERIODS.index(r.period)):
+        entry = results.setdefault((r.entity_type, r.entity_key), {
+            "entity_type": r.entity_type,
+            "entity_key": r.entity_key,
+            "asset_class": r.asset_class,
+            "periods": [],
+        })
+        entry["periods"].append({
+            "period": r.period,
+            "start_date": r.period_start,
+            "end_date": as_of,
+            "twr_dietz_bps": r.twr_dietz_bps,
+            "twr_daily_bps": r.twr_daily_bps,
+            "mwr_bps": r.mwr_bps,
+        })
+    return list(results.values())
+
+
+def _store(db: Session, as_of: date, results: List[dict]) -> None:
+    rows = [
+        {
+            "as_of_date": as_of,
+            "entity_type": entry["entity_type"],
+            "entity_key": entry["entity_key"],
+            "asset_class": entry["asset_class"],
+            "period": p["period"],
+            "period_start": p["start_date"],
+            "twr_dietz_bps": p["twr_dietz_bps"],
+            "twr_daily_bps": p["twr_daily_bps"],
+            "mwr_bps": p["mwr_bps"],
+        }
+        for entry in results
+        for p in entry["periods"]
+    ]
+    if rows:
+        db.execute(insert(PortfolioReturn).values(rows).on_conflict_do_nothing())
+
+
+def get_returns(db: Session, as_of: date) -> Tuple[List[dict], bool]:
+    """Returns as of a date, served from cache for closed month ends. Second item tells if cached."""
+    closed = is_period_close(as_of)
+    if closed:
+        cached = _load_cached(db, as_of)
+        if cached:
+            return cached, True
+
+    results = compute_returns(db, as_of)
+    if closed:
+        _store(db, as_of, results)
+    return results, False
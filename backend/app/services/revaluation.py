@@ -0,0 +1,77 @@
+from datetime import date
+from typing import Iterable, List, NamedTuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.equity import EquityHolding
+from app.models.fixed_income import FixedIncomeHolding
+from app.services.fund_nav import roll_forward_navs
+from app.services.fx import MINOR_UNITS, RATE_SCALE, ensure_fx_rates_daily, kwd_rates_on, minor_unit_sql, refresh_fx_rates_daily
+from app.services.kwd_backfill import BACKFILL_TARGETS, BackfillTarget
+from app.services.valuation import invalidate_nav_series
+
+# Current values, as opposed to flows, which keep the rate of their own date
+CURRENT_VALUE_TARGETS = tuple(
+    t for t in BACKFILL_TARGETS if t.table in (EquityHolding.__tablename__, FixedIncomeHolding.__tablename__)
+)
+
+
+class Revaluation(NamedTuple):
+    currencies: List[str]  # Whose rate today moved
+    equities: int  # Rows changed per table
+    fixed_income: int
+    private_funds: int
+
+
+def _revalue_sql(target: BackfillTarget) -> str:
+    value = f"round({target.amount}::numeric / {minor_unit_sql(target.currency)} * r.rate / :scale * :base_minor)::bigint"
+    return f"""
+        UPDATE {target.table} t
+        SET {target.target} = {value}
+        FROM fx_rates_daily r
+        WHERE {target.currency} = ANY(:currencies)
+          AND r.from_currency = {target.currency} AND r.to_currency = :base AND r.rate_date = CAST(:through AS date)
+          AND {target.amount} IS NOT NULL
+          AND t.{target.target} IS DISTINCT FROM {value}
+    """
+
+
+def revalue_current_values(db: Session, currencies: Iterable[str]) -> Revaluation:
+    """Convert current values held in `currencies` again at today's rate.
+
+    One UPDATE per table joined to fx_rates_daily; rows in other currencies
+    or already at the right value are not written. Does not commit.
+    """
+    currencies = sorted(set(currencies) - {settings.BASE_CURRENCY})
+    if not currencies:
+        return Revaluation([], 0, 0, 0)
+
+    today = date.today()
+    ensure_fx_rates_daily(db, today)
+    params = {
+        "currencies": currencies,
+        "base": settings.BASE_CURRENCY,
+        "base_minor": MINOR_UNITS[settings.BASE_CURRENCY],
+        "scale": RATE_SCALE,
+        "through": today,
+    }
+    equities, fixed_income = (db.execute(text(_revalue_sql(t)), params).rowcount for t in CURRENT_VALUE_TARGETS)
+    return Revaluation(currencies, equities, fixed_income, roll_forward_navs(db, currencies=currencies))
+
+
+def apply_rate_changes(db: Session, start: date) -> Revaluation:
+    """Follow exchange_rates changed from `start` on through to everything derived from them.
+
+    Rebuilds fx_rates_daily from `start`, revalues current values in the
+    currencies whose rate today moved, including those triangulated through
+    a changed leg, and drops cached NAV from `start`. Does not commit.
+    """
+    today = date.today()
+    ensure_fx_rates_daily(db, today)
+    before = kwd_rates_on(db, today)
+    refresh_fx_rates_daily(db, start)
+    after = kwd_rates_on(db, today)
+    invalidate_nav_series(db, start)
+
+    moved = {c for c in before.keys() | after.keys() if before.get(c) != after.get(c)}
+    return revalue_current_values(db, moved)
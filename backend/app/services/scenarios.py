@@ -0,0 +1,137 @@
+from datetime import date
+from typing import Dict, List, NamedTuple
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.fx import FX_PEGS, kwd_factor_series, load_kwd_rate_series
+from app.services.valuation import ASSET_CLASSES
+
+# Asset classes a price shock applies to; private funds take the NAV shock
+PRICED_CLASSES = ("equities", "fixed_income", "real_estate")
+
+# Every live position with its local value and currency. Fund NAVs are
+# already rolled forward in KWD; before its first NAV a fund counts at
+# called capital.
+POSITIONS_SQL = """
+    SELECT 'equities' AS asset_class,
+           COALESCE(current_price_currency, cost_basis_currency) AS currency,
+           quantity * COALESCE(current_price_amount, 0) AS amount,
+           NULL::bigint AS amount_kwd
+    FROM equity_holdings
+    WHERE deleted_at IS NULL
+    UNION ALL
+    SELECT 'fixed_income',
+           COALESCE(current_market_value_currency, purchase_price_currency),
+           COALESCE(current_market_value_amount, purchase_price_amount),
+           NULL
+    FROM fixed_income_holdings
+    WHERE deleted_at IS NULL
+    UNION ALL
+    SELECT 'real_estate',
+           COALESCE(current_value_currency, purchase_price_currency),
+           COALESCE(current_value_amount, purchase_price_amount),
+           NULL
+    FROM properties
+    WHERE deleted_at IS NULL
+    UNION ALL
+    SELECT 'private_funds',
+           COALESCE(current_nav_currency, committed_capital_currency),
+           called_capital_amount,
+           current_nav_kwd
+    FROM private_funds
+    WHERE deleted_at IS NULL
+"""
+
+
+class Scenario(NamedTuple):
+    name: str
+    fx_shocks_bps: Dict[str, int]  # Change in a currency's KWD value
+    price_shocks_bps: Dict[str, int]  # By asset class in PRICED_CLASSES
+    nav_shock_bps: int
+
+
+class Positions(NamedTuple):
+    """The book as parallel arrays: one entry per holding, values in KWD fils at today's rates."""
+    asset_class: np.ndarray  # Index into ASSET_CLASSES
+    currency: np.ndarray  # Index into currencies
+    value_kwd: np.ndarray
+    currencies: List[str]
+
+
+class ScenarioResult(NamedTuple):
+    currencies: List[str]
+    base_by_class: np.ndarray  # (asset classes,)
+    base_by_currency: np.ndarray  # (currencies,)
+    pnl_by_class: np.ndarray  # (scenarios, asset classes)
+    pnl_by_currency: np.ndarray  # (scenarios, currencies)
+
+
+def load_positions(db: Session, as_of: date) -> Positions:
+    rows = db.execute(text(POSITIONS_SQL)).all()
+    if not rows:
+        return Positions(np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0), [])
+    classes, codes, amounts, stated = zip(*rows)
+
+    index: Dict[str, int] = {}
+    currency = np.fromiter((index.setdefault(c or settings.BASE_CURRENCY, len(index)) for c in codes), dtype=int, count=len(rows))
+    currencies = sorted(index)
+    currency = np.array([currencies.index(c) for c in index])[currency]
+    rates = load_kwd_rate_series(db, currencies, as_of, as_of)
+    factors = np.nan_to_num(np.array([kwd_factor_series(rates, c, 1)[0] for c in currencies]))
+
+    # None becomes NaN on the way into a float array
+    amount = np.nan_to_num(np.array(amounts, dtype=float))
+    stated = np.array(stated, dtype=float)
+    value_kwd = np.where(np.isnan(stated), amount * factors[currency], stated)
+
+    class_index = {c: i for i, c in enumerate(ASSET_CLASSES)}
+    asset_class = np.fromiter((class_index[c] for c in classes), dtype=int, count=len(rows))
+    return Positions(asset_class, currency, value_kwd, currencies)
+
+
+def _shock_matrices(scenarios: List[Scenario], currencies: List[str]) -> tuple:
+    """Value multipliers per scenario: (scenarios, currencies) for FX, (scenarios, asset classes) for prices.
+
+    A pegged currency follows its anchor's shock unless the scenario shocks
+    it directly, which models a de-peg.
+    """
+    fx = np.ones((len(scenarios), len(currencies)))
+    prices = np.ones((len(scenarios), len(ASSET_CLASSES)))
+    for s, scenario in enumerate(scenarios):
+        for c, code in enumerate(currencies):
+            bps = scenario.fx_shocks_bps.get(code)
+            if bps is None and code in FX_PEGS:
+                bps = scenario.fx_shocks_bps.get(FX_PEGS[code])
+            if bps and code != settings.BASE_CURRENCY:
+                fx[s, c] += bps / 10000
+        for a, asset_class in enumerate(ASSET_CLASSES):
+            bps = scenario.nav_shock_bps if asset_class == "private_funds" else scenario.price_shocks_bps.get(asset_class, 0)
+            prices[s, a] += bps / 10000
+    return fx, prices
+
+
+def revalue(positions: Positions, scenarios: List[Scenario]) -> ScenarioResult:
+    """Revalue the book under every scenario at once.
+
+    A shock depends only on a holding's asset class and currency, so
+    holdings are first summed into an (asset class, currency) grid. All
+    scenarios are then one broadcast over (scenarios, classes, currencies),
+    however many holdings there are:
+
+        pnl[s, a, c] = base[a, c] * (price[s, a] * fx[s, c] - 1)
+    """
+    classes, n_ccy = len(ASSET_CLASSES), len(positions.currencies)
+    cell = positions.asset_class * n_ccy + positions.currency
+    base = np.bincount(cell, weights=positions.value_kwd, minlength=classes * n_ccy).reshape(classes, n_ccy)
+
+    fx, prices = _shock_matrices(scenarios, positions.currencies)
+    pnl = base * (prices[:, :, None] * fx[:, None, :] - 1)
+
+    return ScenarioResult(
+        currencies=positions.currencies,
+        base_by_class=base.sum(axis=1),
+        base_by_currency=base.sum(axis=0),
+        pnl_by_class=pnl.sum(axis=2),
+        pnl_by_currency=pnl.sum(axis=1),
+    )
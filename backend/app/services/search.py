@@ -0,0 +1,105 @@
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Word-similarity cut-off for typo matches; pg_trgm's default of 0.6 misses single transpositions
+SIMILARITY_THRESHOLD = 0.4
+
+# (entity_type, table, title column, subtitle column, parent column, searched columns)
+SEARCHABLE = (
+    ("equity", "equity_holdings", "ticker", "name", None, ("ticker", "name")),
+    ("fixed_income", "fixed_income_holdings", "name", "COALESCE(isin, issuer)", None, ("name", "isin", "issuer")),
+    ("property", "properties", "name", "city", None, ("name", "city")),
+    ("unit", "units", "unit_number", "tenant_name", "property_id", ("tenant_name", "unit_number")),
+    ("private_fund", "private_funds", "name", "fund_manager", None, ("name", "fund_manager")),
+)
+
+
+# Shortest term a trigram index can look up as a substring; shorter terms
+# only match at the start of a value
+MIN_SUBSTRING_LENGTH = 3
+
+# Exact matches rank above prefix matches, above other substring matches;
+# within each, shorter values first
+MATCH_SCORE = "({c} ILIKE :exact)::int * 2 + ({c} ILIKE :prefix)::int + 1.0 / (1 + length({c}))"
+
+# Only looked for when nothing matches as typed
+TYPO_SCORE = "word_similarity(:q, {c})"
+
+
+def _column_branch(table: str, column: str, typos: bool) -> str:
+    # The filter is exactly what the column's partial trigram index answers,
+    # and the sort leaves no early exit that would make scanning the table
+    # look cheaper
+    match, score = (f":q <% {column}", TYPO_SCORE) if typos else (f"{column} ILIKE :pattern", MATCH_SCORE)
+    return f"""(
+        SELECT id, {score.format(c=column)} AS score
+        FROM {table}
+        WHERE deleted_at IS NULL AND {match}
+        ORDER BY score DESC
+        LIMIT :limit
+    )"""
+
+
+def _branch(entity_type: str, table: str, title: str, subtitle: str, parent, columns, typos: bool) -> str:
+    # A row scores its best column. Every row of the entity's top `limit` is
+    # within the top `limit` of its best column, so ranking each column on
+    # its own and merging loses nothing.
+    columns_sql = " UNION ALL ".join(_column_branch(table, c, typos) for c in columns)
+    return f"""(
+        SELECT '{entity_type}' AS entity_type, t.id, {parent or 'NULL::uuid'} AS parent_id,
+               {title} AS title, {subtitle} AS subtitle, best.score
+        FROM (
+            SELECT id, MAX(score) AS score
+            FROM ({columns_sql}) matches
+            GROUP BY id
+            ORDER BY score DESC
+            LIMIT :limit
+        ) best
+        JOIN {table} t ON t.id = best.id
+    )"""
+
+
+def _search_sql(typos: bool):
+    return text(
+        " UNION ALL ".join(_branch(*entity, typos) for entity in SEARCHABLE)
+        + " ORDER BY score DESC, title LIMIT :limit"
+    )
+
+
+MATCH_SQL = _search_sql(typos=False)
+TYPO_SQL = _search_sql(typos=True)
+
+
+def _like_escape(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search(db: Session, q: str, limit: int = 20) -> List:
+    """Ranked matches across holdings, properties, units and funds.
+
+    Each searched column contributes its best `limit` matches, found through
+    its trigram index, and each entity its best `limit` of those, so the
+    ranking is exact. Typo-tolerant matches are only searched for when the
+    term matches nothing as typed.
+    """
+    q = q.strip()
+    if not q:
+        return []
+    escaped = _like_escape(q)
+    params = {
+        "q": q,
+        "exact": escaped,
+        "prefix": f"{escaped}%",
+        "pattern": f"%{escaped}%" if len(q) >= MIN_SUBSTRING_LENGTH else f"{escaped}%",
+        "limit": limit,
+    }
+    rows = db.execute(MATCH_SQL, params).all()
+    if rows or len(q) < MIN_SUBSTRING_LENGTH:
+        return rows
+    # Transaction-local, so pooled connections keep the server default
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(SIMILARITY_THRESHOLD)}
+    )
+    return db.execute(TYPO_SQL, params).all()
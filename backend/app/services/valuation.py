@@ -0,0 +1,369 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.portfolio import PortfolioNav, PortfolioReturn, PortfolioReturnState
+from app.services.fx import kwd_factor_series, forward_fill, load_kwd_rate_series
+
+ASSET_CLASSES = ("equities", "fixed_income", "real_estate", "private_funds")
+
+
+class ValueMatrix:
+    """Daily KWD values per position: values[i, t] is position keys[i] on dates[t].
+
+    `flows` holds the implied external flows of positions entering or leaving the
+    book without a transaction record (opening balances, maturities, deletions).
+    """
+
+    def __init__(self, start: date, end: date):
+        self.start = start
+        self.end = end
+        self.days = (end - start).days + 1
+        self.keys: List[Tuple[str, UUID]] = []
+        self.blocks: List[np.ndarray] = []
+        self.flow_blocks: List[np.ndarray] = []
+
+    @property
+    def dates(self) -> List[date]:
+        return [self.start + timedelta(days=t) for t in range(self.days)]
+
+    @property
+    def values(self) -> np.ndarray:
+        if not self.blocks:
+            return np.zeros((0, self.days))
+        return np.vstack(self.blocks)
+
+    @property
+    def flows(self) -> np.ndarray:
+        if not self.flow_blocks:
+            return np.zeros((0, self.days))
+        return np.vstack(self.flow_blocks)
+
+    @property
+    def asset_classes(self) -> np.ndarray:
+        return np.array([k[0] for k in self.keys])
+
+    def add(self, asset_class: str, ids: List[UUID], values: np.ndarray, flows: Optional[np.ndarray] = None) -> None:
+        self.keys.extend((asset_class, i) for i in ids)
+        self.blocks.append(np.nan_to_num(values))
+        self.flow_blocks.append(np.zeros(values.shape) if flows is None else np.nan_to_num(flows))
+
+    def day_index(self, d: date) -> int:
+        return (d - self.start).days
+
+    def active_mask(self, starts: List[Optional[date]], ends: List[Optional[date]]) -> np.ndarray:
+        """Boolean (n, days) mask of start <= day < end per position."""
+        t = np.arange(self.days)
+        lo = np.array([self.day_index(s) if s else -1 for s in starts])
+        hi = np.array([self.day_index(e) if e else self.days for e in ends])
+        return (t >= lo[:, None]) & (t < hi[:, None])
+
+    @staticmethod
+    def boundary_flows(
+        values: np.ndarray,
+        active: np.ndarray,
+        entry_values: Optional[np.ndarray] = None,
+        entries: bool = True
+    ) -> np.ndarray:
+        """Inflow of the opening value when a position appears, outflow of its last value when it leaves."""
+        previous = np.zeros(active.shape, dtype=bool)
+        previous[:, 1:] = active[:, :-1]
+        flows = np.zeros(values.shape)
+        if entries:
+            entering = active & ~previous
+            flows[entering] = (values if entry_values is None else entry_values)[entering]
+        leaving = ~active & previous
+        prior_values = np.zeros(values.shape)
+        prior_values[:, 1:] = values[:, :-1]
+        flows[leaving] = -prior_values[leaving]
+        return flows
+
+    def by_asset_class(self) -> Dict[str, np.ndarray]:
+        values = self.values
+        classes = self.asset_classes
+        return {
+            ac: values[classes == ac].sum(axis=0) if len(classes) else np.zeros(self.days)
+            for ac in ASSET_CLASSES
+        }
+
+
+def _step_matrix(m: ValueMatrix, ids: List[UUID], points: List[Tuple[UUID, date, float]]) -> np.ndarray:
+    """Forward-filled (n, days) matrix from (id, date, value) observations; earlier dates seed day 0."""
+    row = {i: n for n, i in enumerate(ids)}
+    matrix = np.full((len(ids), m.days), np.nan)
+    for entity_id, d, value in sorted(points, key=lambda p: p[1]):
+        if d > m.end:
+            continue
+        matrix[row[entity_id], max(m.day_index(d), 0)] = value
+    return forward_fill(matrix)
+
+
+def _equity_values(db: Session, m: ValueMatrix) -> None:
+    holdings = db.execute(text("""
+        SELECT h.id, h.quantity, h.current_price_amount,
+               COALESCE(h.current_price_currency, h.cost_basis_currency) AS currency,
+               LEAST(h.created_at::date, MIN(t.transaction_date)) AS inception,
+               h.deleted_at::date AS deleted
+        FROM equity_holdings h
+        LEFT JOIN equity_transactions t ON t.holding_id = h.id AND t.deleted_at IS NULL
+        WHERE h.deleted_at IS NULL OR h.deleted_at::date > :start
+        GROUP BY h.id
+    """), {"start": m.start}).all()
+    if not holdings:
+        return
+    ids = [h.id for h in holdings]
+    row = {i: n for n, i in enumerate(ids)}
+
+    # Quantity on day t is today's quantity minus everything traded after t
+    net = db.execute(text("""
+        SELECT holding_id, transaction_date,
+               SUM(CASE WHEN transaction_type = 'BUY' THEN quantity ELSE -quantity END)::bigint AS net
+        FROM equity_transactions
+        WHERE deleted_at IS NULL AND holding_id = ANY(:ids) AND transaction_date >= :start
+        GROUP BY holding_id, transaction_date
+    """), {"ids": ids, "start": m.start}).all()
+    delta = np.zeros((len(ids), m.days))
+    after = np.zeros(len(ids))
+    for r in net:
+        after[row[r.holding_id]] += r.net
+        if r.transaction_date <= m.end:
+            delta[row[r.holding_id], m.day_index(r.transaction_date)] += r.net
+    current = np.array([h.quantity or 0 for h in holdings], dtype=float)
+    quantity = current[:, None] - (after[:, None] - np.cumsum(delta, axis=1))
+
+    prices = db.execute(text("""
+        SELECT holding_id, price_date, close_amount
+        FROM price_history
+        WHERE holding_id = ANY(:ids) AND price_date BETWEEN :start AND :end
+        UNION ALL
+        SELECT * FROM (
+            SELECT DISTINCT ON (holding_id) holding_id, price_date, close_amount
+            FROM price_history
+            WHERE holding_id = ANY(:ids) AND price_date < :start
+            ORDER BY holding_id, price_date DESC
+        ) opening
+    """), {"ids": ids, "start": m.start, "end": m.end}).all()
+    close = _step_matrix(m, ids, [(p.holding_id, p.price_date, p.close_amount) for p in prices])
+    # Holdings without any history are carried at their live price
+    live = np.array([h.current_price_amount if h.current_price_amount is not None else np.nan for h in holdings])
+    close = np.where(np.isnan(close), live[:, None], close)
+
+    rates = load_kwd_rate_series(db, {h.currency for h in holdings}, m.start, m.end)
+    fx = np.vstack([kwd_factor_series(rates, h.currency, m.days) for h in holdings])
+    active = m.active_mask([h.inception for h in holdings], [h.deleted for h in holdings])
+    values = np.where(active, quantity * close * fx, 0)
+    # Only the opening quantity not explained by that day's trades is an implied flow
+    opening = (quantity - delta) * close * fx
+    # A position without a price or rate yet enters the books once it can be valued
+    priced = active & ~np.isnan(values)
+    m.add("equities", ids, values, m.boundary_flows(np.nan_to_num(values), priced, np.nan_to_num(opening)))
+
+
+def _fixed_income_values(db: Session, m: ValueMatrix) -> None:
+    holdings = db.execute(text("""
+        SELECT id,
+               COALESCE(current_market_value_amount, purchase_price_amount) AS amount,
+               COALESCE(current_market_value_currency, purchase_price_currency) AS currency,
+               purchase_date,
+               CASE
+                   WHEN status = 'matured' THEN COALESCE(maturity_date, updated_at::date)
+                   WHEN status IN ('sold', 'defaulted') THEN updated_at::date
+               END AS exit_date,
+               deleted_at::date AS deleted
+        FROM fixed_income_holdings
+        WHERE (deleted_at IS NULL OR deleted_at::date > :start) AND purchase_date <= :end
+    """), {"start": m.start, "end": m.end}).all()
+    if not holdings:
+        return
+    rates = load_kwd_rate_series(db, {h.currency for h in holdings}, m.start, m.end)
+    amount = np.array([h.amount or 0 for h in holdings], dtype=float)
+    fx = np.vstack([kwd_factor_series(rates, h.currency, m.days) for h in holdings])
+    ends = [min(d for d in (h.exit_date, h.deleted) if d) if (h.exit_date or h.deleted) else None for h in holdings]
+    active = m.active_mask([h.purchase_date for h in holdings], ends)
+    values = np.nan_to_num(np.where(active, amount[:, None] * fx, 0))
+    m.add("fixed_income", [h.id for h in holdings], values, m.boundary_flows(values, active))
+
+
+def _real_estate_values(db: Session, m: ValueMatrix) -> None:
+    properties = db.execute(text("""
+        SELECT id, purchase_price_amount, purchase_date,
+               COALESCE(current_value_currency, purchase_price_currency) AS currency,
+               current_value_amount, last_valuation_date,
+               deleted_at::date AS deleted
+        FROM properties
+        WHERE (deleted_at IS NULL OR deleted_at::date > :start) AND purchase_date <= :end
+    """), {"start": m.start, "end": m.end}).all()
+    if not properties:
+        return
+    ids = [p.id for p in properties]
+
+    valuations = db.execute(text("""
+        SELECT property_id, valuation_date, value_amount
+        FROM property_valuations
+        WHERE deleted_at IS NULL AND property_id = ANY(:ids) AND valuation_date <= :end
+    """), {"ids": ids, "end": m.end}).all()
+    points = [(v.property_id, v.valuation_date, v.value_amount) for v in valuations]
+    valued = {v.property_id for v in valuations}
+    for p in properties:
+        # Carried at cost until the first appraisal; hand-entered values count as one
+        points.append((p.id, p.purchase_date, p.purchase_price_amount))
+        if p.id not in valued and p.current_value_amount is not None and p.last_valuation_date:
+            points.append((p.id, p.last_valuation_date, p.current_value_amount))
+    value = _step_matrix(m, ids, points)
+
+    rates = load_kwd_rate_series(db, {p.currency for p in properties}, m.start, m.end)
+    fx = np.vstack([kwd_factor_series(rates, p.currency, m.days) for p in properties])
+    active = m.active_mask([p.purchase_date for p in properties], [p.deleted for p in properties])
+    values = np.nan_to_num(np.where(active, value * fx, 0))
+    m.add("real_estate", ids, values, m.boundary_flows(values, active))
+
+
+def _private_fund_values(db: Session, m: ValueMatrix) -> None:
+    funds = db.execute(text("""
+        SELECT id, COALESCE(current_nav_currency, committed_capital_currency) AS currency,
+               created_at::date AS created, deleted_at::date AS deleted
+        FROM private_funds
+        WHERE deleted_at IS NULL OR deleted_at::date > :start
+    """), {"start": m.start}).all()
+    if not funds:
+        return
+    ids = [f.id for f in funds]
+    row = {i: n for n, i in enumerate(ids)}
+
+    # Flows are assumed to be in the fund's NAV currency
+    flows = db.execute(text("""
+        SELECT fund_id, payment_date AS flow_date, amount
+        FROM capital_calls
+        WHERE deleted_at IS NULL AND is_paid AND fund_id = ANY(:ids) AND payment_date <= :end
+        UNION ALL
+        SELECT fund_id, payment_date, -amount
+        FROM distributions
+        WHERE deleted_at IS NULL AND is_received AND fund_id = ANY(:ids) AND payment_date <= :end
+    """), {"ids": ids, "end": m.end}).all()
+    called = np.zeros((len(ids), m.days))
+    net_flow = np.zeros((len(ids), m.days))
+    flow_history: Dict[UUID, List[Tuple[date, int]]] = {i: [] for i in ids}
+    for f in flows:
+        t = max(m.day_index(f.flow_date), 0)
+        net_flow[row[f.fund_id], t] += f.amount
+        if f.amount > 0:
+            called[row[f.fund_id], t] += f.amount
+        flow_history[f.fund_id].append((f.flow_date, f.amount))
+    called = np.cumsum(called, axis=1)
+    net_flow = np.cumsum(net_flow, axis=1)
+
+    valuations = db.execute(text("""
+        SELECT fund_id, valuation_date, nav_amount
+        FROM fund_valuations
+        WHERE deleted_at IS NULL AND fund_id = ANY(:ids) AND valuation_date <= :end
+    """), {"ids": ids, "end": m.end}).all()
+
+    # Roll the last reported NAV forward by net flows since its valuation date:
+    # store NAV minus flows to date at each valuation, then add flows to date back.
+    baseline = _step_matrix(m, ids, [
+        (
+            v.fund_id,
+            v.valuation_date,
+            v.nav_amount - sum(a for d, a in flow_history[v.fund_id] if d <= v.valuation_date),
+        )
+        for v in valuations
+    ])
+    value = np.where(np.isnan(baseline), called, baseline + net_flow)
+
+    rates = load_kwd_rate_series(db, {f.currency for f in funds}, m.start, m.end)
+    fx = np.vstack([kwd_factor_series(rates, f.currency, m.days) for f in funds])
+    starts = [min([f.created] + [d for d, _ in flow_history[f.id]]) for f in funds]
+    active = m.active_mask(starts, [f.deleted for f in funds])
+    values = np.nan_to_num(np.where(active, value * fx, 0))
+    # Paid-in capital arrives through capital calls, so only exits are implied
+    m.add("private_funds", ids, values, m.boundary_flows(values, active, entries=False))
+
+
+def build_value_matrix(db: Session, start: date, end: date) -> ValueMatrix:
+    """Value every position in KWD fils for each day from start to end."""
+    m = ValueMatrix(start, end)
+    _equity_values(db, m)
+    _fixed_income_values(db, m)
+    _real_estate_values(db, m)
+    _private_fund_values(db, m)
+    return m
+
+
+def inception_date(db: Session) -> Optional[date]:
+    return db.execute(text("""
+        SELECT LEAST(
+            (SELECT MIN(transaction_date) FROM equity_transactions WHERE deleted_at IS NULL),
+            (SELECT MIN(created_at)::date FROM equity_holdings WHERE deleted_at IS NULL),
+            (SELECT MIN(purchase_date) FROM fixed_income_holdings WHERE deleted_at IS NULL),
+            (SELECT MIN(purchase_date) FROM properties WHERE deleted_at IS NULL),
+            (SELECT MIN(payment_date) FROM capital_calls WHERE deleted_at IS NULL AND is_paid),
+            (SELECT MIN(created_at)::date FROM private_funds WHERE deleted_at IS NULL)
+        )
+    """)).scalar()
+
+
+def _nav_rows(m: ValueMatrix) -> List[dict]:
+    totals = m.by_asset_class()
+    rows = []
+    for t, d in enumerate(m.dates):
+        row = {f"{ac}_value": int(round(totals[ac][t])) for ac in ASSET_CLASSES}
+        row["nav_date"] = d
+        row["total_value_kwd"] = sum(row[f"{ac}_value"] for ac in ASSET_CLASSES)
+        rows.append(row)
+    return rows
+
+
+def extend_nav_series(db: Session, through: date) -> int:
+    """Persist daily NAV from the day after the last stored date up to `through`."""
+    last = db.query(func.max(PortfolioNav.nav_date)).scalar()
+    start = last + timedelta(days=1) if last else inception_date(db)
+    if start is None or start > through:
+        return 0
+
+    rows = _nav_rows(build_value_matrix(db, start, through))
+    stmt = insert(PortfolioNav).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PortfolioNav.nav_date],
+        set_={c: stmt.excluded[c] for c in rows[0] if c != "nav_date"}
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def invalidate_nav_series(db: Session, from_date: date) -> None:
+    """Drop stored NAV and cached returns from `from_date` on so they are recomputed."""
+    if from_date < date.today():
+        db.query(PortfolioNav).filter(PortfolioNav.nav_date >= from_date).delete(synchronize_session=False)
+        invalidate_returns(db, from_date)
+
+
+def invalidate_returns(db: Session, from_date: date) -> None:
+    """Drop cached returns from `from_date` on, for writes that move external flows but not NAV."""
+    if from_date < date.today():
+        db.query(PortfolioReturn).filter(PortfolioReturn.as_of_date >= from_date).delete(synchronize_session=False)
+        # Return state resumes from a month end, so the whole month goes
+        db.query(PortfolioReturnState).filter(
+            PortfolioReturnState.state_date >= from_date.replace(day=1)
+        ).delete(synchronize_session=False)
+
+
+def get_nav_series(db: Session, start: date, end: date) -> List[dict]:
+    """Daily NAV between start and end: closed days from storage, today computed live."""
+    today = date.today()
+    stored = db.query(PortfolioNav).filter(
+        PortfolioNav.nav_date.between(start, end)
+    ).order_by(PortfolioNav.nav_date).all()
+    rows = [
+        {
+            "nav_date": n.nav_date,
+            "total_value_kwd": n.total_value_kwd,
+            **{f"{ac}_value": getattr(n, f"{ac}_value") for ac in ASSET_CLASSES},
+        }
+        for n in stored
+    ]
+    if start <= today <= end:
+        rows.extend(_nav_rows(build_value_matrix(db, today, today)))
+    return rows
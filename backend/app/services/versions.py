@@ -0,0 +1,88 @@
+import hashlib
+from datetime import date
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.table_version import TableVersion
+
+# Everything the portfolio summary and exposures read, live or reconstructed as of a past day
+PORTFOLIO_TABLES = (
+    "equity_holdings", "equity_transactions", "price_history",
+    "fixed_income_holdings",
+    "properties", "units", "property_valuations",
+    "private_funds", "capital_calls", "distributions", "fund_valuations",
+    "exchange_rates",
+)
+
+# Key in session.info
+BUMPED_KEY = "bumped_versions"
+
+# What the commit trigger would do anyway, run just before it to see the result
+BUMP_SQL = "SELECT written_table, new_version FROM bump_written_versions()"
+
+
+def table_versions(db: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """Current write counter per table; a table never written to is at 0."""
+    tables = sorted(set(tables))
+    rows = db.query(TableVersion.table_name, TableVersion.version).filter(
+        TableVersion.table_name.in_(tables)
+    ).all()
+    versions = dict.fromkeys(tables, 0)
+    versions.update(dict(rows))
+    return versions
+
+
+def source_version(db: Session, tables: Iterable[str]) -> str:
+    """Fingerprint of the versions of `tables`, for stamping data derived from them."""
+    versions = table_versions(db, tables)
+    key = "|".join(f"{t}={v}" for t, v in versions.items())
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def compute_etag(db: Session, tables: Iterable[str], *parts: str) -> str:
+    """Weak ETag over the versions of `tables` and anything else the response varies by.
+
+    The date is always mixed in so responses stamped with today's date turn over at midnight.
+    """
+    versions = table_versions(db, tables)
+    key = [f"{t}={v}" for t, v in versions.items()] + [date.today().isoformat()] + list(parts)
+    return 'W/"%s"' % hashlib.blake2b("|".join(key).encode(), digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as If-None-Match requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _bump_written(session: Session) -> None:
+    """Bump the tables this transaction wrote as its last statement, keeping the new versions.
+
+    The database bumps them at commit regardless; doing it here only lets
+    the hooks after commit know which versions their own writes made.
+    """
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    rows = session.connection().execute(text(BUMP_SQL)).all()
+    session.info[BUMPED_KEY] = dict(rows)
+
+
+def _discard_bumped(session: Session, previous_transaction=None) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(BUMPED_KEY, None)
+
+
+def register_version_hooks(session_factory: sessionmaker) -> None:
+    """Leave the versions each commit through sessions of this factory bumped in session.info.
+
+    Register after every hook that writes in before_commit, so their tables are included.
+    """
+    if event.contains(session_factory, "before_commit", _bump_written):
+        return
+    event.listen(session_factory, "before_commit", _bump_written)
+    event.listen(session_factory, "after_rollback", _discard_bumped)
@@ -0,0 +1,53 @@
+from typing import Dict, List, Tuple, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel as Schema
+from sqlalchemy import inspect
+from sqlalchemy.orm import Query
+
+# Read endpoints select exactly the columns their response schema exposes and
+# hand plain dicts to orjson, skipping ORM identity-map loading, per-attribute
+# Pydantic validation and the stdlib json encoder. orjson renders UUID, date,
+# datetime and Enum values the same way Pydantic does.
+
+_columns: Dict[tuple, list] = {}
+
+
+def response_columns(model: type, schema: Type[Schema], exclude: Tuple[str, ...] = ()) -> list:
+    """Model columns for every field of `schema`, in schema order, labelled by field name.
+
+    Nested relationship fields cannot be selected as columns; list them in
+    `exclude` and fill them in separately.
+    """
+    key = (model, schema, exclude)
+    if key not in _columns:
+        fields = [name for name in schema.model_fields if name not in exclude]
+        columns = inspect(model).columns
+        missing = [name for name in fields if name not in columns]
+        if missing:
+            raise AttributeError(f"{model.__name__} has no column for {schema.__name__} fields {missing}")
+        _columns[key] = [getattr(model, name).label(name) for name in fields]
+    return _columns[key]
+
+
+def row_dicts(query: Query) -> List[dict]:
+    return [row._asdict() for row in query.all()]
+
+
+def json_response(content) -> ORJSONResponse:
+    return ORJSONResponse(content=content)
+
+
+def page_content(query: Query, page: int, size: int) -> dict:
+    """Same shape as PaginatedResponse, built from a column query."""
+    total = query.order_by(None).count()
+    return {
+        "items": row_dicts(query.offset((page - 1) * size).limit(size)),
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": (total + size - 1) // size,
+    }
+
+
+def paginated_response(query: Query, page: int, size: int) -> ORJSONResponse:
+    return json_response(page_content(query, page, size))
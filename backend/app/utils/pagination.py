@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional
+from uuid import UUID
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor for the sort key of the last row on a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types: type) -> Optional[List[Any]]:
+    """Parse a cursor produced by encode_cursor back into (datetime, date, UUID, ...) values."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError
+        return [
+            t.fromisoformat(v) if t in (date, datetime) else UUID(v) if t is UUID else t(v)
+            for t, v in zip(types, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
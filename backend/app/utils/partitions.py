@@ -0,0 +1,152 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+# Committed partitions seen in the catalog, per parent table. Partitions are
+# only ever created in their own short transaction, so everything cached here
+# is committed.
+_known_partitions: Dict[str, Set[str]] = {}
+
+# Partition key column of each model range partitioned by month
+_partition_keys: Dict[type, str] = {}
+
+# Every table range partitioned by month
+PARTITIONED_TABLES = ("audit_logs", "equity_transactions", "price_history")
+
+# Months past the current one created ahead of time, at startup and by the
+# daily scripts/create_partitions.py job, so writes almost never create one
+MONTHS_AHEAD = 3
+
+# Longest an on-demand creation waits for its locks. It cannot get them while
+# the caller's own transaction has written a table the parent references.
+CREATE_LOCK_TIMEOUT = "5s"
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class PartitionBusyError(Exception):
+    def __init__(self, table: str):
+        self.table = table
+        super().__init__(f"Could not create a new partition of {table} right now, please retry")
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def list_partitions(db: Union[Session, Connection], table: str) -> List[str]:
+    rows = db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        ORDER BY c.relname
+    """), {"table": table}).all()
+    return [r[0] for r in rows]
+
+
+def _create_partitions(engine: Engine, table: str, months: List[date]) -> Tuple[Set[str], List[str]]:
+    """Create the missing partitions of these months in a transaction of their own.
+
+    Returns every partition of `table` and the ones this call created.
+    """
+    created = []
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = '{CREATE_LOCK_TIMEOUT}'"))
+            # Conflicts with itself but not with reads or writes of the parent,
+            # so concurrent creators queue here instead of colliding in the catalog
+            conn.execute(text(f"LOCK TABLE {table} IN SHARE UPDATE EXCLUSIVE MODE"))
+            existing = set(list_partitions(conn, table))
+            for month in months:
+                name = partition_name(table, month)
+                if name in existing:
+                    continue
+                # Attaching takes the same weak lock; CREATE ... PARTITION OF
+                # would hold the parent exclusively
+                conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                conn.execute(text(
+                    f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{(month + relativedelta(months=1)).isoformat()}')"
+                ))
+                existing.add(name)
+                created.append(name)
+    except OperationalError as exc:
+        if getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+            raise PartitionBusyError(table) from exc
+        raise
+    return existing, created
+
+
+def ensure_partitions(db: Session, table: str, months: Iterable[date]) -> List[str]:
+    """Make sure monthly range partitions of `table` exist for these months.
+
+    Missing ones are created and committed on a separate connection, never
+    in the caller's transaction, which only reads the catalog. Raises
+    PartitionBusyError if the locks to create them are not granted in time.
+    """
+    months = sorted({month_start(m) for m in months})
+    if all(partition_name(table, m) in _known_partitions.get(table, ()) for m in months):
+        return []
+
+    existing = set(list_partitions(db, table))
+    missing = [m for m in months if partition_name(table, m) not in existing]
+    created = []
+    if missing:
+        existing, created = _create_partitions(db.get_bind().engine, table, missing)
+    _known_partitions[table] = existing
+    return created
+
+
+def ensure_monthly_partitions(db: Session, table: str, start: date, end: date) -> List[str]:
+    """Create any missing monthly range partitions of `table` covering start..end."""
+    months = []
+    month = month_start(start)
+    while month <= end:
+        months.append(month)
+        month += relativedelta(months=1)
+    return ensure_partitions(db, table, months)
+
+
+def create_upcoming_partitions(db: Session, today: Optional[date] = None) -> List[str]:
+    """Create the partitions of every partitioned table from this month through MONTHS_AHEAD."""
+    today = today or date.today()
+    created = []
+    for table in PARTITIONED_TABLES:
+        created += ensure_monthly_partitions(db, table, today, today + relativedelta(months=MONTHS_AHEAD))
+    return created
+
+
+def forget_partition(table: str, name: str) -> None:
+    _known_partitions.get(table, set()).discard(name)
+
+
+def _ensure_for_flush(session: Session, flush_context, instances) -> None:
+    """Create the partitions of the months new and changed rows are about to land in."""
+    months: Dict[str, Set[date]] = {}
+    for obj in list(session.new) + list(session.dirty):
+        key = _partition_keys.get(type(obj))
+        value = getattr(obj, key) if key else None
+        if value is not None:
+            months.setdefault(obj.__tablename__, set()).add(value)
+    # Only the months written rather than a min..max span, so a backdated row
+    # does not create every partition in between
+    with session.no_autoflush:
+        for table, table_months in months.items():
+            ensure_partitions(session, table, table_months)
+
+
+def register_partition_hooks(session_factory: sessionmaker, partition_keys: Dict[type, str]) -> None:
+    """Create missing monthly partitions for ORM writes to these models, keyed by their partition column."""
+    _partition_keys.update(partition_keys)
+    if event.contains(session_factory, "before_flush", _ensure_for_flush):
+        return
+    event.listen(session_factory, "before_flush", _ensure_for_flush)
@@ -0,0 +1,25 @@
+"""Archive audit log partitions older than the retention window to compressed JSON lines."""
+import sys
+sys.path.insert(0, '.')
+
+from app.core.database import SessionLocal
+from app.core.session_hooks import register_session_hooks
+from app.core.config import settings
+from app.services.audit_archive import apply_retention
+
+
+def main():
+    register_session_hooks()
+    db = SessionLocal()
+    try:
+        archived = apply_retention(db)
+        for run in archived:
+            print(f"Archived {run['rows']} rows from {run['month']:%Y-%m} to {run['path']}")
+        if not archived:
+            print(f"Nothing older than {settings.AUDIT_RETENTION_MONTHS} months to archive")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
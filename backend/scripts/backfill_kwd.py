@@ -0,0 +1,48 @@
+"""Recompute every stored KWD amount from its original currency at the rate of its date.
+
+Safe to interrupt: a rerun resumes after the last committed batch.
+"""
+import argparse
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.core.database import SessionLocal
+from app.core.session_hooks import register_session_hooks
+from app.services.kwd_backfill import DEFAULT_BATCH_SIZE, backfill_status, run_kwd_backfill
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Discard saved progress and start over")
+    args = parser.parse_args()
+
+    register_session_hooks()
+    db = SessionLocal()
+    # Throughput counts only this run's rows, not those of a resumed one
+    resumed = {} if args.restart else {p.table_name: p.rows_scanned for p in backfill_status(db)}
+    scanned = {}
+    started = time.monotonic()
+
+    def report(p):
+        pct = p.rows_scanned / p.total_rows * 100 if p.total_rows else 100.0
+        scanned[p.table_name] = p.rows_scanned - resumed.get(p.table_name, 0)
+        rate = sum(scanned.values()) / max(time.monotonic() - started, 1e-9)
+        print(
+            f"{p.table_name:<24} {p.rows_scanned:>10,}/{p.total_rows:<10,} {pct:5.1f}%  "
+            f"updated {p.rows_updated:,}  no rate {p.rows_missing_rate:,}  {rate:,.0f} rows/s",
+            flush=True
+        )
+
+    try:
+        results = run_kwd_backfill(db, args.batch_size, args.restart, on_batch=report)
+        print(f"Done in {time.monotonic() - started:.1f}s")
+        for p in results:
+            print(f"  {p.table_name:<24} {p.rows_updated:,} updated, {p.rows_missing_rate:,} without a rate")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure latency of an ordinary API route while a burst of logins hits the server.
+
+Run against a live server, e.g.:
+
+    uvicorn app.main:app --port 8000 &
+    python scripts/benchmark_login_burst.py --base-url http://localhost:8000 --logins 100
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import threading
+import time
+import httpx
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def probe(client, url, headers, stop, samples):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            client.get(url, headers=headers)
+        except httpx.TransportError:
+            # Dropped keep-alive connection; the client reconnects on the next request
+            continue
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.01)
+
+
+def measure(client, url, headers, seconds=None, during=None):
+    samples, stop = [], threading.Event()
+    thread = threading.Thread(target=probe, args=(client, url, headers, stop, samples))
+    thread.start()
+    if during:
+        during()
+    else:
+        time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return samples
+
+
+def report(label, samples):
+    print(
+        f"{label:<16} n={len(samples):<5} p50={statistics.median(samples):7.1f} ms  "
+        f"p95={percentile(samples, 95):7.1f} ms  max={max(samples):7.1f} ms"
+    )
+
+
+async def _burst(login_url, credentials, logins):
+    async def login(client):
+        started = time.perf_counter()
+        response = await client.post(login_url, json=credentials)
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    limits = httpx.Limits(max_connections=logins)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        return await asyncio.gather(*(login(client) for _ in range(logins)))
+
+
+def burst_worker(login_url, credentials, logins, results):
+    results.put(asyncio.run(_burst(login_url, credentials, logins)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--route", default="/api/v1/exchange-rates")
+    args = parser.parse_args()
+
+    login_url = f"{args.base_url}/api/v1/auth/login"
+    credentials = {"username": args.username, "password": args.password}
+
+    with httpx.Client(timeout=60) as client:
+        token = client.post(login_url, json=credentials).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        url = f"{args.base_url}{args.route}"
+
+        baseline = measure(client, url, headers, seconds=3)
+
+        # The burst runs in its own process so its client work does not skew the probe
+        results = multiprocessing.Queue()
+
+        def burst():
+            worker = multiprocessing.Process(target=burst_worker, args=(login_url, credentials, args.logins, results))
+            worker.start()
+            outcome.extend(results.get())
+            worker.join()
+
+        outcome = []
+        during = measure(client, url, headers, during=burst)
+
+    statuses = [code for code, _ in outcome]
+    print(f"GET {args.route} while {args.logins} logins arrive at once")
+    report("baseline", baseline)
+    report("during burst", during)
+    report("login", [elapsed for _, elapsed in outcome])
+    for code in sorted(set(statuses)):
+        print(f"  login {code}: {statuses.count(code)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Create monthly partitions MONTHS_AHEAD past this month for every partitioned table; run daily, e.g. from cron."""
+import sys
+sys.path.insert(0, '.')
+
+from app.core.database import SessionLocal
+from app.utils.partitions import MONTHS_AHEAD, create_upcoming_partitions
+
+
+def main():
+    db = SessionLocal()
+    try:
+        created = create_upcoming_partitions(db)
+        for name in created:
+            print(f"Created {name}")
+        if not created:
+            print(f"All partitions up to {MONTHS_AHEAD} months ahead already exist")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Extend dense daily exchange rates to FX_FORWARD_DAYS past today; run daily, e.g. from cron."""
+import sys
+from datetime import date, timedelta
+sys.path.insert(0, '.')
+
+from app.core.database import SessionLocal
+from app.core.session_hooks import register_session_hooks
+from app.services.fx import FX_FORWARD_DAYS, ensure_fx_rates_daily, fx_daily_coverage
+
+
+def main():
+    register_session_hooks()
+    db = SessionLocal()
+    try:
+        through = date.today() + timedelta(days=FX_FORWARD_DAYS)
+        ensure_fx_rates_daily(db, through)
+        covered = fx_daily_coverage(db, through)
+        db.commit()
+        print(f"Exchange rates covered through {covered}" if covered else "No exchange rates loaded")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Generate expected rent for every occupied unit, for the current month or --month YYYY-MM."""
+import argparse
+import sys
+from datetime import date, datetime
+sys.path.insert(0, '.')
+
+from app.core.database import SessionLocal
+from app.core.session_hooks import register_session_hooks
+from app.services.rent_roll import generate_rent_roll
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--month", type=lambda s: datetime.strptime(s, "%Y-%m").date(), default=date.today())
+    args = parser.parse_args()
+
+    register_session_hooks()
+    db = SessionLocal()
+    try:
+        roll = generate_rent_roll(db, args.month)
+        db.commit()
+        print(
+            f"Rent roll {roll.period_start:%Y-%m}: {roll.created} created, "
+            f"{roll.skipped} already recorded, {roll.eligible} eligible units"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Bulk load exchange rates from a CSV of from_currency,to_currency,rate_date,rate[,source]."""
+import argparse
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.core.database import SessionLocal
+from app.core.session_hooks import register_session_hooks
+from app.services.fx_import import FxImportFormatError, load_fx_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="CSV file, rates as decimal units of to_currency per from_currency")
+    parser.add_argument("--source", default="import", help="Recorded on lines without a source column")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    register_session_hooks()
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            result = load_fx_csv(db, f, args.source)
+        db.commit()
+    except FxImportFormatError as e:
+        sys.exit(str(e))
+    finally:
+        db.close()
+
+    print(
+        f"{result.rows:,} rows in {time.monotonic() - started:.1f}s: {result.inserted:,} inserted, "
+        f"{result.updated:,} updated, {result.unchanged:,} unchanged, {result.invalid:,} invalid"
+    )
+    if result.start:
+        print(f"Rates changed from {result.start} to {result.end}")
+    if result.revaluation and result.revaluation.currencies:
+        r = result.revaluation
+        print(
+            f"Revalued {', '.join(r.currencies)}: {r.equities} equities, "
+            f"{r.fixed_income} fixed income, {r.private_funds} private funds"
+        )
+    for e in result.errors:
+        print(f"  line {e.row}: {e.message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,13 @@ sys.path.insert(0, '.')
 
 from sqlalchemy import text
 from app.core.database import SessionLocal
+from app.core.session_hooks import register_session_hooks
 from app.core.security import get_password_hash
 import uuid
 from datetime import datetime
 
 def seed():
+    register_session_hooks()
     db = SessionLocal()
     now = datetime.utcnow()
     
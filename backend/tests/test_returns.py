@@ -0,0 +1,85 @@
+"""Modified Dietz, daily-linked TWR and Newton MWR against hand-computed cash-flow examples."""
+import numpy as np
+import pytest
+
+from app.services.returns import _daily_log_returns, _modified_dietz, _money_weighted
+
+
+def returns(values, flows):
+    """(Dietz, daily-linked, MWR) of one position over its whole series; day 0 is the base."""
+    values = np.array([values], dtype=float)
+    flows = np.array([flows], dtype=float)
+    end = values.shape[1] - 1
+    dietz = _modified_dietz(values, flows, 0, end)
+    linked = np.expm1(_daily_log_returns(values, flows)[:, end])
+    mwr = _money_weighted(values, flows, 0, end, dietz)
+    return dietz[0], linked[0], mwr[0]
+
+
+def test_zero_flows_all_equal_the_simple_return():
+    dietz, linked, mwr = returns([100, 105, 121], [0, 0, 0])
+    assert dietz == pytest.approx(0.21)
+    assert linked == pytest.approx(0.21)
+    assert mwr == pytest.approx(0.21)
+
+
+def test_flow_on_day_0_is_part_of_the_opening_value():
+    # The base day's value already holds its flow, so it moves nothing
+    dietz, linked, mwr = returns([100, 110, 121], [100, 0, 0])
+    assert dietz == pytest.approx(0.21)
+    assert linked == pytest.approx(0.21)
+    assert mwr == pytest.approx(0.21)
+
+
+def test_inflow_on_the_last_day():
+    # 100 -> 110, then 150 arrives at the start of the last day and earns nothing
+    dietz, linked, mwr = returns([100, 110, 260], [0, 0, 150])
+    # Gain 10 on 100 plus 150 weighted for one of two days
+    assert dietz == pytest.approx(10 / 175)
+    assert linked == pytest.approx(0.10)
+    # Paid 100 on day 0, received 260 - 150 on day 2
+    assert mwr == pytest.approx(0.10)
+
+
+def test_outflow_on_the_last_day():
+    # Outflows leave at the end of the day, after earning that day's return
+    dietz, linked, mwr = returns([100, 110, 71], [0, 0, -50])
+    assert dietz == pytest.approx(21 / 75)
+    assert linked == pytest.approx(0.21)
+    assert mwr == pytest.approx(0.21)
+
+
+def test_mid_period_inflow():
+    # 100 grows 10% on day 1; 100 more arrives on day 2, and the 210 grows 10% on day 3
+    values = [100, 110, 210, 231]
+    flows = [0, 0, 100, 0]
+    dietz, linked, mwr = returns(values, flows)
+    assert dietz == pytest.approx(31 / (100 + 100 * 2 / 3))
+    assert linked == pytest.approx(1.1 * 1.1 - 1)
+    # NPV at the daily rate is zero: -100 - 100 / (1 + r) ** 2 + 231 / (1 + r) ** 3
+    daily = (1 + mwr) ** (1 / 3) - 1
+    assert -100 - 100 / (1 + daily) ** 2 + 231 / (1 + daily) ** 3 == pytest.approx(0, abs=1e-6)
+
+
+def test_mwr_without_a_sign_change_has_no_rate():
+    values = np.array([
+        [100, 50, 0],  # everything paid in, nothing back
+        [0, 0, 50],  # nothing paid in
+    ], dtype=float)
+    flows = np.zeros(values.shape)
+    mwr = _money_weighted(values, flows, 0, 2, np.zeros(2))
+    assert np.isnan(mwr).all()
+
+
+def test_rows_are_independent():
+    values = np.array([[100, 105, 121], [100, 110, 260]], dtype=float)
+    flows = np.array([[0, 0, 0], [0, 0, 150]], dtype=float)
+    dietz = _modified_dietz(values, flows, 0, 2)
+    mwr = _money_weighted(values, flows, 0, 2, dietz)
+    assert dietz == pytest.approx([0.21, 10 / 175])
+    assert mwr == pytest.approx([0.21, 0.10])
+
+
+def test_no_capital_has_no_dietz_return():
+    dietz = _modified_dietz(np.zeros((1, 3)), np.zeros((1, 3)), 0, 2)
+    assert np.isnan(dietz).all()